@@ -4,6 +4,7 @@
 
 # Title: get_out_of_compliance.py
 # Description: Downloads the Dashboard -> Compliance Report and generates a list of objects that are out of compliance
+#              The report is filtered as it streams in, so only the non-compliant rows are kept
 
 # Author: Steven Tong
 # GitHub: stevenctong
@@ -11,8 +12,9 @@
 
 import rubrik_cdm
 import urllib3
-import urllib2
+import requests
 import csv
+import io
 from datetime import datetime
 # Use to import Rubrik login variables from another file
 from rubrik_info import *
@@ -28,49 +30,75 @@ urllib3.disable_warnings()
 today = datetime.today()
 today = today.strftime("%Y-%m-%d_%H%M")
 
-# Local path to download compliance report CSV
-compliance_csv_dir = './'
-compliance_csv_filename = 'compliance_report_{}.csv'.format(today)
-compliance_csv = '{}{}'.format(compliance_csv_dir, compliance_csv_filename)
-
 # Local path to write non-compliant objects report CSV
 non_compliant_csv_dir = './'
 non_compliant_csv_filename = 'non_compliant_objects_{}.csv'.format(today)
 non_compliant_csv = '{}{}'.format(non_compliant_csv_dir, non_compliant_csv_filename)
 
+# Optional filters, only keep non-compliant objects matching every filter that is set
+# Object types to keep, e.g. ['vSphere VM', 'SQL Server DB'], or [] for all
+object_types = []
+# Keep objects whose location contains any of these, e.g. ['vcenter1'], or [] for all
+locations = []
+# SLA Domains to keep, or [] for all
+sla_domains = []
+
+
+def build_filters(object_types=None, locations=None, sla_domains=None):
+    """
+    build_filters returns the list of predicates a compliance report row must pass,
+    starting with the row being out of compliance.
+    """
+    filters = [lambda row: row['Last Snapshot Status'] == 'Out of Compliance']
+    if object_types:
+        filters.append(lambda row: row['Object Type'] in object_types)
+    if locations:
+        filters.append(lambda row: any(location in row['Location'] for location in locations))
+    if sla_domains:
+        filters.append(lambda row: row['SLA Domain'] in sla_domains)
+    return filters
+
+
+def stream_csv_rows(url):
+    """
+    stream_csv_rows is a generator of the rows of a CSV at a URL, decoded as the
+    response arrives so the CSV is never held in memory or written to disk.
+    """
+    with requests.get(url, stream=True, verify=False) as response:
+        response.raise_for_status()
+        response.raw.decode_content = True
+        # Keep the body open at its end so the text wrapper can read the last line
+        response.raw.auto_close = False
+        for row in csv.DictReader(io.TextIOWrapper(response.raw, encoding='utf-8-sig', newline='')):
+            yield row
+
+
 # Use one of the following to connect to the Rubrik cluster
 # rubrik = rubrik_cdm.Connect(node_ip, username, password)
 rubrik = rubrik_cdm.Connect(node_ip, api_token=api_token)
 
 # Get Dashboard -> Compliance Report CSV link
-print("Downloading Dashboard -> Compliance Report to file: {}".format(compliance_csv))
+print("Streaming Dashboard -> Compliance Report")
 compliance_url = rubrik.get('internal', '/report/data_source/FrequentDataSource/csv')
 
-# Replace any spaces in URL with %20
-compliance_file = urllib2.urlopen(compliance_url.replace(" ","%20"))
-
-# Download CSV to local path
-with open(compliance_csv, 'wb') as local_file:
-    local_file.write(compliance_file.read())
-
-non_compliant_objects = []
+filters = build_filters(object_types, locations, sla_domains)
+non_compliant_count = 0
 
 print("The following objects are out of compliance:\n")
 
-# Read CSV again and build list of non-compliant objects (ones that missed the last snapshot)
-with open(compliance_csv, 'r') as csv_file:
-    csv_reader = csv.DictReader(csv_file, delimiter=',')
-    non_compliant_objects_headers = csv_reader.fieldnames
-    for row in csv_reader:
-        if (row['Last Snapshot Status'] == 'Out of Compliance'):
+# Filter the report rows as they are downloaded and write only the non-compliant objects
+# (ones that missed the last snapshot) to the CSV for review
+with open(non_compliant_csv, 'w', newline='') as csv_file:
+    csv_writer = None
+    # Replace any spaces in URL with %20
+    for row in stream_csv_rows(compliance_url.replace(" ", "%20")):
+        if csv_writer is None:
+            csv_writer = csv.DictWriter(csv_file, fieldnames=list(row.keys()))
+            csv_writer.writeheader()
+        if all(row_filter(row) for row_filter in filters):
             print('Name: {:22s}, Location: {:27s}, Type: {}'.format(row['Object Name'], row['Location'], row['Object Type']))
-            non_compliant_objects.append(row.copy())
-
-print("\nTotal number of non-compliant objects: {}".format(len(non_compliant_objects)))
-print("Writing non-compliant objects to CSV file: {}".format(non_compliant_csv))
+            csv_writer.writerow(row)
+            non_compliant_count += 1
 
-# Write CSV of non-compliant objects for review
-with open(non_compliant_csv, 'w') as csv_file:
-    csv_writer = csv.DictWriter(csv_file, fieldnames = non_compliant_objects_headers)
-    csv_writer.writeheader()
-    csv_writer.writerows(non_compliant_objects)
+print("\nTotal number of non-compliant objects: {}".format(non_compliant_count))
+print("Wrote non-compliant objects to CSV file: {}".format(non_compliant_csv))
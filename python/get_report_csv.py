@@ -10,6 +10,8 @@
 
 import requests
 from datetime import datetime
+from incremental_store import IncrementalStore
+from stream_download import stream_download
 
 # Rubrik cluster hostname or IP
 rubrik_ip = ''
@@ -25,6 +27,13 @@ timestamp = datetime.now().strftime("%Y-%m-%d_%Hh%Mm")
 # Filename to write the CSV to
 csv_filename = "rubrik_report_{}.csv".format(timestamp)
 
+# Set a directory to only keep the rows that are new or changed since the last run.
+# Rows are matched on the key columns (all columns if None) and rows older than the
+# last timestamp column seen are skipped.
+incremental_store_dir = ''
+incremental_key_columns = None
+incremental_timestamp_column = None
+
 # REST API header including authorization
 header = {
     'Content-Type': 'application/json',
@@ -54,8 +63,13 @@ else:
 req_url  = "{}internal/report/{}/csv_link".format(base_url,report_id)
 req_csvlink = requests.get(req_url, verify=False, headers=header)
 
-# Download CSV and write to a file
-req_download = requests.get(req_csvlink.json(), verify=False, stream=True)
+# Download CSV and write it to a file in chunks, resuming if it is interrupted
+stream_download(req_csvlink.json(), csv_filename, verify=False)
 
-with open(csv_filename, "wb") as output:
-    output.write(req_download.content)
+# Append only the new and changed rows to the incremental store
+if incremental_store_dir:
+    store = IncrementalStore(incremental_store_dir, key_columns=incremental_key_columns,
+                             timestamp_column=incremental_timestamp_column)
+    counts = store.ingest(csv_filename)
+    store.close()
+    print("{} new and {} changed rows of {}".format(counts['new'], counts['changed'], counts['rows']))
@@ -1,51 +1,30 @@
-import requests
-import json
-import time
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from fnmatch import fnmatch
+from incremental_store import IncrementalStore
+from job_tracker import JobTracker
+from rsc_client import RscClient
+from stream_download import stream_download
 
 # Variables
-report_id = 5  # Set your desired report ID here
+report_ids = [5]  # Set your desired report IDs here
+report_name_patterns = []  # And/or report name globs, e.g. ['Protection Task*', '*Compliance*']
 service_account_path = '/rsc-service-account-rr.json'  # Path to service account JSON
-csv_report_filename = f"rubrik_report_csv-{datetime.now(timezone.utc).strftime('%Y-%m-%d_%H%M')}.csv"
-
-# Rubrik Authentication
-def authenticate_rsc(service_account_path):
-    try:
-        with open(service_account_path, 'r') as f:
-            service_account = json.load(f)
-        
-        required_keys = ['client_id', 'client_secret', 'access_token_uri']
-        missing_keys = [key for key in required_keys if key not in service_account]
-        
-        if missing_keys:
-            raise ValueError(f"The Service Account JSON file is missing required keys: {missing_keys}")
-        
-        url = service_account['access_token_uri']
-        payload = {
-            "grant_type": "client_credentials",
-            "client_id": service_account['client_id'],
-            "client_secret": service_account['client_secret']
-        }
-        headers = {
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        }
-        
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()
-        data = response.json()
-        access_token = data['access_token']
-        rubrik_url = url.replace("/api/client_token", "")
-        
-        return {
-            "access_token": access_token,
-            "rubrik_url": rubrik_url
-        }
-    except Exception as e:
-        raise Exception(f"Failed to authenticate: {e}")
+compress_csv = False  # Set to True to gzip the CSVs as they are downloaded
+max_downloads = 4  # Number of CSVs to download at a time
+max_generate = 4  # Number of CSV generation requests to send at a time
+timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d_%H%M')
+# Set a directory to only keep the rows that are new or changed since the last run,
+# each report is kept in its own sub-directory. Rows are matched on the key columns
+# (all columns if None) and rows older than the last timestamp column seen are skipped.
+incremental_store_dir = ''
+incremental_key_columns = None
+incremental_timestamp_column = None
 
 # Function: Generate Report CSV
-def generate_report_csv(endpoint, headers, report_id):
+def generate_report_csv(client, report_id):
     query = """
     mutation ($id: Int!, $config: CustomReportCreate) {
         downloadReportCsvAsync(input: {id: $id, config: $config}) {
@@ -54,19 +33,11 @@ def generate_report_csv(endpoint, headers, report_id):
         }
     }
     """
-    payload = {
-        "query": query,
-        "variables": {"id": report_id}
-    }
-    response = requests.post(endpoint, json=payload, headers=headers)
-    response.raise_for_status()
-    data = response.json()
-    if 'errors' in data:
-        raise Exception(data['errors'])
+    data = client.query(query, {"id": report_id})
     return data['data']['downloadReportCsvAsync']
 
-# Function: Get Report Name
-def get_report_name(endpoint, headers, report_id):
+# Function: Get Report Configs
+def get_report_configs(client):
     query = """
     query ($polarisReportsFilters: [PolarisReportsFilterInput!]) {
         allRscReportConfigs(polarisReportsFilters: $polarisReportsFilters) {
@@ -78,82 +49,89 @@ def get_report_name(endpoint, headers, report_id):
     variables = {
         "polarisReportsFilters": [{"field": "FILTER_UNSPECIFIED", "reportRooms": ["REPORT_ROOM_NONE"]}]
     }
-    payload = {"query": query, "variables": variables}
-    response = requests.post(endpoint, json=payload, headers=headers)
-    response.raise_for_status()
-    data = response.json()
-    reports = data['data']['allRscReportConfigs']
-    report_name = next((report['name'] for report in reports if report['id'] == report_id), None)
-    return report_name
+    data = client.query(query, variables)
+    return data['data']['allRscReportConfigs']
 
-# Function: Get Download Status
-def get_download_status(endpoint, headers):
-    query = """
-    query {
-        allUserFiles {
-            downloads {
-                externalId
-                state
-                filename
-            }
-        }
-    }
-    """
-    payload = {"query": query}
-    response = requests.post(endpoint, json=payload, headers=headers)
-    response.raise_for_status()
-    data = response.json()
-    downloads = []
-    for item in data['data']['allUserFiles']:
-        downloads.extend(item.get('downloads', []))
-    return downloads
-
-# Function: Get Report CSV Link
-def get_report_csv_link(auth, report_id):
-    rubrik_url = auth['rubrik_url']
-    endpoint = f"{rubrik_url}/api/graphql"
-    headers = {
-        'Content-Type': 'application/json',
-        'Accept': 'application/json',
-        'Authorization': f"Bearer {auth['access_token']}"
-    }
-    
-    report_name = get_report_name(endpoint, headers, report_id)
-    if not report_name:
-        raise Exception(f"No report found for report ID: {report_id}")
-    
-    print(f"Generating CSV for report: {report_name} (report ID: {report_id})")
-    generate_report_csv(endpoint, headers, report_id)
-    
-    while True:
-        download_status = get_download_status(endpoint, headers)
-        matching_report = next((d for d in download_status if report_name in d['filename']), None)
-        if matching_report and matching_report['state'] == 'READY':
-            break
-        print(f"Waiting for CSV to be ready, current status: {matching_report['state'] if matching_report else 'UNKNOWN'}")
-        time.sleep(10)
-    
-    download_url = f"{rubrik_url}/file-downloads/{matching_report['externalId']}"
-    return download_url
+# Function: Resolve Reports
+def resolve_reports(client, report_ids, report_name_patterns):
+    # Match the IDs and name globs against one fetch of every report config
+    reports = get_report_configs(client)
+    report_names = {report['id']: report['name'] for report in reports}
+    missing = [report_id for report_id in report_ids if report_id not in report_names]
+    if missing:
+        raise Exception(f"No report found for report IDs: {missing}")
+    selected = {report_id: report_names[report_id] for report_id in report_ids}
+    for pattern in report_name_patterns:
+        matches = {report['id']: report['name'] for report in reports if fnmatch(report['name'], pattern)}
+        if not matches:
+            raise Exception(f"No report found matching: {pattern}")
+        selected.update(matches)
+    return selected
 
 # Function: Download Report CSV
-def download_report_csv(download_url, auth, filename):
-    headers = {
-        'Authorization': f"Bearer {auth['access_token']}"
-    }
-    response = requests.get(download_url, headers=headers)
-    response.raise_for_status()
-    with open(filename, 'wb') as f:
-        f.write(response.content)
+def download_report_csv(download_url, client, filename, compress=False):
+    # Streams the CSV to disk in chunks, resuming the download if it is interrupted
+    stream_download(download_url, filename, get=client.get, compress=compress)
     return filename
 
+# Function: Report CSV Filename
+def report_csv_filename(report_id, report_name, compress=False):
+    safe_name = re.sub(r'[^A-Za-z0-9_.-]+', '_', report_name).strip('_')
+    filename = f"rubrik_report_csv-{safe_name}-{report_id}-{timestamp}.csv"
+    return filename + ".gz" if compress else filename
+
+# Function: Export Report CSVs
+def export_report_csvs(client, reports, max_downloads=4, max_generate=4, compress=False):
+    # Start generating every CSV, sending max_generate requests at a time
+    with ThreadPoolExecutor(max_workers=max_generate) as executor:
+        generated = dict(zip(reports, executor.map(lambda report_id: generate_report_csv(client, report_id), reports)))
+    tracker = JobTracker(client, max_interval=30)
+    references = {}
+    for report_id, job in generated.items():
+        print(f"Generating CSV for report: {reports[report_id]} (report ID: {report_id})")
+        references[job['referenceId']] = report_id
+        tracker.add_download(job['referenceId'], description=reports[report_id])
+
+    # Download each CSV as soon as it is ready, while the rest are still generating
+    saved = {}
+    failed = {}
+    with ThreadPoolExecutor(max_workers=max_downloads) as executor:
+        downloads = {}
+        for reference_id, result in tracker.track():
+            report_id = references[reference_id]
+            if not result['success']:
+                print(f"CSV generation for report {reports[report_id]} ended with state: {result['status']}")
+                failed[report_id] = result['status']
+                continue
+            filename = report_csv_filename(report_id, reports[report_id], compress)
+            download_url = f"{client.rubrik_url}/file-downloads/{reference_id}"
+            print(f"Downloading CSV for report: {reports[report_id]} from: {download_url}")
+            downloads[report_id] = executor.submit(download_report_csv, download_url, client, filename, compress)
+        for report_id, download in downloads.items():
+            try:
+                saved[report_id] = download.result()
+                print(f"Report {reports[report_id]} saved to: {saved[report_id]}")
+            except Exception as e:
+                print(f"Error downloading report {reports[report_id]}: {str(e)}")
+                failed[report_id] = str(e)
+    return saved, failed
+
 # Main Execution
 try:
     print("Authenticating...")
-    auth = authenticate_rsc(service_account_path)
-    csv_link = get_report_csv_link(auth, report_id)
-    print(f"Downloading CSV from: {csv_link}")
-    download_report_csv(csv_link, auth, csv_report_filename)
-    print(f"Report saved to: {csv_report_filename}")
+    client = RscClient(service_account_path, pool_maxsize=max(10, max_downloads, max_generate))
+    client.token()
+    reports = resolve_reports(client, report_ids, report_name_patterns)
+    saved, failed = export_report_csvs(client, reports, max_downloads=max_downloads,
+                                       max_generate=max_generate, compress=compress_csv)
+    print(f"{len(saved)} of {len(reports)} report CSVs saved")
+    if incremental_store_dir:
+        for report_id, filename in saved.items():
+            store = IncrementalStore(os.path.join(incremental_store_dir, f"report-{report_id}"),
+                                     key_columns=incremental_key_columns,
+                                     timestamp_column=incremental_timestamp_column)
+            counts = store.ingest(filename)
+            store.close()
+            print(f"Report {reports[report_id]}: {counts['new']} new and {counts['changed']} changed rows of {counts['rows']}")
 except Exception as e:
     print(f"Error: {str(e)}")
@@ -0,0 +1,198 @@
+#! /usr/bin/env python
+# https://build.rubrik.com
+
+# Title: incremental_store.py
+# Description: Incremental ingestion of report CSVs into a local store, so each refresh
+#              only keeps the rows that are new or changed since the last run. A watermark
+#              of the latest row timestamp skips rows older than the last run, less a small
+#              overlap, and a SQLite index of a hash of every row seen catches rows that are
+#              new or changed in the overlap or when the report has no usable timestamp. New
+#              and changed rows are appended as a new part file, Parquet if pyarrow is
+#              installed and gzip CSV if not.
+#
+# Usage:
+#   from incremental_store import IncrementalStore
+#   store = IncrementalStore('./report_store', key_columns=['Object Name', 'Start Time'],
+#                            timestamp_column='End Time')
+#   counts = store.ingest('rubrik_report_csv.csv')
+
+import csv
+import gzip
+import hashlib
+import os
+import sqlite3
+from datetime import datetime, timedelta, timezone
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# Rows written to a Parquet part file at a time
+PARQUET_BATCH_ROWS = 50000
+
+# Rows this close before the watermark are still checked against the index,
+# since rows with the same timestamp as the watermark can arrive in a later
+# report, and rows are not always in timestamp order
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def row_digest(values):
+    """Returns a 16 byte hash of a list of values"""
+    return hashlib.blake2b('\x1f'.join(values).encode('utf-8'), digest_size=16).digest()
+
+
+def parse_timestamp(value):
+    """Returns a report timestamp as a UTC datetime, or None if it isn't one"""
+    if not value:
+        return None
+    try:
+        timestamp = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
+
+
+def open_csv(path):
+    """Opens a CSV, or a gzip CSV if it ends with .gz, to read"""
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', newline='', encoding='utf-8-sig')
+    return open(path, 'r', newline='', encoding='utf-8-sig')
+
+
+class CsvPartWriter:
+    def __init__(self, path, columns):
+        self.path = f"{path}.csv.gz"
+        self.file = gzip.open(self.path, 'wt', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write(self, values):
+        self.writer.writerow(values)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetPartWriter:
+    def __init__(self, path, columns):
+        self.path = f"{path}.parquet"
+        self.columns = columns
+        self.schema = pyarrow.schema([(column, pyarrow.string()) for column in columns])
+        self.writer = pyarrow.parquet.ParquetWriter(self.path, self.schema)
+        self.batch = []
+
+    def _flush(self):
+        if self.batch:
+            columns = list(zip(*self.batch))
+            self.writer.write_table(pyarrow.table(
+                {column: list(values) for column, values in zip(self.columns, columns)},
+                schema=self.schema))
+            self.batch = []
+
+    def write(self, values):
+        self.batch.append(values)
+        if len(self.batch) >= PARQUET_BATCH_ROWS:
+            self._flush()
+
+    def close(self):
+        self._flush()
+        self.writer.close()
+
+
+class IncrementalStore:
+    def __init__(self, store_dir, key_columns=None, timestamp_column=None, use_parquet=True):
+        """
+        :store_dir: Directory of the part files and the index
+        :key_columns: Columns that identify a row, so a changed row replaces
+                      the one before it in the index. All columns if None.
+        :timestamp_column: Column of the row timestamp the watermark is kept
+                           on, or None to only use the row hash index
+        :use_parquet: Write Parquet part files if pyarrow is installed
+        """
+        self.store_dir = store_dir
+        self.key_columns = key_columns
+        self.timestamp_column = timestamp_column
+        self.use_parquet = use_parquet and pyarrow is not None
+        os.makedirs(store_dir, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(store_dir, 'index.sqlite'))
+        self.db.execute("CREATE TABLE IF NOT EXISTS rows (key BLOB PRIMARY KEY, hash BLOB) WITHOUT ROWID")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+
+    @property
+    def watermark(self):
+        """Latest row timestamp ingested, as a UTC datetime, or None before the first run"""
+        row = self.db.execute("SELECT value FROM meta WHERE name = 'watermark'").fetchone()
+        return parse_timestamp(row[0]) if row else None
+
+    def _set_watermark(self, timestamp):
+        self.db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('watermark', ?)",
+                        (timestamp.isoformat(),))
+
+    def part_files(self):
+        return sorted(os.path.join(self.store_dir, name) for name in os.listdir(self.store_dir)
+                      if name.startswith('part-'))
+
+    def ingest(self, csv_path):
+        """
+        Appends the rows of a report CSV that are new or changed since the
+        last run to a new part file, and returns the counts of the rows.
+        """
+        counts = {'rows': 0, 'new': 0, 'changed': 0, 'unchanged': 0, 'before_watermark': 0}
+        watermark = self.watermark
+        latest = watermark
+        skip_before = watermark - WATERMARK_OVERLAP if watermark is not None else None
+        part_path = os.path.join(self.store_dir,
+                                 f"part-{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S%f')}")
+        writer = None
+        with open_csv(csv_path) as file:
+            reader = csv.reader(file)
+            columns = next(reader, None)
+            if columns is None:
+                return counts
+            key_indexes = [columns.index(column) for column in self.key_columns] if self.key_columns else None
+            timestamp_index = columns.index(self.timestamp_column) if self.timestamp_column else None
+            try:
+                for values in reader:
+                    counts['rows'] += 1
+                    if timestamp_index is not None:
+                        timestamp = parse_timestamp(values[timestamp_index])
+                        if timestamp is not None:
+                            if skip_before is not None and timestamp < skip_before:
+                                counts['before_watermark'] += 1
+                                continue
+                            if latest is None or timestamp > latest:
+                                latest = timestamp
+                    row_hash = row_digest(values)
+                    key = row_digest([values[index] for index in key_indexes]) if key_indexes else row_hash
+                    seen = self.db.execute("SELECT hash FROM rows WHERE key = ?", (key,)).fetchone()
+                    if seen and seen[0] == row_hash:
+                        counts['unchanged'] += 1
+                        continue
+                    counts['changed' if seen else 'new'] += 1
+                    self.db.execute("INSERT OR REPLACE INTO rows (key, hash) VALUES (?, ?)", (key, row_hash))
+                    if writer is None:
+                        writer = (ParquetPartWriter if self.use_parquet else CsvPartWriter)(part_path, columns)
+                    writer.write(values)
+            except BaseException:
+                # Don't keep index entries of rows whose part file is incomplete
+                if writer:
+                    writer.close()
+                    os.remove(writer.path)
+                self.db.rollback()
+                raise
+        if writer:
+            writer.close()
+        if latest is not None and latest != watermark:
+            self._set_watermark(latest)
+        # Index and watermark only move once the part file is complete
+        self.db.commit()
+        counts['part_file'] = writer.path if writer else None
+        return counts
+
+    def close(self):
+        self.db.close()
@@ -12,6 +12,7 @@
 import rubrik_cdm
 import urllib3
 from datetime import datetime
+from snapshot_index import SnapshotIndex
 # Use to import Rubrik variables info from another file
 from rubrik_info import *
 
@@ -46,28 +47,6 @@ datastore = ''
 # ---- VARIABLES - END ----
 
 
-def get_closest_snapshot(snapshot_list, recovery_datetime):
-    """
-    get_closest_snapshot finds the snapshot closest to a date and returns it.
-
-    :snapshot_list: A list of snapshots
-    :recovery_datetime: Find the snapshot in the list closest to this date
-    """
-
-    # Initiate the closest_snapshot as the current one to process
-    closest_snapshot = snapshot_list[0]
-    closest_snapshot_datetime = datetime.strptime(snapshot_list[0]['date'], '%Y-%m-%dT%H:%M:%S.%fZ')
-
-    # Loop through the snapshot list and compare the recovery date with the current snapshot in the list
-    # If it is closer than the closest_snapshot, then replace it as the closest_snapshot
-    for snapshots in snapshot_list:
-        snapshot_datetime = datetime.strptime(snapshots['date'], '%Y-%m-%dT%H:%M:%S.%fZ')
-        if (abs(recovery_datetime - snapshot_datetime) < abs(closest_snapshot_datetime - snapshot_datetime)):
-            closest_snapshot = snapshots
-            closest_snapshot_datetime = datetime.strptime(snapshots['date'], '%Y-%m-%dT%H:%M:%S.%fZ')
-    return closest_snapshot
-
-
 # Use one of the following methods to connect to the Rubrik cluster (login varaibles are defined previously)
 # rubrik = rubrik_cdm.Connect(node_ip, username, password)
 rubrik = rubrik_cdm.Connect(node_ip, api_token=api_token)
@@ -79,7 +58,7 @@ vm_snapshots = rubrik.get_vsphere_vm_snapshot(vm_name)
 recovery_datetime = datetime.strptime(recovery_date, '%m/%d/%Y %H:%M')
 
 # Get the closest snapshot to the recovery date in the list of snapshots on the VM
-snapshot = get_closest_snapshot(vm_snapshots['data'], recovery_datetime)
+snapshot = SnapshotIndex(vm_snapshots['data']).nearest(recovery_datetime)
 
 # Get the a list of ESXi hosts, filter for exact match, and grab Host ID
 esxi_host_info = rubrik.get('v1', '/vmware/host?primary_cluster_id=local')
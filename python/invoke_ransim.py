@@ -15,6 +15,7 @@ import paramiko
 import urllib3
 import csv
 from datetime import datetime
+from snapshot_counts import get_vm_snapshot_counts_by_name
 # Use to import Rubrik login variables from another file
 # from rubrik_info import *
 
@@ -38,14 +39,6 @@ vm_list = {
 
 backup_count = 6
 
-def get_vm_snapshot_num(vm_name):
-    """
-    get_vm_snapshot_num returns the total # of backups taken.
-    :vm_name: VM name to return the number of snapshots taken.
-    """
-    vm_info = rubrik.get_vsphere_vm_details(vm_name)
-    return vm_info['snapshotCount']
-
 # Use one of the following to connect to the Rubrik cluster
 rubrik = rubrik_cdm.Connect(node_ip, username, password)
 # rubrik = rubrik_cdm.Connect(node_ip, api_token=api_token)
@@ -53,8 +46,14 @@ rubrik = rubrik_cdm.Connect(node_ip, username, password)
 client = paramiko.SSHClient()
 client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
 
+# Get the total # of backups taken of every VM in the list, looking each VM up by name
+vm_snapcounts = get_vm_snapshot_counts_by_name(rubrik, vm_list)
+
 for vm in vm_list:
-    vm_snapcount = get_vm_snapshot_num(vm)
+    if (vm not in vm_snapcounts):
+        print("VM not found: {}".format(vm))
+        continue
+    vm_snapcount = vm_snapcounts[vm]
     if (vm_snapcount > backup_count):
         client.connect(hostname=vm_list[vm], username=ssh_username, password=ssh_password)
         client.exec_command(ssh_command)
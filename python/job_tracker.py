@@ -0,0 +1,204 @@
+#! /usr/bin/env python
+# https://build.rubrik.com
+
+# Title: job_tracker.py
+# Description: Tracks many outstanding Rubrik Security Cloud (RSC) async operations at once.
+#              Jobs are tracked by their activity series and report CSV downloads by their
+#              reference ID. Every tick sends one GraphQL query with an aliased field per
+#              pending job plus one allUserFiles for all pending downloads, instead of one
+#              query per item, split into queries of at most MAX_ALIASES_PER_QUERY jobs. A
+#              job whose field returns a GraphQL error is finished as failed without
+#              stopping the tracking of the others, while a query that fails as a whole
+#              is retried on the next tick. Polling starts fast so short jobs are seen as
+#              soon as they finish, and backs off while nothing changes so long jobs take
+#              fewer calls.
+#
+# Usage:
+#   from job_tracker import JobTracker
+#   tracker = JobTracker(client)
+#   tracker.add_job(job_id, description='bucket restore')
+#   tracker.add_download(reference_id)
+#   for key, result in tracker.track():
+#       print(key, result['status'])
+
+import time
+
+# Cluster UUID of activity series that run in RSC rather than on a cluster
+RSC_CLUSTER_UUID = '00000000-0000-0000-0000-000000000000'
+
+# Final activity series statuses, and the ones of those that succeeded
+JOB_DONE_STATUSES = ['Success', 'PartialSuccess', 'Failure', 'Canceled']
+JOB_SUCCESS_STATUSES = ['Success', 'PartialSuccess']
+
+# Final user file download states, and the one that succeeded
+DOWNLOAD_DONE_STATES = ['READY', 'FAILED', 'EXPIRED', 'CANCELED']
+DOWNLOAD_SUCCESS_STATES = ['READY']
+
+# Most jobs to check in one query
+MAX_ALIASES_PER_QUERY = 50
+
+
+class JobTracker:
+    def __init__(self, client, initial_interval=2, max_interval=60, backoff=1.5, timeout=None):
+        """
+        :client: RscClient to query with
+        :initial_interval: Seconds to wait before the first check and after new items are added
+        :max_interval: Longest number of seconds to wait between checks
+        :backoff: Factor the interval grows by after every check where nothing finished
+        :timeout: Seconds to track for before giving up on the pending items, or None
+        """
+        self.client = client
+        self.initial_interval = min(initial_interval, max_interval)
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.timeout = timeout
+        self.interval = self.initial_interval
+        self.jobs = {}
+        self.downloads = {}
+        self.results = {}
+        self.num_queries = 0
+
+    def add_job(self, job_id, cluster_uuid=RSC_CLUSTER_UUID, description=None):
+        """Tracks the activity series of a job, e.g. the jobId of startRecoverS3SnapshotJob"""
+        self.jobs[job_id] = {'cluster_uuid': cluster_uuid, 'description': description}
+        self.interval = self.initial_interval
+
+    def add_download(self, reference_id, description=None):
+        """Tracks a user file download, e.g. the referenceId of downloadReportCsvAsync"""
+        self.downloads[reference_id] = {'description': description}
+        self.interval = self.initial_interval
+
+    def pending(self):
+        return len(self.jobs) + len(self.downloads)
+
+    def _status_query(self, jobs, downloads=False):
+        """Returns the query and variables checking a list of (job ID, job), and the alias of each job"""
+        declarations = []
+        fields = []
+        variables = {}
+        aliases = {}
+        for index, (job_id, job) in enumerate(jobs):
+            alias = f"job{index}"
+            aliases[alias] = job_id
+            declarations.append(f"${alias}: ActivitySeriesInput!")
+            variables[alias] = {'activitySeriesId': job_id, 'clusterUuid': job['cluster_uuid']}
+            fields.append(f"""
+        {alias}: activitySeries(input: ${alias}) {{
+            lastActivityStatus
+            progress
+        }}""")
+        if downloads:
+            fields.append("""
+        allUserFiles {
+            downloads {
+                externalId
+                state
+                filename
+            }
+        }""")
+        declaration = f"({', '.join(declarations)}) " if declarations else ""
+        query = f"query {declaration}{{{''.join(fields)}\n    }}"
+        return query, variables, aliases
+
+    def _post(self, query, variables):
+        """
+        Sends a status query and returns its data and a dict of the field
+        alias -> error message of the fields that returned an error. If the
+        whole query failed, every field is None and the errors are under None.
+        """
+        response = self.client.post(query, variables or None)
+        response.raise_for_status()
+        body = response.json()
+        self.num_queries += 1
+        errors = {}
+        for error in body.get('errors') or []:
+            path = error.get('path') or [None]
+            errors.setdefault(path[0], error.get('message', str(error)))
+        return body.get('data') or {}, errors
+
+    def _finish_job(self, job_id, status, error=None):
+        job = self.jobs.pop(job_id)
+        result = {'type': 'job', 'status': status, 'success': status in JOB_SUCCESS_STATUSES,
+                  'description': job['description']}
+        if error:
+            result['error'] = error
+        return result
+
+    def _finish_download(self, reference_id, state, filename=None, error=None):
+        entry = self.downloads.pop(reference_id)
+        result = {'type': 'download', 'status': state, 'success': state in DOWNLOAD_SUCCESS_STATES,
+                  'filename': filename, 'description': entry['description']}
+        if error:
+            result['error'] = error
+        return result
+
+    def check(self):
+        """
+        Checks every pending item, with a query per MAX_ALIASES_PER_QUERY
+        jobs, and returns a dict of the ones that finished. Items whose
+        field returned an error are finished with the status 'Error'. The
+        items of a query that failed as a whole stay pending.
+        """
+        finished = {}
+        jobs = list(self.jobs.items())
+        # Downloads are checked with the first batch of jobs
+        batches = [jobs[start:start + MAX_ALIASES_PER_QUERY]
+                   for start in range(0, len(jobs), MAX_ALIASES_PER_QUERY)] or [[]]
+        for number, batch in enumerate(batches):
+            downloads = number == 0 and bool(self.downloads)
+            if not batch and not downloads:
+                continue
+            query, variables, aliases = self._status_query(batch, downloads=downloads)
+            data, errors = self._post(query, variables)
+            # A query that failed as a whole has no data and no error for any
+            # field, e.g. while RSC is busy. Its items are checked again on
+            # the next tick, which backs off as nothing finished.
+            if not data and all(alias is None for alias in errors):
+                continue
+            for alias, job_id in aliases.items():
+                error = errors.get(alias)
+                if error:
+                    finished[job_id] = self._finish_job(job_id, 'Error', error)
+                    continue
+                series = data.get(alias) or {}
+                status = series.get('lastActivityStatus')
+                if status in JOB_DONE_STATUSES:
+                    finished[job_id] = self._finish_job(job_id, status)
+            if not downloads:
+                continue
+            error = errors.get('allUserFiles')
+            if error:
+                for reference_id in list(self.downloads):
+                    finished[reference_id] = self._finish_download(reference_id, 'Error', error=error)
+                continue
+            for item in data.get('allUserFiles') or []:
+                for download in item.get('downloads') or []:
+                    reference_id = download['externalId']
+                    if reference_id in self.downloads and download['state'] in DOWNLOAD_DONE_STATES:
+                        finished[reference_id] = self._finish_download(reference_id, download['state'],
+                                                                       filename=download['filename'])
+        self.results.update(finished)
+        return finished
+
+    def track(self):
+        """
+        Generator of (job ID or reference ID, result) as each item finishes,
+        until none are pending. Items can be added while tracking.
+        """
+        start = time.monotonic()
+        while self.pending():
+            if self.timeout is not None and time.monotonic() - start > self.timeout:
+                raise TimeoutError(f"{self.pending()} items still pending after {self.timeout} seconds")
+            time.sleep(self.interval)
+            finished = self.check()
+            # Only back off while nothing finishes
+            if not finished:
+                self.interval = min(self.interval * self.backoff, self.max_interval)
+            for key, result in finished.items():
+                yield key, result
+
+    def wait(self):
+        """Tracks until every item finished and returns all the results"""
+        for _ in self.track():
+            pass
+        return self.results
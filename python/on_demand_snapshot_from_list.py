@@ -4,6 +4,7 @@
 
 # Title: on_demand_snapshot_from_list.py
 # Description: Reads a CSV file containing a list of Object IDs + SLA Domains and takes an On Demand Snapshot for each
+#              Supports the object types in SNAPSHOT_TYPES of snapshot_dispatcher.py
 
 # Author: Steven Tong
 # GitHub: stevenctong
@@ -11,9 +12,10 @@
 
 import rubrik_cdm
 import urllib3
-import urllib2
 import csv
 from datetime import datetime
+from sla_resolver import SlaResolver
+from snapshot_dispatcher import SnapshotDispatcher
 # Use to import Rubrik login variables from another file
 from rubrik_info import *
 
@@ -33,11 +35,27 @@ object_csv_dir = './'
 object_csv_filename = 'list.csv'
 object_csv = '{}{}'.format(object_csv_dir, object_csv_filename)
 
+# File to save the list of SLAs to between runs, or None to get it every run
+sla_cache_path = './sla_cache.json'
+
+# Most on demand snapshot requests to send to the cluster at a time
+max_in_flight = 8
+
+# File to write the request ID of each on demand snapshot to
+result_log = './on_demand_snapshot_results-{}.jsonl'.format(today)
+
 # Use one of the following to connect to the Rubrik cluster
 # rubrik = rubrik_cdm.Connect(node_ip, username, password)
 rubrik = rubrik_cdm.Connect(node_ip, api_token=api_token)
 
+# Resolves SLA names to IDs from one list of the local SLAs, saved for an hour
+sla_resolver = SlaResolver(rubrik, cache_path=sla_cache_path, ttl=3600)
+
+# Sends the on demand snapshot requests concurrently, retrying if the cluster is busy
+dispatcher = SnapshotDispatcher(max_in_flight=max_in_flight, result_log_path=result_log)
+
 object_list = []
+object_groups = {}
 
 # Read CSV containing list of Object IDs + SLAs to take an on demand snasphot of
 with open(object_csv, 'r') as csv_file:
@@ -49,23 +67,25 @@ with open(object_csv, 'r') as csv_file:
         object_list.append(row.copy())
         print("Taking on demand snapshot of object: {}, Location: {} to SLA: {}, Type: {}".format(row['Object Name'], row['Location'], row['SLA Domain'], row['Object Type']))
 
-        # Get the a list of local SLAs matching the SLA name, filter for exact match, and grab SLA ID
-        sla_info = rubrik.get('v1', '/sla_domain?primary_cluster_id=local&name={}'.format(row['SLA Domain']))
-        sla_data = sla_info['data']
-        sla_id = ''
-        # Filter for exact SLA name match
-        for i in sla_data:
-            if (i['name'] == row['SLA Domain']):
-                sla_id = i['id']
-        # Proceed if we found a matching SLA
-        if (sla_id != ''):
-            if (row['Object Type'] == 'vSphere VM'):
-                snapshot_json = {}
-                snapshot_json['slaId'] = sla_id
-                try:
-                    snapshot = rubrik.post('v1', '/vmware/vm/{}/snapshot'.format(row['Object ID']), snapshot_json)
-                except Exception:
-                    print("Error taking on demand snapshot of {}, continuing to next".format(row['Object Name']))
-                    pass
+        # Get the SLA ID from the list of local SLAs, fetched once for every row
+        sla_id = sla_resolver.resolve(row['SLA Domain'])
+        # Proceed if we found a matching SLA, grouping the objects by type and SLA
+        if (sla_id is not None):
+            object_groups.setdefault((row['Object Type'], sla_id), []).append((row['Object ID'], row['Object Name']))
         else:
             print("SLA {} not found, skipping {}".format(row['SLA Domain'], row['Object Name']))
+
+# Queue the snapshots of each type, through the bulk endpoint of the type if it has one
+for (object_type, sla_id), objects in object_groups.items():
+    try:
+        dispatcher.add_objects(rubrik, object_type, sla_id, objects)
+    except ValueError as e:
+        print("{}, skipping {} objects".format(e, len(objects)))
+
+# Take the on demand snapshots concurrently
+results = dispatcher.dispatch()
+for result in results:
+    if (result['status'] == 'FAILED'):
+        print("Error taking on demand snapshot of {}: {}".format(result['name'], result['error']))
+print("Requested {} on demand snapshots, {} failed. Results written to: {}".format(
+    len(results), sum(1 for result in results if result['status'] == 'FAILED'), result_log))
@@ -12,6 +12,9 @@
 import rubrik_cdm
 import urllib3
 from datetime import datetime, timezone, timedelta
+from sla_resolver import SlaResolver
+from snapshot_counts import get_vm_snapshot_counts
+from snapshot_dispatcher import SnapshotDispatcher
 # Use to import Rubrik login variables from another file
 from rubrik_info import *
 
@@ -31,6 +34,12 @@ source_sla = '12hr-30d-AWS'
 # Target SLA to use for the On Demand Snapshots
 target_sla = ''
 
+# Most on demand snapshot requests to send to the cluster at a time
+max_in_flight = 8
+
+# File to write the request ID of each on demand snapshot to
+result_log = './on_demand_snapshot_results-{}.jsonl'.format(datetime.now().strftime("%Y-%m-%d_%H%M"))
+
 # ---- VARIABLES - END ----
 
 
@@ -39,49 +48,44 @@ target_sla = ''
 rubrik = rubrik_cdm.Connect(node_ip, api_token=api_token)
 
 
-# For source_sla, get a list of SLAs with like match, filter for exact match, and grab SLA ID
-source_sla_info = rubrik.get('v1', '/sla_domain?primary_cluster_id=local&name={}'.format(source_sla))
-source_sla_data = source_sla_info['data']
-source_sla_id = ''
-# Filter for exact SLA name match
-for slas in source_sla_data:
-    if (slas['name'] == source_sla):
-        source_sla_id = slas['id']
+# Get the list of local SLAs once to look up both the source_sla and target_sla IDs,
+# before looking for VMs so a mistyped SLA name doesn't snapshot anything
+sla_resolver = SlaResolver(rubrik)
+source_sla_id = sla_resolver.resolve(source_sla)
+target_sla_id = sla_resolver.resolve(target_sla)
+for sla_name, sla_id in [(source_sla, source_sla_id), (target_sla, target_sla_id)]:
+    if sla_id is None:
+        print("No SLA Domain found by name: {}".format(sla_name))
+        print("Exiting...")
+        exit()
 
-# Get a list of VMware VMs from the source SLA
-object_list = {}
-object_list = rubrik.get('v1', '/vmware/vm?primary_cluster_id=local&effective_sla_domain_id={}'.format(source_sla_id))
+# Get the snapshot count of every VMware VM in the source SLA, a page of VMs at a time
+vm_counts = get_vm_snapshot_counts(rubrik, effective_sla_domain_id=source_sla_id)
 
-total_count = object_list['total']
+total_count = len(vm_counts)
 print("Total number of objects found in {}: {}\n".format(source_sla, total_count))
 
 # Build a list of VMs that have zero snapshots
 snapshot_list = []
 
-for objects in object_list['data']:
-    snapshots = rubrik.get_vsphere_vm_snapshot(objects['name'])
-
-    # If no snapshots are returned for the VM, add the VM to the snapshot list
-    if (snapshots['total'] == 0):
+for objects in vm_counts.values():
+    # If the VM has no snapshots, add the VM to the snapshot list
+    if (objects['snapshotCount'] == 0):
         snapshot_list.append(objects)
         print("Found VM with no snapshots: {}".format(objects['name']))
 
 print("Total # of VMs that needs an immediate snapshot: {}\n".format(len(snapshot_list)))
 
-# For target_sla, get a list of SLAs with like match, filter for exact match, and grab SLA ID
-target_sla_info = rubrik.get('v1', '/sla_domain?primary_cluster_id=local&name={}'.format(target_sla))
-target_sla_data = target_sla_info['data']
-target_sla_id = ''
-# Filter for exact SLA name match
-for slas in target_sla_data:
-    if (slas['name'] == target_sla):
-        target_sla_id = slas['id']
-
 # Create the POST json for the on demand snapshot
 snapshot_json = {}
 snapshot_json['slaId'] = target_sla_id
 
-# Take on demand snapshot for each VM that needs it
+# Take on demand snapshot for each VM that needs it, max_in_flight at a time
+dispatcher = SnapshotDispatcher(max_in_flight=max_in_flight, result_log_path=result_log)
 for objects in snapshot_list:
     print("Taking a snapshot of: {}".format(objects['name']))
-    result = rubrik.post('v1', '/vmware/vm/{}/snapshot'.format(objects['id']), snapshot_json)
+    dispatcher.add(rubrik, '/vmware/vm/{}/snapshot'.format(objects['id']), snapshot_json, name=objects['name'])
+results = dispatcher.dispatch()
+for result in results:
+    if (result['status'] == 'FAILED'):
+        print("Error taking a snapshot of {}: {}".format(result['name'], result['error']))
@@ -1,11 +1,17 @@
 
 
 import argparse
+import csv
 import os
 import json
-import requests
+import random
 import sys
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from job_tracker import JobTracker
+from rsc_client import RscClient
+from snapshot_index import snapshot_time_range
 
 # Command-line arguments parsing
 def parse_arguments():
@@ -18,52 +24,454 @@ def parse_arguments():
     parser.add_argument("--restoreBucket", action="store_true", help="Set to True to restore the entire bucket")
     parser.add_argument("--restorePrefixFiles", type=str, default='', help="Specify prefixes/files to restore (comma-separated list)")
     parser.add_argument("--restoreDateUTC", type=str, default='', help='Restore date in "YYYY-MM-DD HH:MM" format')
+    parser.add_argument("--snapshotLookbackDays", type=int, default=0, help="Only look for snapshots this many days before the restore date, 0 for no limit")
+    parser.add_argument("--queryProfile", type=str, default="restore", choices=QUERY_PROFILES, help="Fields to query: 'restore' for only what the restore needs, 'report' for every field")
+    parser.add_argument("--refreshBucketIndex", action="store_true", help="Look up the source bucket in RSC even if it is in the local bucket index")
+    parser.add_argument("--manifest", type=str, default='', help="CSV of restores to run in bulk, see MANIFEST_FIELDS")
+    parser.add_argument("--maxConcurrentJobs", type=int, default=8, help="Number of manifest restores to prepare and submit at a time")
+    parser.add_argument("--pollInterval", type=int, default=30, help="Longest number of seconds between job status checks of a manifest run")
+    parser.add_argument("--noWait", action="store_true", help="Submit the manifest restores without waiting for the jobs to finish")
+    parser.add_argument("--jobTimeout", type=int, default=86400, help="Seconds to track the manifest jobs for before counting the unfinished ones as failed, 0 for no limit")
     return parser.parse_args()
 
-# Load the Rubrik Service Account JSON file
-def load_service_account(service_account_path):
-    print(f"Info: Attempting to read the Service Account file located at {service_account_path}")
+# Query profiles select the fields of the bucket and snapshot nodes. The
+# restore profile only has the fields a restore uses, the report profile has
+# every field the RSC UI shows. Each profile is a tuple of the extra variable
+# declarations its fields use, their values, and the fields.
+QUERY_PROFILES = ["restore", "report"]
+
+S3_BUCKET_PROFILES = {
+    "restore": ("", {}, """
+        id
+        name
+        region
+        cloudNativeId
+        ... on AwsNativeS3Bucket {
+          awsNativeAccountDetails {
+            id
+            name
+          }
+        }"""),
+    "report": (", $includeRscNativeObjectPendingSla: Boolean!",
+               {"includeRscNativeObjectPendingSla": True}, """
+        id
+        name
+        isRelic
+        region
+        cloudNativeId
+        nativeName
+        logicalPath {
+          name
+          fid
+        }
+        ... on HierarchyObject {
+          id
+          effectiveSlaDomain {
+            id
+            name
+            ... on GlobalSlaReply {
+              isRetentionLockedSla
+              retentionLockMode
+              __typename
+            }
+            ... on ClusterSlaDomain {
+              fid
+              cluster {
+                id
+                name
+                __typename
+              }
+              isRetentionLockedSla
+              retentionLockMode
+              __typename
+            }
+            __typename
+            ... on GlobalSlaReply {
+              description
+              __typename
+            }
+          }
+          ... on CdmHierarchyObject {
+            pendingSla {
+              id
+              name
+              ... on ClusterSlaDomain {
+                fid
+                cluster {
+                  id
+                  name
+                  __typename
+                }
+                __typename
+              }
+              __typename
+            }
+            __typename
+          }
+          ... on PolarisHierarchyObject {
+            rscNativeObjectPendingSla @include(if: $includeRscNativeObjectPendingSla) {
+              id
+              name
+              __typename
+            }
+            __typename
+          }
+          __typename
+        }
+        ... on HierarchyObject {
+          effectiveSlaSourceObject {
+            fid
+            name
+            objectType
+            __typename
+          }
+          slaAssignment
+          __typename
+        }
+        ... on HierarchyObject {
+          securityMetadata {
+            isLaminarEnabled
+            sensitivityStatus
+            highSensitiveHits
+            mediumSensitiveHits
+            lowSensitiveHits
+            dataTypeResults {
+              id
+              name
+              totalHits
+              totalViolatedHits
+              __typename
+            }
+            __typename
+          }
+          __typename
+        }
+        ... on AwsNativeS3Bucket {
+          creationTime
+          isExocomputeConfigured
+          numberOfObjects
+          bucketSizeBytes
+          isOnboarding
+          awsNativeAccountDetails {
+            id
+            name
+            status
+            __typename
+          }
+          __typename
+        }
+        ... on AwsNativeDynamoDbTable {
+          authorizedOperations
+          awsNativeAccountDetails {
+            id
+            name
+            status
+            enabledFeatures {
+              featureName
+              lastRefreshedAt
+              status
+              __typename
+            }
+            __typename
+          }
+          isRelic
+          isAwsContinuousBackupEnabled
+          isExocomputeConfigured
+          nonBackupRegionNames
+          tableSizeBytes
+          __typename
+        }"""),
+}
+
+S3_SNAPSHOT_PROFILES = {
+    "restore": ("", {}, """
+        id
+        date
+        expirationDate
+        isOnDemandSnapshot"""),
+    "report": (", $includeSapHanaAppMetadata: Boolean!, $includeDb2AppMetadata: Boolean!, $isLegalHoldThroughRbacEnabled: Boolean = false",
+               {"includeSapHanaAppMetadata": False, "includeDb2AppMetadata": False,
+                "isLegalHoldThroughRbacEnabled": True}, """
+        ... on CdmSnapshot {
+          latestUserNote {
+            time
+            userName
+            userNote
+            __typename
+          }
+          __typename
+        }
+        id
+        date
+        expirationDate
+        isOnDemandSnapshot
+        ... on CdmSnapshot {
+          cdmVersion
+          isRetentionLocked
+          isDownloadedSnapshot
+          cluster {
+            id
+            name
+            version
+            status
+            timezone
+            __typename
+          }
+          pendingSnapshotDeletion {
+            id: snapshotFid
+            status
+            __typename
+          }
+          slaDomain {
+            id
+            name
+            ... on GlobalSlaReply {
+              isRetentionLockedSla
+              retentionLockMode
+              __typename
+            }
+            ... on ClusterSlaDomain {
+              fid
+              cluster {
+                id
+                name
+                __typename
+              }
+              isRetentionLockedSla
+              retentionLockMode
+              __typename
+            }
+            __typename
+          }
+          pendingSla {
+            id
+            name
+            ... on ClusterSlaDomain {
+              fid
+              cluster {
+                id
+                name
+                __typename
+              }
+              __typename
+            }
+            __typename
+          }
+          snapshotRetentionInfo {
+            isCustomRetentionApplied
+            archivalInfos {
+              name
+              isExpirationDateCalculated
+              expirationTime
+              locationId
+              isSnapshotOnLegalHold @include(if: $isLegalHoldThroughRbacEnabled)
+              __typename
+            }
+            localInfo {
+              name
+              isExpirationDateCalculated
+              expirationTime
+              isSnapshotOnLegalHold @include(if: $isLegalHoldThroughRbacEnabled)
+              __typename
+            }
+            replicationInfos {
+              name
+              isExpirationDateCalculated
+              expirationTime
+              locationId
+              isExpirationInformationUnavailable
+              isSnapshotOnLegalHold @include(if: $isLegalHoldThroughRbacEnabled)
+              __typename
+            }
+            __typename
+          }
+          sapHanaAppMetadata @include(if: $includeSapHanaAppMetadata) {
+            backupId
+            backupPrefix
+            snapshotType
+            files {
+              backupFileSizeInBytes
+              __typename
+            }
+            __typename
+          }
+          db2AppMetadata @include(if: $includeDb2AppMetadata) {
+            backupId
+            snapshotType
+            files {
+              backupFileSizeInBytes
+              __typename
+            }
+            __typename
+          }
+          legalHoldInfo {
+            shouldHoldInPlace
+            __typename
+          }
+          __typename
+        }
+        ... on PolarisSnapshot {
+          archivalLocationId
+          isDeletedFromSource
+          isDownloadedSnapshot
+          isReplica
+          isArchivalCopy
+          slaDomain {
+            name
+            id
+            ... on GlobalSlaReply {
+              isRetentionLockedSla
+              retentionLockMode
+              __typename
+            }
+            ... on ClusterSlaDomain {
+              fid
+              cluster {
+                id
+                name
+                __typename
+              }
+              isRetentionLockedSla
+              retentionLockMode
+              __typename
+            }
+            __typename
+            ... on ClusterSlaDomain {
+              fid
+              cluster {
+                id
+                name
+                __typename
+              }
+              __typename
+            }
+            ... on GlobalSlaReply {
+              id
+              __typename
+            }
+          }
+          isRetentionLocked
+          snapshotRetentionInfo {
+            isCustomRetentionApplied
+            localInfo {
+              locationName
+              expirationTime
+              isExpirationDateCalculated
+              isSnapshotPresent
+              __typename
+            }
+            archivalInfos {
+              locationName
+              expirationTime
+              isExpirationDateCalculated
+              isSnapshotPresent
+              __typename
+            }
+            replicationInfos {
+              locationName
+              expirationTime
+              isExpirationDateCalculated
+              isSnapshotPresent
+              __typename
+            }
+            __typename
+          }
+          __typename
+        }"""),
+}
+
+# Local index of bucket lookups, so a bucket is only looked up in RSC once
+BUCKET_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".rsc_s3_bucket_index.json")
+
+def load_bucket_index(index_path):
     try:
-        with open(service_account_path, "r") as file:
-            service_account_data = json.load(file)
-    except FileNotFoundError:
-        raise FileNotFoundError(f"The Service Account JSON secret file was not found. Ensure the file is located at {service_account_path}.")
-    except Exception as e:
-        raise Exception(f"Error occurred while reading the Service Account JSON: {str(e)}")
-    # Check for missing required fields
-    required_fields = ["client_id", "client_secret", "access_token_uri"]
-    missing_fields = [field for field in required_fields if field not in service_account_data]
-    if missing_fields:
-        raise Exception(f"The Service Account JSON secret file is missing the required parameters: {missing_fields}")
-    return service_account_data
-
-# Authenticate to Rubrik's GraphQL API
-def authenticate_to_rubrik(service_account_data):
-    payload = {
-        "grant_type": "client_credentials",
-        "client_id": service_account_data["client_id"],
-        "client_secret": service_account_data["client_secret"]
-    }
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json"
-    }
-    print("Connecting to the RSC GraphQL API using the Service Account JSON file.")
-    response = requests.post(service_account_data["access_token_uri"], json=payload, headers=headers)
-    response.raise_for_status()  # Raise an HTTPError on a bad response
-    token_data = response.json()
-    rubrik_url = service_account_data["access_token_uri"].replace("/api/client_token", "")
-    rubrik_connection = {
-        "accessToken": token_data["access_token"],
-        "rubrikURL": rubrik_url
+        with open(index_path, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def save_bucket_index(index_path, bucket_index):
+    temp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(bucket_index, file, indent=2)
+    os.replace(temp_path, index_path)
+
+def indexed_bucket(bucket_index, index_key):
+    """Returns the bucket index entry of a key, or None if it is missing or was saved without its accountId"""
+    entry = bucket_index.get(index_key)
+    if entry is None or not entry.get("accountId"):
+        return None
+    return entry
+
+def find_source_bucket(client, account_name, bucket_name, index_path=BUCKET_INDEX_PATH, refresh=False, profile="restore"):
+    """
+    Returns the id, name and cloudNativeId of a bucket in an account, or None.
+    Checks the local bucket index first, then asks RSC for only the buckets
+    matching the name and saves the match to the index.
+    """
+    bucket_index = load_bucket_index(index_path)
+    index_key = f"{client.rubrik_url}|{account_name}|{bucket_name}"
+    if not refresh and indexed_bucket(bucket_index, index_key):
+        print("Found source bucket in the local bucket index")
+        return bucket_index[index_key]
+    # The NAME filter is a partial match, so match the exact name and account
+    s3_list = get_aws_s3_buckets(client, bucket_name=bucket_name, profile=profile)
+    bucket_detail = next(
+        (bucket["node"] for bucket in s3_list if bucket["node"]["name"] == bucket_name and bucket["node"]["awsNativeAccountDetails"]["name"] == account_name),
+        None  # Return None if no match is found
+    )
+    s3_list.close()
+    if bucket_detail is None:
+        return None
+    bucket_index[index_key] = index_entry(bucket_detail)
+    save_bucket_index(index_path, bucket_index)
+    return bucket_index[index_key]
+
+def index_entry(bucket_detail):
+    return {
+        "id": bucket_detail["id"],
+        "name": bucket_detail["name"],
+        "region": bucket_detail.get("region"),
+        "cloudNativeId": bucket_detail["cloudNativeId"],
+        "accountId": bucket_detail["awsNativeAccountDetails"]["id"]
     }
-    print(f"Successfully connected to: {rubrik_url}")
-    return rubrik_connection
 
-def get_aws_s3_buckets(endpoint, headers):
+def find_source_buckets(client, bucket_keys, index_path=BUCKET_INDEX_PATH, refresh=False, profile="restore"):
+    """
+    Returns a dict of (account name, bucket name) -> bucket for many buckets.
+    Buckets missing from the local bucket index are found in one paginated
+    pass over the bucket inventory, which stops as soon as all are found.
+    """
+    bucket_index = load_bucket_index(index_path)
+    found = {}
+    missing = set()
+    for account_name, bucket_name in set(bucket_keys):
+        index_key = f"{client.rubrik_url}|{account_name}|{bucket_name}"
+        if not refresh and indexed_bucket(bucket_index, index_key):
+            found[(account_name, bucket_name)] = bucket_index[index_key]
+        else:
+            missing.add((account_name, bucket_name))
+    if not missing:
+        return found
+    s3_list = get_aws_s3_buckets(client, profile=profile)
+    for bucket in s3_list:
+        node = bucket["node"]
+        key = (node["awsNativeAccountDetails"]["name"], node["name"])
+        if key in missing:
+            missing.discard(key)
+            found[key] = index_entry(node)
+            bucket_index[f"{client.rubrik_url}|{key[0]}|{key[1]}"] = found[key]
+            if not missing:
+                break
+    s3_list.close()
+    save_bucket_index(index_path, bucket_index)
+    return found
+
+def get_aws_s3_buckets(client, bucket_name=None, profile="restore"):
+    declarations, profile_variables, node_fields = S3_BUCKET_PROFILES[profile]
     variables = {
         "objectTypeFilter": "AWS_NATIVE_S3_BUCKET",
-        "includeSecurityMetadata": True,
+        "includeSecurityMetadata": profile == "report",
         "first": 100,
         "filter": [
             {
@@ -72,11 +480,14 @@ def get_aws_s3_buckets(endpoint, headers):
             }
         ],
         "sortBy": "NAME",
-        "sortOrder": "ASC",
-        "includeRscNativeObjectPendingSla": True
+        "sortOrder": "ASC"
     }
+    variables.update(profile_variables)
+    # Only list the buckets matching the name instead of the whole inventory
+    if bucket_name:
+        variables["filter"].append({"texts": [bucket_name], "field": "NAME"})
     query = """
-        query AwsInventoryTableQuery($objectTypeFilter: HierarchyObjectTypeEnum!, $first: Int, $after: String, $sortBy: HierarchySortByField, $sortOrder: SortOrder, $filter: [Filter!]!, $includeSecurityMetadata: Boolean!, $includeRscNativeObjectPendingSla: Boolean!) {
+        query AwsInventoryTableQuery($objectTypeFilter: HierarchyObjectTypeEnum!, $first: Int, $after: String, $sortBy: HierarchySortByField, $sortOrder: SortOrder, $filter: [Filter!]!, $includeSecurityMetadata: Boolean!%(declarations)s) {
         awsNativeRoot {
           objectTypeDescendantConnection(
             objectTypeFilter: $objectTypeFilter
@@ -90,133 +501,7 @@ def get_aws_s3_buckets(endpoint, headers):
             edges {
               cursor
               node {
-                id
-                name
-                isRelic
-                region
-                cloudNativeId
-                nativeName
-                logicalPath {
-                  name
-                  fid
-                }
-                ... on HierarchyObject {
-                  id
-                  effectiveSlaDomain {
-                    id
-                    name
-                    ... on GlobalSlaReply {
-                      isRetentionLockedSla
-                      retentionLockMode
-                      __typename
-                    }
-                    ... on ClusterSlaDomain {
-                      fid
-                      cluster {
-                        id
-                        name
-                        __typename
-                      }
-                      isRetentionLockedSla
-                      retentionLockMode
-                      __typename
-                    }
-                    __typename
-                    ... on GlobalSlaReply {
-                      description
-                      __typename
-                    }
-                  }
-                  ... on CdmHierarchyObject {
-                    pendingSla {
-                      id
-                      name
-                      ... on ClusterSlaDomain {
-                        fid
-                        cluster {
-                          id
-                          name
-                          __typename
-                        }
-                        __typename
-                      }
-                      __typename
-                    }
-                    __typename
-                  }
-                  ... on PolarisHierarchyObject {
-                    rscNativeObjectPendingSla @include(if: $includeRscNativeObjectPendingSla) {
-                      id
-                      name
-                      __typename
-                    }
-                    __typename
-                  }
-                  __typename
-                }
-                ... on HierarchyObject {
-                  effectiveSlaSourceObject {
-                    fid
-                    name
-                    objectType
-                    __typename
-                  }
-                  slaAssignment
-                  __typename
-                }
-                ... on HierarchyObject {
-                  securityMetadata {
-                    isLaminarEnabled
-                    sensitivityStatus
-                    highSensitiveHits
-                    mediumSensitiveHits
-                    lowSensitiveHits
-                    dataTypeResults {
-                      id
-                      name
-                      totalHits
-                      totalViolatedHits
-                      __typename
-                    }
-                    __typename
-                  }
-                  __typename
-                }
-                ... on AwsNativeS3Bucket {
-                  creationTime
-                  isExocomputeConfigured
-                  numberOfObjects
-                  bucketSizeBytes
-                  isOnboarding
-                  awsNativeAccountDetails {
-                    id
-                    name
-                    status
-                    __typename
-                  }
-                  __typename
-                }
-                ... on AwsNativeDynamoDbTable {
-                  authorizedOperations
-                  awsNativeAccountDetails {
-                    id
-                    name
-                    status
-                    enabledFeatures {
-                      featureName
-                      lastRefreshedAt
-                      status
-                      __typename
-                    }
-                    __typename
-                  }
-                  isRelic
-                  isAwsContinuousBackupEnabled
-                  isExocomputeConfigured
-                  nonBackupRegionNames
-                  tableSizeBytes
-                  __typename
-                }
+%(node_fields)s
                 __typename
               }
               __typename
@@ -233,31 +518,29 @@ def get_aws_s3_buckets(endpoint, headers):
           __typename
         }
       }
-    """
-    response = requests.post(endpoint, json={"query": query, "variables": variables}, headers=headers)
-    if response.status_code == 200:
-        return response.json()
-    return {"error": response.text, "status_code": response.status_code}
+    """ % {"declarations": declarations, "node_fields": node_fields}
+    # Generator of the bucket edges, following the cursor across every page
+    return client.paginate(query, variables, ["awsNativeRoot", "objectTypeDescendantConnection"])
 
-def get_s3_snapshots(endpoint, headers, bucket_id):
+def s3_snapshots_query(bucket_id, profile="restore", time_range=None, first=200):
+    """Returns the snapshot list query of a bucket and its variables, newest snapshots first"""
+    declarations, profile_variables, node_fields = S3_SNAPSHOT_PROFILES[profile]
     variables = {
-        "isLegalHoldThroughRbacEnabled": True,
         "snappableId": bucket_id,
-        "first": 200,
+        "first": first,
         "sortBy": "CREATION_TIME",
         "sortOrder": "DESC",
-        "includeSapHanaAppMetadata": False,
-        "includeDb2AppMetadata": False,
         "snapshotFilter": [
             {
                 "field": "SNAPSHOT_TYPE",
                 "typeFilters": []
             }
         ],
-        "timeRange": None
+        "timeRange": time_range
     }
+    variables.update(profile_variables)
     query = """
-        query SnapshotsListSingleQuery($snappableId: String!, $first: Int, $after: String, $snapshotFilter: [SnapshotQueryFilterInput!], $sortBy: SnapshotQuerySortByField, $sortOrder: SortOrder, $timeRange: TimeRangeInput, $includeSapHanaAppMetadata: Boolean!, $includeDb2AppMetadata: Boolean!, $isLegalHoldThroughRbacEnabled: Boolean = false) {
+        query SnapshotsListSingleQuery($snappableId: String!, $first: Int, $after: String, $snapshotFilter: [SnapshotQueryFilterInput!], $sortBy: SnapshotQuerySortByField, $sortOrder: SortOrder, $timeRange: TimeRangeInput%(declarations)s) {
         snapshotsListConnection: snapshotOfASnappableConnection(
           workloadId: $snappableId
           first: $first
@@ -270,192 +553,7 @@ def get_s3_snapshots(endpoint, headers, bucket_id):
           edges {
             cursor
             node {
-              ... on CdmSnapshot {
-                latestUserNote {
-                  time
-                  userName
-                  userNote
-                  __typename
-                }
-                __typename
-              }
-              id
-              date
-              expirationDate
-              isOnDemandSnapshot
-              ... on CdmSnapshot {
-                cdmVersion
-                isRetentionLocked
-                isDownloadedSnapshot
-                cluster {
-                  id
-                  name
-                  version
-                  status
-                  timezone
-                  __typename
-                }
-                pendingSnapshotDeletion {
-                  id: snapshotFid
-                  status
-                  __typename
-                }
-                slaDomain {
-                  id
-                  name
-                  ... on GlobalSlaReply {
-                    isRetentionLockedSla
-                    retentionLockMode
-                    __typename
-                  }
-                  ... on ClusterSlaDomain {
-                    fid
-                    cluster {
-                      id
-                      name
-                      __typename
-                    }
-                    isRetentionLockedSla
-                    retentionLockMode
-                    __typename
-                  }
-                  __typename
-                }
-                pendingSla {
-                  id
-                  name
-                  ... on ClusterSlaDomain {
-                    fid
-                    cluster {
-                      id
-                      name
-                      __typename
-                    }
-                    __typename
-                  }
-                  __typename
-                }
-                snapshotRetentionInfo {
-                  isCustomRetentionApplied
-                  archivalInfos {
-                    name
-                    isExpirationDateCalculated
-                    expirationTime
-                    locationId
-                    isSnapshotOnLegalHold @include(if: $isLegalHoldThroughRbacEnabled)
-                    __typename
-                  }
-                  localInfo {
-                    name
-                    isExpirationDateCalculated
-                    expirationTime
-                    isSnapshotOnLegalHold @include(if: $isLegalHoldThroughRbacEnabled)
-                    __typename
-                  }
-                  replicationInfos {
-                    name
-                    isExpirationDateCalculated
-                    expirationTime
-                    locationId
-                    isExpirationInformationUnavailable
-                    isSnapshotOnLegalHold @include(if: $isLegalHoldThroughRbacEnabled)
-                    __typename
-                  }
-                  __typename
-                }
-                sapHanaAppMetadata @include(if: $includeSapHanaAppMetadata) {
-                  backupId
-                  backupPrefix
-                  snapshotType
-                  files {
-                    backupFileSizeInBytes
-                    __typename
-                  }
-                  __typename
-                }
-                db2AppMetadata @include(if: $includeDb2AppMetadata) {
-                  backupId
-                  snapshotType
-                  files {
-                    backupFileSizeInBytes
-                    __typename
-                  }
-                  __typename
-                }
-                legalHoldInfo {
-                  shouldHoldInPlace
-                  __typename
-                }
-                __typename
-              }
-              ... on PolarisSnapshot {
-                archivalLocationId
-                isDeletedFromSource
-                isDownloadedSnapshot
-                isReplica
-                isArchivalCopy
-                slaDomain {
-                  name
-                  id
-                  ... on GlobalSlaReply {
-                    isRetentionLockedSla
-                    retentionLockMode
-                    __typename
-                  }
-                  ... on ClusterSlaDomain {
-                    fid
-                    cluster {
-                      id
-                      name
-                      __typename
-                    }
-                    isRetentionLockedSla
-                    retentionLockMode
-                    __typename
-                  }
-                  __typename
-                  ... on ClusterSlaDomain {
-                    fid
-                    cluster {
-                      id
-                      name
-                      __typename
-                    }
-                    __typename
-                  }
-                  ... on GlobalSlaReply {
-                    id
-                    __typename
-                  }
-                }
-                isRetentionLocked
-                snapshotRetentionInfo {
-                  isCustomRetentionApplied
-                  localInfo {
-                    locationName
-                    expirationTime
-                    isExpirationDateCalculated
-                    isSnapshotPresent
-                    __typename
-                  }
-                  archivalInfos {
-                    locationName
-                    expirationTime
-                    isExpirationDateCalculated
-                    isSnapshotPresent
-                    __typename
-                  }
-                  replicationInfos {
-                    locationName
-                    expirationTime
-                    isExpirationDateCalculated
-                    isSnapshotPresent
-                    __typename
-                  }
-                  __typename
-                }
-                __typename
-              }
+%(node_fields)s
               __typename
             }
             __typename
@@ -468,13 +566,16 @@ def get_s3_snapshots(endpoint, headers, bucket_id):
           __typename
         }
       }
-    """
-    response = requests.post(endpoint, json={"query": query, "variables": variables}, headers=headers)
-    if response.status_code == 200:
-        return response.json()
-    return {"error": response.text, "status_code": response.status_code}
+    """ % {"declarations": declarations, "node_fields": node_fields}
+    return query, variables
 
-def get_aws_accounts(endpoint, headers):
+def get_latest_s3_snapshot(client, bucket_id, profile="restore", time_range=None):
+    """Returns the newest snapshot of a bucket in the time range, or None, with a single request"""
+    query, variables = s3_snapshots_query(bucket_id, profile=profile, time_range=time_range, first=1)
+    edges = client.query(query, variables)["data"]["snapshotsListConnection"]["edges"]
+    return edges[0]["node"] if edges else None
+
+def get_aws_accounts(client):
     variables = {
         "awsCloudAccountsArg": {
             "feature": "CLOUD_NATIVE_S3_PROTECTION",
@@ -497,12 +598,12 @@ def get_aws_accounts(endpoint, headers):
         }
     }
     """
-    response = requests.post(endpoint, json={"query": query, "variables": variables}, headers=headers)
+    response = client.post(query, variables)
     if response.status_code == 200:
         return response.json()
     return {"error": response.text, "status_code": response.status_code}
 
-def get_aws_recovery_buckets(endpoint, headers, account_id):
+def get_aws_recovery_buckets(client, account_id):
     variables = {
         "accountId": account_id
     }
@@ -516,12 +617,15 @@ def get_aws_recovery_buckets(endpoint, headers, account_id):
         }
     }
     """
-    response = requests.post(endpoint, json={"query": query, "variables": variables}, headers=headers)
+    response = client.post(query, variables)
     if response.status_code == 200:
         return response.json()
     return {"error": response.text, "status_code": response.status_code}
 
-def export_s3(endpoint, headers, export_input):
+# HTTP statuses RSC returns when it is rate limiting or busy, which are retried
+RETRY_STATUS_CODES = [429, 503]
+
+def export_s3(client, export_input, max_retries=5, backoff_seconds=2):
     variables = {
         "input": export_input
     }
@@ -533,11 +637,210 @@ def export_s3(endpoint, headers, export_input):
         }
     }
     """
-    response = requests.post(endpoint, json={"query": query, "variables": variables}, headers=headers)
+    # Back off exponentially with jitter while RSC is rate limiting, or for
+    # as long as its Retry-After header asks
+    for attempt in range(max_retries + 1):
+        response = client.post(query, variables)
+        if response.status_code not in RETRY_STATUS_CODES or attempt == max_retries:
+            break
+        retry_after = response.headers.get("Retry-After", "")
+        delay = float(retry_after) if retry_after.isdigit() else backoff_seconds * 2 ** attempt
+        time.sleep(delay + random.uniform(0, backoff_seconds))
     if response.status_code == 200:
         return response.json()
     return {"error": response.text, "status_code": response.status_code}
 
+def select_snapshot(client, bucket_id, restore_date, lookback_days=0, profile="restore"):
+    """Returns the latest snapshot of a bucket before the restore date, "YYYY-MM-DD HH:MM" in UTC"""
+    restore_date_utc = datetime.strptime(restore_date, "%Y-%m-%d %H:%M")
+    # Snapshots are listed newest first, so the first one before the restore
+    # date is the closest, optionally only looking back lookback_days. The
+    # end of the time range is inclusive, so it stops 1 ms before the restore
+    # date to leave out a snapshot taken right at it.
+    lookback_start = None
+    if lookback_days > 0:
+        lookback_start = restore_date_utc - timedelta(days=lookback_days)
+    lookback_end = restore_date_utc - timedelta(milliseconds=1)
+    selected_snapshot = get_latest_s3_snapshot(client, bucket_id=bucket_id, profile=profile,
+                                               time_range=snapshot_time_range(lookback_start, lookback_end))
+    if selected_snapshot is None:
+        if lookback_days > 0:
+            raise ValueError(f"No snapshot found in the {lookback_days} days before {restore_date}. Exiting...")
+        raise ValueError(f"No snapshot found before {restore_date}. Exiting...")
+    return selected_snapshot
+
+def find_target_bucket(client, account_name, bucket_name, aws_accounts=None):
+    """Returns the Rubrik ID of the target account and the target bucket detail"""
+    if aws_accounts is None:
+        aws_accounts = get_aws_accounts(client)["data"]["allAwsCloudAccountsFeaturesWithExoConfigs"]
+    target_account_id = next(
+        (account["awsCloudAccount"]["id"] for account in aws_accounts if account["awsCloudAccount"]["accountName"] == account_name),
+        None  # Default to None if no match is found
+    )
+    if not target_account_id:
+        raise ValueError(f"Target account '{account_name}' not found.")
+    # Fetch recovery buckets for the target account
+    recovery_buckets_response = get_aws_recovery_buckets(client, account_id=target_account_id)
+    if "data" not in recovery_buckets_response or "allS3BucketsDetailsFromAws" not in recovery_buckets_response["data"]:
+        raise ValueError("Invalid response structure from get_aws_recovery_buckets()")
+    recovery_buckets = recovery_buckets_response["data"]["allS3BucketsDetailsFromAws"]
+    # Find the target bucket in recovery buckets
+    target_bucket_detail = next(
+        (bucket for bucket in recovery_buckets if bucket["name"] == bucket_name),
+        None
+    )
+    if not target_bucket_detail:
+        raise ValueError(f"Target bucket '{bucket_name}' not found.")
+    return target_account_id, target_bucket_detail
+
+def build_export_inputs(source_bucket_detail, snapshot_id, target_account_id, destination_bucket_arn,
+                        restore_bucket=False, restore_prefix_files=""):
+    """Returns the export inputs of a full bucket restore and/or a prefix/file restore"""
+    export_inputs = []
+    if restore_bucket:
+        # Prepare the export input for a full bucket restore
+        export_inputs.append({
+            "destinationBucketArn": destination_bucket_arn,
+            "objectKeys": [],  # Empty list for full bucket restore
+            "shouldRecoverFullBucket": True,
+            "snapshotId": snapshot_id,
+            "workloadId": source_bucket_detail["id"],
+            "targetAwsAccountRubrikId": target_account_id,
+        })
+    if restore_prefix_files != "":
+        # Prepare the export input for prefix/file restore
+        export_inputs.append({
+            "destinationBucketArn": destination_bucket_arn,
+            "objectKeys": restore_prefix_files.split(","),  # Array of prefixes/files
+            "shouldRecoverFullBucket": False,  # Not full bucket restore
+            "snapshotId": snapshot_id,
+            "workloadId": source_bucket_detail["id"],
+            "targetAwsAccountRubrikId": target_account_id,
+        })
+    return export_inputs
+
+# Columns of a bulk restore manifest CSV. Only sourceAccount, sourceBucket and
+# restoreDateUTC are required, empty columns take the command-line value.
+# restorePrefixFiles is a comma-separated list, so quote it in the CSV.
+MANIFEST_FIELDS = ["sourceAccount", "sourceBucket", "restoreDateUTC", "restorePrefixFiles",
+                   "restoreBucket", "restoreType", "targetAccount", "targetBucket"]
+
+def read_manifest(manifest_path, args):
+    """Returns the manifest rows with the empty columns filled from the arguments"""
+    with open(manifest_path, "r", newline="") as file:
+        rows = list(csv.DictReader(file))
+    restores = []
+    for line, row in enumerate(rows, start=2):
+        restore = {}
+        for field in MANIFEST_FIELDS:
+            value = (row.get(field) or "").strip()
+            restore[field] = value if value != "" else getattr(args, field)
+        if isinstance(restore["restoreBucket"], str):
+            restore["restoreBucket"] = restore["restoreBucket"].lower() in ["true", "yes", "1"]
+        for field in ["sourceAccount", "sourceBucket", "restoreDateUTC"]:
+            if is_null_or_whitespace(restore[field]):
+                raise ValueError(f"Manifest line {line} is missing {field}")
+        if restore["restoreType"] not in ["Export", "InPlaceRecovery"]:
+            raise ValueError(f"Manifest line {line}: RestoreType should either be 'Export' or 'InPlaceRecovery'")
+        if not restore["restoreBucket"] and restore["restorePrefixFiles"] == "":
+            raise ValueError(f"Manifest line {line} restores neither the bucket nor any prefixes/files")
+        restore["line"] = line
+        restores.append(restore)
+    return restores
+
+def run_restore(client, restore, source_bucket_detail, args, aws_accounts, target_cache, job_ids):
+    """
+    Selects the snapshot and submits the export jobs of one manifest restore,
+    returns the snapshot. The job IDs are appended to job_ids as each job is
+    submitted, so the caller still has them if a later export fails.
+    """
+    snapshot = select_snapshot(client, source_bucket_detail["id"], restore["restoreDateUTC"],
+                               lookback_days=args.snapshotLookbackDays, profile=args.queryProfile)
+    if restore["restoreType"] == "InPlaceRecovery":
+        target_account_id = source_bucket_detail.get("accountId")
+        destination_bucket_arn = source_bucket_detail["cloudNativeId"]
+    else:
+        target_key = (restore["targetAccount"], restore["targetBucket"])
+        if target_key not in target_cache:
+            target_cache[target_key] = find_target_bucket(client, *target_key, aws_accounts=aws_accounts)
+        target_account_id, target_bucket_detail = target_cache[target_key]
+        destination_bucket_arn = target_bucket_detail["arn"]
+    for export_input in build_export_inputs(source_bucket_detail, snapshot["id"], target_account_id,
+                                            destination_bucket_arn, restore["restoreBucket"],
+                                            restore["restorePrefixFiles"]):
+        export_response = export_s3(client, export_input)
+        if "data" not in export_response:
+            raise ValueError(f"Invalid response from export_s3(): {export_response}")
+        job = export_response["data"]["startRecoverS3SnapshotJob"]
+        if job.get("error"):
+            raise ValueError(job["error"])
+        job_ids.append(job["jobId"])
+    return snapshot
+
+def run_manifest(client, args):
+    """Runs every restore in the manifest and returns the number that failed"""
+    restores = read_manifest(args.manifest, args)
+    print(f"Read {len(restores)} restores from {args.manifest}")
+
+    print("\nGetting AWS S3 buckets...")
+    source_buckets = find_source_buckets(client, [(restore["sourceAccount"], restore["sourceBucket"]) for restore in restores],
+                                         refresh=args.refreshBucketIndex, profile=args.queryProfile)
+    aws_accounts = None
+    if any(restore["restoreType"] == "Export" for restore in restores):
+        aws_accounts = get_aws_accounts(client)["data"]["allAwsCloudAccountsFeaturesWithExoConfigs"]
+    target_cache = {}
+
+    failed = 0
+    tracker = JobTracker(client, max_interval=args.pollInterval, timeout=args.jobTimeout or None)
+    with ThreadPoolExecutor(max_workers=args.maxConcurrentJobs) as executor:
+        futures = {}
+        for restore in restores:
+            description = f"{restore['sourceAccount']}/{restore['sourceBucket']}"
+            source_bucket_detail = source_buckets.get((restore["sourceAccount"], restore["sourceBucket"]))
+            if source_bucket_detail is None:
+                print(f"Error: Manifest line {restore['line']}: bucket {description} not found", file=sys.stderr)
+                failed += 1
+                continue
+            job_ids = []
+            future = executor.submit(run_restore, client, restore, source_bucket_detail, args,
+                                     aws_accounts, target_cache, job_ids)
+            futures[future] = (restore, description, job_ids)
+        for future in as_completed(futures):
+            restore, description, job_ids = futures[future]
+            try:
+                snapshot = future.result()
+                print(f"Submitted restore of {description} from snapshot {snapshot['date']}, jobs: {', '.join(job_ids)}")
+            except Exception as e:
+                print(f"Error: Manifest line {restore['line']}: restore of {description} failed: {str(e)}", file=sys.stderr)
+                failed += 1
+                # Jobs submitted before the failure are still running, so
+                # they are tracked like the others
+                if job_ids:
+                    print(f"Jobs already submitted for {description}: {', '.join(job_ids)}", file=sys.stderr)
+            for job_id in job_ids:
+                tracker.add_job(job_id, description=description)
+
+    num_jobs = tracker.pending()
+    print(f"\n{len(restores) - failed} of {len(restores)} restores submitted as {num_jobs} jobs")
+    if num_jobs and not args.noWait:
+        # Every check of the status of all the pending jobs is one query
+        print(f"Tracking {num_jobs} jobs...")
+        failed_jobs = 0
+        try:
+            for job_id, result in tracker.track():
+                error = f": {result['error']}" if result.get("error") else ""
+                print(f"Job {job_id} ({result['description']}) finished: {result['status']}{error}")
+                if not result["success"]:
+                    failed_jobs += 1
+        except Exception as e:
+            # Count the jobs that were still running as failed, but still
+            # report the ones that finished
+            print(f"Error: Stopped tracking {tracker.pending()} jobs: {str(e)}", file=sys.stderr)
+            failed_jobs += tracker.pending()
+        print(f"{num_jobs - failed_jobs} jobs succeeded, {failed_jobs} failed, in {tracker.num_queries} status queries")
+        failed += failed_jobs
+    return failed
+
 def is_null_or_whitespace(value):
     """Check if a string is null, empty, or consists only of whitespace."""
     return value is None or str(value).strip() == ""
@@ -559,44 +862,44 @@ def main():
     #     restorePrefixFiles = "rubrik-gaia-s3-native/Finance Department/,rubrik-gaia-s3-native/HR Department/"
     # args = Args()
 
-    if is_null_or_whitespace(args.sourceAccount) or is_null_or_whitespace(args.sourceBucket):
-        print("Error: Source account and/or source bucket cannot be empty. Exiting...", file=sys.stderr)
-        sys.exit(1)
+    # The manifest has its own source buckets, restore dates and restore types
+    if not args.manifest:
+        if is_null_or_whitespace(args.sourceAccount) or is_null_or_whitespace(args.sourceBucket):
+            print("Error: Source account and/or source bucket cannot be empty. Exiting...", file=sys.stderr)
+            sys.exit(1)
 
-    if is_null_or_whitespace(args.restoreType) or args.restoreType not in ["Export", "InPlaceRecovery"]:
-        print("Error: RestoreType should either be 'Export' or 'InPlaceRecovery'. Exiting...", file=sys.stderr)
-        sys.exit(1)
+        if is_null_or_whitespace(args.restoreType) or args.restoreType not in ["Export", "InPlaceRecovery"]:
+            print("Error: RestoreType should either be 'Export' or 'InPlaceRecovery'. Exiting...", file=sys.stderr)
+            sys.exit(1)
 
     # File path to RSC service account JSON
     service_account_path = "./rsc-gaia.json"
     # Get the current UTC date and time
     utc_date = datetime.utcnow()
-    # Load the service account JSON file
-    service_account_data = load_service_account(service_account_path)
-    # Authenticate to Rubrik API
-    rubrik_connection = authenticate_to_rubrik(service_account_data)
-    # Rubrik GraphQL API URL and headers
-    endpoint = f"{rubrik_connection['rubrikURL']}/api/graphql"
-    headers = {
-        "Content-Type": "application/json",
-        "Accept": "application/json",
-        "Authorization": f"Bearer {rubrik_connection['accessToken']}"
-    }
+    # Load the service account JSON file and connect to the Rubrik API,
+    # reusing a cached access token if it is still valid
+    print(f"Info: Attempting to read the Service Account file located at {service_account_path}")
+    client = RscClient(service_account_path, pool_maxsize=max(10, args.maxConcurrentJobs))
+    print("Connecting to the RSC GraphQL API using the Service Account JSON file.")
+    client.token()
+    print(f"Successfully connected to: {client.rubrik_url}")
 
-    print("\nGetting AWS S3 buckets...")
+    # Bulk restore of every bucket in the manifest
+    if args.manifest:
+        try:
+            failed = run_manifest(client, args)
+        except Exception as e:
+            print(f"Error running manifest: {str(e)}", file=sys.stderr)
+            sys.exit(1)
+        sys.exit(1 if failed else 0)
+
+    print("\nGetting AWS S3 bucket...")
     try:
-        s3_list_response = get_aws_s3_buckets(endpoint, headers)
-        if "data" not in s3_list_response or "awsNativeRoot" not in s3_list_response["data"]:
-            raise ValueError("Invalid response structure from get_aws_s3_buckets()")
-        s3_list = s3_list_response["data"]["awsNativeRoot"]["objectTypeDescendantConnection"]["edges"]
+        source_bucket_detail = find_source_bucket(client, args.sourceAccount, args.sourceBucket,
+                                                  refresh=args.refreshBucketIndex, profile=args.queryProfile)
     except Exception as e:
         print(f"Error fetching S3 buckets: {str(e)}", file=sys.stderr)
         sys.exit(1)
-        # print(s3_list)
-        source_bucket_detail = next(
-            (bucket["node"] for bucket in s3_list if bucket["node"]["name"] == args.sourceBucket and bucket["node"]["awsNativeAccountDetails"]["name"] == args.sourceAccount),
-            None  # Return None if no match is found
-        )
 
     if source_bucket_detail:
         # If a unique bucket is found, extract the ID and ARN
@@ -608,100 +911,40 @@ def main():
         raise ValueError("No matching bucket found. Exiting...")
 
     print("Getting snapshots (recovery points)...")
-    source_snapshots = get_s3_snapshots(endpoint, headers, bucket_id=source_bucket_id)
-    restore_date_utc = datetime.strptime(args.restoreDateUTC, "%Y-%m-%d %H:%M")
-    # Filter for the closest snapshot before the restore date
-    selected_snapshot = None
-
-    for snapshot in source_snapshots['data']['snapshotsListConnection']['edges']:
-        snapshot_date = datetime.strptime(snapshot["node"]["date"], "%Y-%m-%dT%H:%M:%S.%fZ")  # Parse snapshot date
-        if snapshot_date < restore_date_utc:  # Check if snapshot is before the restore date
-            if selected_snapshot is None or snapshot_date > datetime.strptime(selected_snapshot["node"]["date"], "%Y-%m-%dT%H:%M:%S.%fZ"):
-                # If no snapshot is selected, or if it's closer to the restore date, update selected_snapshot
-                selected_snapshot = snapshot
+    selected_snapshot = select_snapshot(client, source_bucket_id, args.restoreDateUTC,
+                                        lookback_days=args.snapshotLookbackDays, profile=args.queryProfile)
 
     # Extract snapshot ID
-    source_snapshot_id = selected_snapshot["node"]["id"]  # Access ID from the selected snapshot
+    source_snapshot_id = selected_snapshot["id"]  # Access ID from the selected snapshot
 
     # Print information about the selected snapshot
-    print(f"Found snapshot from: {selected_snapshot['node']['date']} right before the provided restore date: {args.restoreDateUTC}")
+    print(f"Found snapshot from: {selected_snapshot['date']} right before the provided restore date: {args.restoreDateUTC}")
     print(f"Snapshot ID: {source_snapshot_id}\n")
 
-    # Initialize destinationBucketArn to None (equivalent to `$null`)
-    destination_bucket_arn = None
-
-    # Check restoreType and assign destinationBucketArn accordingly
+    # Check restoreType and assign the target account and destinationBucketArn accordingly
     if args.restoreType == "InPlaceRecovery":
+        # Restore back to the source bucket in its own account
+        target_account_id = source_bucket_detail.get("accountId")
+        target_bucket_detail = source_bucket_detail
         destination_bucket_arn = source_bucket_arn  # Use sourceBucketArn
 
-    # Check restoreType and assign destinationBucketArn accordingly
     if args.restoreType == "Export":
-        print("Finding target account ID...")
-        aws_accounts_response = get_aws_accounts(endpoint, headers)
-        aws_accounts = aws_accounts_response["data"]["allAwsCloudAccountsFeaturesWithExoConfigs"]
-        target_account_id = next(
-            (account["awsCloudAccount"]["id"] for account in aws_accounts if account["awsCloudAccount"]["accountName"] == args.targetAccount),
-            None  # Default to None if no match is found
-        )
-        if not target_account_id:
-            raise ValueError(f"Target account '{args.targetAccount}' not found.")
-        # Fetch recovery buckets for the target account
-        print("Fetching recovery buckets...")
-        recovery_buckets_response = get_aws_recovery_buckets(endpoint, headers, account_id=target_account_id)
-        if "data" not in recovery_buckets_response or "allS3BucketsDetailsFromAws" not in recovery_buckets_response["data"]:
-            raise ValueError("Invalid response structure from get_aws_recovery_buckets()")
-        recovery_buckets = recovery_buckets_response["data"]["allS3BucketsDetailsFromAws"]
-        # Find the target bucket in recovery buckets
-        target_bucket_detail = next(
-            (bucket for bucket in recovery_buckets if bucket["name"] == args.targetBucket),
-            None
-        )
-        if not target_bucket_detail:
-            raise ValueError(f"Target bucket '{args.targetBucket}' not found.")
+        print("Finding target account ID and fetching recovery buckets...")
+        target_account_id, target_bucket_detail = find_target_bucket(client, args.targetAccount, args.targetBucket)
         # Assign the destination bucket ARN
         destination_bucket_arn = target_bucket_detail["arn"]
 
-    if args.restoreBucket:
-        # Prepare the export input for a full bucket restore
-        export_input = {
-            "destinationBucketArn": destination_bucket_arn,
-            "objectKeys": [],  # Empty list for full bucket restore
-            "shouldRecoverFullBucket": True,
-            "snapshotId": source_snapshot_id,
-            "workloadId": source_bucket_id,
-            "targetAwsAccountRubrikId": target_account_id,
-        }
-        print(f"Initiating export to restore entire bucket for source: {source_bucket_detail['name']}")
-        print(f"Target: {target_bucket_detail['name']}, {target_bucket_detail['region']})"
-        try:
-            # Perform the export operation with the provided input
-            export_response = export_s3(endpoint, headers, export_input)
-            if "data" in export_response:
-                print("Export Response Data:")
-                print(export_response["data"])
-            else:
-                raise ValueError("Invalid response structure from export_s3().")
-        except Exception as e:
-            print(f"Error initiating export: {str(e)}", file=sys.stderr)
-            sys.exit(1)
-
-    if args.restorePrefixFiles != "":
-        # Split restorePrefixFiles into a list (similar to PowerShell's -split)
-        restore_array = args.restorePrefixFiles.split(",")  # Split by commas
-        # Prepare the export input for prefix/file restore
-        export_input = {
-            "destinationBucketArn": destination_bucket_arn,
-            "objectKeys": restore_array,  # Array of prefixes/files
-            "shouldRecoverFullBucket": False,  # Not full bucket restore
-            "snapshotId": source_snapshot_id,
-            "workloadId": source_bucket_id,
-            "targetAwsAccountRubrikId": target_account_id,
-        }
-        print(f"Initiating export to restore: {args.restorePrefixFiles}")
-        print(f"Target: {target_bucket_detail['name']}, {target_bucket_detail['region']}")
+    export_inputs = build_export_inputs(source_bucket_detail, source_snapshot_id, target_account_id,
+                                        destination_bucket_arn, args.restoreBucket, args.restorePrefixFiles)
+    for export_input in export_inputs:
+        if export_input["shouldRecoverFullBucket"]:
+            print(f"Initiating export to restore entire bucket for source: {source_bucket_detail['name']}")
+        else:
+            print(f"Initiating export to restore: {args.restorePrefixFiles}")
+        print(f"Target: {target_bucket_detail['name']}, {target_bucket_detail.get('region')}")
         try:
             # Perform the export operation with the provided input
-            export_response = export_s3(endpoint, headers, export_input)
+            export_response = export_s3(client, export_input)
             if "data" in export_response:
                 print("Export Response Data:")
                 print(export_response["data"])  # Output the data returned by the mutation
@@ -0,0 +1,243 @@
+#! /usr/bin/env python
+# https://build.rubrik.com
+
+# Title: rsc_client.py
+# Description: Shared Rubrik Security Cloud (RSC) GraphQL client for the RSC scripts.
+#              Authenticates with a service account JSON file, caches the access token
+#              on disk until shortly before it expires, and sends every request over one
+#              pooled keep-alive session so queries after the first skip the TCP and TLS
+#              handshakes. Responses are gzip compressed by the server and request bodies
+#              can be gzip compressed with compress_requests=True.
+#
+# Usage:
+#   from rsc_client import RscClient
+#   client = RscClient('./rsc-service-account.json')
+#   data = client.query(query, variables)
+#   for edge in client.paginate(query, variables, ['awsNativeRoot', 'objectTypeDescendantConnection']):
+#       ...
+
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+# File the access tokens are cached in, per service account client ID
+TOKEN_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.rsc_token_cache.json')
+
+# Refresh the access token this many seconds before it expires
+TOKEN_REFRESH_MARGIN = 300
+
+# Token lifetime to assume if the token response has no expires_in
+DEFAULT_TOKEN_LIFETIME = 3600
+
+
+# Load the Rubrik Service Account JSON file
+def load_service_account(service_account_path):
+    try:
+        with open(service_account_path, 'r') as file:
+            service_account_data = json.load(file)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"The Service Account JSON secret file was not found. Ensure the file is located at {service_account_path}.")
+    except Exception as e:
+        raise Exception(f"Error occurred while reading the Service Account JSON: {str(e)}")
+    # Check for missing required fields
+    required_fields = ['client_id', 'client_secret', 'access_token_uri']
+    missing_fields = [field for field in required_fields if field not in service_account_data]
+    if missing_fields:
+        raise Exception(f"The Service Account JSON secret file is missing the required parameters: {missing_fields}")
+    return service_account_data
+
+
+class RscClient:
+    def __init__(self, service_account_path, token_cache_path=TOKEN_CACHE_PATH,
+                 refresh_margin=TOKEN_REFRESH_MARGIN, compress_requests=False,
+                 pool_maxsize=10, timeout=300):
+        self.service_account = load_service_account(service_account_path)
+        self.rubrik_url = self.service_account['access_token_uri'].replace('/api/client_token', '')
+        self.endpoint = f"{self.rubrik_url}/api/graphql"
+        self.token_cache_path = token_cache_path
+        self.refresh_margin = refresh_margin
+        self.compress_requests = compress_requests
+        self.timeout = timeout
+
+        # One session for every request so connections are kept alive and
+        # reused, sized for scripts that send requests from a thread pool
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Content-Type': 'application/json',
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate'
+        })
+
+        self.access_token = None
+        self.expires_at = 0
+        # Threads share the client, so only one of them gets a new token
+        # and writes the token cache at a time
+        self.token_lock = threading.Lock()
+
+    def _cache_key(self):
+        # Don't write the client ID itself to the cache file
+        return hashlib.sha256(self.service_account['client_id'].encode()).hexdigest()
+
+    def _read_token_cache(self):
+        if not self.token_cache_path or not os.path.exists(self.token_cache_path):
+            return {}
+        try:
+            with open(self.token_cache_path, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_token_cache(self):
+        if not self.token_cache_path:
+            return
+        cache = self._read_token_cache()
+        now = time.time()
+        cache = {key: entry for key, entry in cache.items() if entry.get('expires_at', 0) > now}
+        cache[self._cache_key()] = {'access_token': self.access_token,
+                                    'expires_at': self.expires_at,
+                                    'rubrik_url': self.rubrik_url}
+        # mkstemp makes a uniquely named temp file readable only by the user,
+        # which is swapped in so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.token_cache_path) or '.',
+                                         prefix=os.path.basename(self.token_cache_path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as file:
+                json.dump(cache, file)
+            os.replace(temp_path, self.token_cache_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def _token_valid(self):
+        return self.access_token and time.time() < self.expires_at - self.refresh_margin
+
+    def authenticate(self, rejected_token=None):
+        """
+        Gets a new access token from RSC and caches it. With rejected_token,
+        only gets one if another thread has not already replaced that token.
+        """
+        with self.token_lock:
+            if rejected_token and self.access_token != rejected_token and self._token_valid():
+                return self.access_token
+            return self._authenticate()
+
+    def _authenticate(self):
+        payload = {
+            'grant_type': 'client_credentials',
+            'client_id': self.service_account['client_id'],
+            'client_secret': self.service_account['client_secret']
+        }
+        response = self.session.post(self.service_account['access_token_uri'], json=payload,
+                                     timeout=self.timeout)
+        response.raise_for_status()
+        token_data = response.json()
+        self.access_token = token_data['access_token']
+        self.expires_at = time.time() + int(token_data.get('expires_in') or DEFAULT_TOKEN_LIFETIME)
+        self._write_token_cache()
+        return self.access_token
+
+    def token(self):
+        """Returns a valid access token, from memory, the cache or RSC"""
+        with self.token_lock:
+            if self._token_valid():
+                return self.access_token
+            entry = self._read_token_cache().get(self._cache_key())
+            if entry and entry.get('rubrik_url') == self.rubrik_url:
+                self.access_token = entry['access_token']
+                self.expires_at = entry['expires_at']
+                if self._token_valid():
+                    return self.access_token
+            return self._authenticate()
+
+    def headers(self):
+        return {'Authorization': f"Bearer {self.token()}"}
+
+    def post(self, query, variables=None):
+        """Sends a GraphQL query and returns the response, refreshing the token once if it was rejected"""
+        payload = {'query': query}
+        if variables is not None:
+            payload['variables'] = variables
+        body = json.dumps(payload).encode('utf-8')
+        token = self.token()
+        headers = {'Authorization': f"Bearer {token}"}
+        if self.compress_requests:
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+        response = self.session.post(self.endpoint, data=body, headers=headers, timeout=self.timeout)
+        if response.status_code == 401:
+            headers['Authorization'] = f"Bearer {self.authenticate(rejected_token=token)}"
+            response = self.session.post(self.endpoint, data=body, headers=headers, timeout=self.timeout)
+        return response
+
+    def query(self, query, variables=None):
+        """Sends a GraphQL query and returns the JSON, raising on HTTP or GraphQL errors"""
+        response = self.post(query, variables)
+        response.raise_for_status()
+        data = response.json()
+        if 'errors' in data:
+            raise Exception(data['errors'])
+        return data
+
+    def paginate(self, query, variables, connection_path, page_size=None, prefetch=True):
+        """
+        Generator of the edges of a GraphQL connection across every page.
+        The query must take $first and $after and select edges and
+        pageInfo { endCursor hasNextPage } on the connection, which is found
+        in the response data by following the keys in connection_path.
+
+        With prefetch, the next page is requested in the background as soon
+        as a page arrives, so it downloads while the caller processes the
+        edges of the current page. Only two pages are held at a time.
+        """
+        variables = dict(variables or {})
+        if page_size:
+            variables['first'] = page_size
+        variables['after'] = variables.get('after')
+
+        def fetch(after):
+            page_variables = dict(variables, after=after)
+            connection = self.query(query, page_variables)['data']
+            for key in connection_path:
+                connection = connection[key]
+            return connection
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        try:
+            connection = fetch(variables['after'])
+            while True:
+                page_info = connection['pageInfo']
+                next_page = None
+                if page_info['hasNextPage']:
+                    if executor:
+                        next_page = executor.submit(fetch, page_info['endCursor'])
+                    else:
+                        next_page = page_info['endCursor']
+                for edge in connection['edges']:
+                    yield edge
+                if next_page is None:
+                    break
+                connection = next_page.result() if executor else fetch(next_page)
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def get(self, url, **kwargs):
+        """Sends an authenticated GET, e.g. to download a file"""
+        headers = self.headers()
+        headers.update(kwargs.pop('headers', {}))
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.get(url, headers=headers, **kwargs)
+
+    def close(self):
+        self.session.close()
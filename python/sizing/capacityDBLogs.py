@@ -1,8 +1,6 @@
-import math
 from typing import List
 from error import InputError
-from constants.global_constants import HOURS_IN_DAY, DAYS_IN_WEEK, \
-    DAYS_IN_MONTH, DAYS_IN_YEAR, DAYS_IN_QUARTER
+from retentiontier import retention_tier
 
 class CapacityDBLogs:
     def __init__(self,
@@ -40,12 +38,11 @@ class CapacityDBLogs:
                 days_to_size.append(replication_days)
 
         # Hash table where we will store the days we will size for
-        # DB log sizing is just the # of days * log capacity per day
+        # DB log sizing is just the # of days * log capacity per day, which
+        # is a tier keeping one day of logs every day up to the retention
+        tier = retention_tier(1, 1, log_retention_days)
         days_size_table = {}
         for days in days_to_size:
-            if days >= log_retention_days:
-                days_size_table[days] = log_retention_days * self.log_daily_ingest_tb
-            else:
-                days_size_table[days] = days * self.log_daily_ingest_tb
+            days_size_table[days] = tier.count(days) * self.log_daily_ingest_tb
 
         self.days_size_table = days_size_table
@@ -0,0 +1,440 @@
+"""
+Batched version of CapacityCore. Every input can be a scalar or an array with
+one entry per scenario and all scenarios are sized in a single NumPy pass.
+The results match CapacityCore for each scenario, but are stored as arrays
+with one entry per scenario instead of one object per scenario.
+"""
+
+import numpy as np
+from typing import List
+from error import InputError
+from constants.global_constants import HOURS_IN_DAY, DAYS_IN_WEEK, \
+    DAYS_IN_MONTH, DAYS_IN_YEAR, DAYS_IN_QUARTER
+
+# Retention tiers in the order CapacityCore evaluates them with:
+# - the number of days in one retention unit of the tier
+# - the number of frequency units in one retention unit of the tier
+# Hourlies have their retention in days but their frequency in hours.
+TIERS = [('hourly', 1, HOURS_IN_DAY),
+         ('daily', 1, 1),
+         ('weekly', DAYS_IN_WEEK, 1),
+         ('monthly', DAYS_IN_MONTH, 1),
+         ('quarterly', DAYS_IN_QUARTER, 1),
+         ('yearly', DAYS_IN_YEAR, 1)]
+
+TIER_NAMES = [tier[0] for tier in TIERS]
+
+TIER_PLURALS = {'hourly': 'hourlies', 'daily': 'dailies', 'weekly': 'weeklies',
+                'monthly': 'monthlies', 'quarterly': 'quarterlies',
+                'yearly': 'yearlies'}
+
+# Per tier constants as column vectors to broadcast against (tiers, scenarios)
+_PERIOD_DAYS = np.array([[tier[1]] for tier in TIERS], dtype=float)
+_UNITS_PER_PERIOD = np.array([[tier[2]] for tier in TIERS], dtype=float)
+
+# Number of (tiers, scenarios) arrays a batch keeps, see CapacityCoreBatch
+_NUM_TIER_ARRAYS = 9
+
+# Fields of the records of each scenario, see CapacityCoreBatch.to_records()
+RECORD_FIELDS = [('scenario', np.int32), ('valid', np.bool_),
+                 ('total_fetb', np.float64), ('data_reduction_ratio', np.float64),
+                 ('total_non_compressible_fetb', np.float64), ('first_full_tb', np.float64),
+                 ('total_incremental_tb', np.float64), ('total_max_retention', np.int32),
+                 ('replication_days', np.int32), ('max_retention_capacity', np.float64),
+                 ('replication_capacity', np.float64)]
+TIER_RECORD_FIELDS = [('frequency', np.int32), ('retention_days', np.int32),
+                      ('change_rate', np.float32), ('retained', np.int32),
+                      ('incremental_size', np.float64), ('total_size', np.float64)]
+
+
+def record_dtype(days_to_size):
+    """
+    Returns the structured dtype of the scenario records, with the fixed
+    fields, then <tier>_<field> for every tier and capacity_<days>_days
+    for every day to size.
+    """
+    fields = list(RECORD_FIELDS)
+    for tier in TIER_NAMES:
+        fields += [('%s_%s' % (tier, field), dtype) for field, dtype in TIER_RECORD_FIELDS]
+    fields += [('capacity_%d_days' % days, np.float64) for days in days_to_size]
+    return np.dtype(fields)
+
+
+def top_records(records, field, count, largest=False):
+    """
+    Returns the count records with the smallest (or largest) value of a
+    field, sorted by that field. Uses a partial sort so ranking a few
+    scenarios out of many only sorts the ones returned.
+    """
+    values = records[field]
+    if largest:
+        values = -values
+    count = min(count, len(records))
+    if count < len(records):
+        index = np.argpartition(values, count - 1)[:count]
+    else:
+        index = np.arange(len(records))
+    return records[index[np.argsort(values[index], kind='stable')]]
+
+
+def tier_count(days, frequency, retention_days, prior_retention, period_days,
+               units_per_period=1):
+    """
+    Returns the number of snapshots of a tier that are retained after a
+    number of days. All arguments are arrays that broadcast against each
+    other and frequency must be > 0.
+
+    A tier keeps a snapshot every frequency units between the retention of
+    the prior tier and its own retention, so past its retention the count
+    stays at the number retained.
+    """
+    count = np.minimum(days, retention_days)
+    count -= prior_retention
+    if np.any(units_per_period != 1):
+        count *= units_per_period
+    count /= period_days * frequency
+    np.ceil(count, out=count)
+    np.maximum(count, 0, out=count)
+    return count
+
+
+class CapacityCoreBatch:
+    def __init__(self,
+                 total_fetb=None,
+                 data_reduction_ratio=None,
+                 total_non_compressible_fetb=None,
+                 days_to_size: List[int] = None,
+                 hourly_frequency=None,
+                 hourly_retention=None,
+                 hourly_change_rate=None,
+                 daily_frequency=None,
+                 daily_retention=None,
+                 daily_change_rate=None,
+                 weekly_frequency=None,
+                 weekly_retention=None,
+                 weekly_change_rate=None,
+                 monthly_frequency=None,
+                 monthly_retention=None,
+                 monthly_change_rate=None,
+                 quarterly_frequency=None,
+                 quarterly_retention=None,
+                 quarterly_change_rate=None,
+                 yearly_frequency=None,
+                 yearly_retention=None,
+                 yearly_change_rate=None,
+                 replication_days=None,
+                 raise_on_invalid: bool = True):
+
+        # Broadcast every input to one entry per scenario, unset inputs are 0
+        values = [total_fetb, data_reduction_ratio, total_non_compressible_fetb,
+                  replication_days,
+                  hourly_frequency, daily_frequency, weekly_frequency,
+                  monthly_frequency, quarterly_frequency, yearly_frequency,
+                  hourly_retention, daily_retention, weekly_retention,
+                  monthly_retention, quarterly_retention, yearly_retention,
+                  hourly_change_rate, daily_change_rate, weekly_change_rate,
+                  monthly_change_rate, quarterly_change_rate, yearly_change_rate]
+        values = [0 if value is None else value for value in values]
+        shape = np.broadcast_shapes(*[np.shape(value) for value in values])
+        if len(shape) > 1:
+            raise InputError("Scenario inputs must be scalars or 1-D arrays.")
+        self.num_scenarios = shape[0] if shape else 1
+        num_tiers = len(TIERS)
+
+        # Every per scenario array is a row of one block, so a batch makes a
+        # few large allocations instead of one per intermediate result
+        block = np.empty((4 + _NUM_TIER_ARRAYS * num_tiers, self.num_scenarios))
+        for row, value in enumerate(values[:4]):
+            block[row] = value
+        tier_block = block[4:].reshape(_NUM_TIER_ARRAYS, num_tiers, self.num_scenarios)
+        frequency, retention_days, change_rate, prior_retention, tier_frequency, \
+            period_frequency, incremental_size, retained, total_size = tier_block
+        for row, value in enumerate(values[4:10]):
+            frequency[row] = value
+        for row, value in enumerate(values[10:16]):
+            retention_days[row] = value
+        for row, value in enumerate(values[16:]):
+            change_rate[row] = value
+
+        # If FETB is specified, calculate the first full after data reduction
+        total_fetb, data_reduction_ratio, total_non_compressible_fetb, \
+            replication_days = block[:4]
+        assert np.all(total_fetb >= 0)
+        assert not np.any((total_fetb > 0) & (data_reduction_ratio <= 0))
+        self.total_fetb = total_fetb
+        self.data_reduction_ratio = data_reduction_ratio
+        self.reduced_total_fetb = np.divide(total_fetb, data_reduction_ratio,
+            out=np.zeros(self.num_scenarios), where=total_fetb > 0)
+
+        # Non-compressible capacity does not have any data reduction applied
+        assert np.all(total_non_compressible_fetb >= 0)
+        self.total_non_compressible_fetb = total_non_compressible_fetb
+
+        self.first_full_tb = self.reduced_total_fetb + self.total_non_compressible_fetb
+
+        # (tiers, scenarios) arrays of the inputs for each tier. Multiplying
+        # by the enabled mask zeroes out the tiers a scenario doesn't use,
+        # which is skipped for tiers every scenario enables.
+        enabled = frequency > 0
+        assert not np.any(enabled & ((retention_days <= 0) | (change_rate <= 0)))
+        self._tier_any_enabled = enabled.any(axis=1)
+        all_enabled = enabled.all(axis=1)
+
+        # Each tier is sized relative to the max retention of the tiers before
+        # it, which must not be larger than the retention of the tier itself.
+        # Tiers go one at a time so the rows of a tier stay in cache, and
+        # tiers no scenario enables skip the math.
+        prior_retention[0] = 0
+        for index, (_, period_days, _) in enumerate(TIERS):
+            if not self._tier_any_enabled[index]:
+                retention_days[index] = 0
+            else:
+                if period_days != 1:
+                    retention_days[index] *= period_days
+                if not all_enabled[index]:
+                    retention_days[index] *= enabled[index]
+            if index + 1 < num_tiers:
+                np.maximum(prior_retention[index], retention_days[index],
+                           out=prior_retention[index + 1])
+        total_max_retention = np.maximum(prior_retention[-1], retention_days[-1])
+
+        # Scenarios with invalid retentions either raise an InputError or,
+        # when sweeping a grid, are flagged in self.valid and sized anyway
+        invalid_retention = enabled & (retention_days < prior_retention)
+        invalid_replication = (replication_days <= 0) | (replication_days > total_max_retention)
+        self.valid = ~invalid_retention.any(axis=0) & ~invalid_replication
+        if raise_on_invalid and np.any(invalid_retention):
+            tier, i = np.argwhere(invalid_retention)[0]
+            prior_tier = TIER_NAMES[np.flatnonzero(enabled[:tier, i])[-1]]
+            self.warningMsg = "Scenario %d: %s are inclusive of %s. " \
+                "%s retention of %d days should be larger than %s retention of %d days." \
+                % (i, TIER_PLURALS[TIER_NAMES[tier]].capitalize(), TIER_PLURALS[prior_tier],
+                   TIER_NAMES[tier].capitalize(), retention_days[tier, i],
+                   TIER_PLURALS[prior_tier], prior_retention[tier, i])
+            raise InputError(self.warningMsg)
+        # Retained counts only go below 0 for disabled or invalid tiers
+        invalid_tier = invalid_retention.any(axis=1)
+        clip_retained = ~all_enabled | invalid_tier
+
+        # Disabled tiers use a frequency of 1 to keep the math finite, their
+        # incremental size of 0 makes them add nothing. After its retention
+        # every snapshot of a tier is retained, disabled tiers have no
+        # retention so their count is clipped to 0.
+        self._tier_period_frequency = []
+        for index, (_, period_days, units_per_period) in enumerate(TIERS):
+            np.maximum(frequency[index], 1, out=tier_frequency[index])
+            if period_days != 1:
+                np.multiply(tier_frequency[index], period_days, out=period_frequency[index])
+                self._tier_period_frequency.append(period_frequency[index])
+            else:
+                self._tier_period_frequency.append(tier_frequency[index])
+            if not self._tier_any_enabled[index]:
+                incremental_size[index] = 0
+                retained[index] = 0
+                total_size[index] = 0
+                continue
+            np.multiply(self.first_full_tb, change_rate[index], out=incremental_size[index])
+            incremental_size[index] /= 100
+            if not all_enabled[index]:
+                incremental_size[index] *= enabled[index]
+            np.subtract(retention_days[index], prior_retention[index], out=retained[index])
+            if units_per_period != 1:
+                retained[index] *= units_per_period
+            retained[index] /= self._tier_period_frequency[index]
+            np.ceil(retained[index], out=retained[index])
+            if clip_retained[index]:
+                np.maximum(retained[index], 0, out=retained[index])
+            np.multiply(incremental_size[index], retained[index], out=total_size[index])
+        self.tier_enabled = enabled
+        self.tier_frequency = tier_frequency
+        self.tier_retention_days = retention_days
+        self.tier_prior_retention = prior_retention
+        self.tier_change_rate = change_rate
+        self.tier_incremental_size = incremental_size
+        self.tier_retained = retained
+        self.tier_total_size = total_size
+
+        # Same per tier attributes as CapacityCore, as views into the arrays
+        for index, tier in enumerate(TIER_NAMES):
+            setattr(self, '%sFrequency' % tier, frequency[index])
+            setattr(self, '%sRetentionDays' % tier, retention_days[index])
+            setattr(self, '%sChangeRate' % tier, self.tier_change_rate[index])
+            setattr(self, '%sIncrementalSize' % tier, self.tier_incremental_size[index])
+            setattr(self, '%sTotalSize' % tier, self.tier_total_size[index])
+            setattr(self, '%sRetained' % tier, self.tier_retained[index])
+
+        if raise_on_invalid and np.any(invalid_replication):
+            i = np.flatnonzero(invalid_replication)[0]
+            assert replication_days[i] > 0
+            self.warningMsg = "Scenario %d: Replication retention of %d days should be less than " \
+                "or equal to total retention of %d days. " \
+                % (i, replication_days[i], total_max_retention[i])
+            raise InputError(self.warningMsg)
+
+        self.total_incremental_tb = self.hourlyIncrementalSize + \
+            self.dailyIncrementalSize + self.weeklyIncrementalSize + \
+            self.monthlyIncrementalSize + self.quarterlyIncrementalSize + \
+            self.yearlyIncrementalSize
+        self.total_max_retention = total_max_retention
+        self.replication_days = replication_days
+
+        # Bounds of each tier across all scenarios, so days that are past or
+        # before a tier for every scenario skip the per scenario math
+        self._retention_max = retention_days.max(axis=1)
+        self._prior_retention_min = prior_retention.min(axis=1)
+        self._prior_retention_max = prior_retention.max(axis=1)
+        self._invalid_tier = invalid_tier
+
+        # Scenarios x days capacity matrix for the days to size, sized for
+        # every day in one pass as a days x scenarios array, plus the per
+        # scenario capacity at max retention and at replication days
+        self.days_to_size = np.asarray(days_to_size if days_to_size else [], dtype=float)
+        self.days_size_matrix = self.capacity_at(self.days_to_size[:, np.newaxis]).T
+        # Every tier is fully retained at the max retention
+        self.max_retention_capacity = self.first_full_tb.copy()
+        for index in np.flatnonzero(self._tier_any_enabled):
+            self.max_retention_capacity += self.tier_total_size[index]
+        self.replication_capacity = self.capacity_at(replication_days)
+
+    def capacity_at(self, days):
+        """
+        Returns the capacity of each scenario after a number of days. Days is
+        either a single number of days for every scenario, an array with the
+        number of days for each scenario, or a column of days to size every
+        scenario for, which returns a days x scenarios array.
+        """
+        per_scenario = np.shape(days)[-1:] == (self.num_scenarios,) and self.num_scenarios > 1
+        shape = np.broadcast_shapes(np.shape(days), (self.num_scenarios,))
+        if np.size(days) == 0:
+            return np.empty(shape)
+        # Days that are past or before a tier for every scenario skip the per
+        # scenario math, comparing the days to the bounds of the tier first
+        days_min = np.min(days)
+        days_max = np.max(days)
+        # A sorted column of days only does the per scenario math for the
+        # days a tier is partly retained at. Earlier days add nothing and
+        # later days add the whole tier.
+        column = days[:, 0] if np.ndim(days) == 2 and np.all(np.diff(days, axis=0) >= 0) else None
+        # Capacity stays one entry per scenario while the tiers added so far
+        # are the same on every day, and only grows to the days x scenarios
+        # shape at the first tier that is partly retained
+        capacity = self.first_full_tb.copy()
+        count = None
+        for index, (_, period_days, units_per_period) in enumerate(TIERS):
+            if not self._tier_any_enabled[index]:
+                continue
+            # No snapshot of the tier is retained yet. Hourlies are the first
+            # tier and are retained from day 0.
+            if index > 0 and days_max <= self._prior_retention_min[index]:
+                continue
+            # Every snapshot of the tier is retained by then
+            if days_min >= self._retention_max[index] or \
+                    per_scenario and np.all(days >= self.tier_retention_days[index]):
+                capacity += self.tier_total_size[index]
+                continue
+            if index > 0 and per_scenario and np.all(days <= self.tier_prior_retention[index]):
+                continue
+            if capacity.shape != shape:
+                capacity = np.broadcast_to(capacity, shape).copy()
+            if count is None:
+                count = np.empty(shape)
+            rows, partial_days, partial_min = slice(None), days, days_min
+            if column is not None:
+                start = 0 if index == 0 else \
+                    np.searchsorted(column, self._prior_retention_min[index], side='right')
+                end = np.searchsorted(column, self._retention_max[index], side='left')
+                capacity[end:] += self.tier_total_size[index]
+                rows, partial_days, partial_min = slice(start, end), days[start:end], column[start]
+            # Same math as tier_count(), with one array reused for the counts
+            # of every tier in between. Counts only go below 0 for invalid
+            # tiers or days before the prior retention, disabled tiers add
+            # nothing either way as their incremental size is 0.
+            counts = np.minimum(partial_days, self.tier_retention_days[index], out=count[rows])
+            counts -= self.tier_prior_retention[index]
+            if units_per_period != 1:
+                counts *= units_per_period
+            counts /= self._tier_period_frequency[index]
+            np.ceil(counts, out=counts)
+            if self._invalid_tier[index] or partial_min < self._prior_retention_max[index]:
+                np.maximum(counts, 0, out=counts)
+            counts *= self.tier_incremental_size[index]
+            capacity[rows] += counts
+        if capacity.shape != shape:
+            capacity = np.broadcast_to(capacity, shape).copy()
+        return capacity
+
+    def to_records(self):
+        """
+        Returns the results as a structured NumPy array with one record per
+        scenario, see record_dtype() for the fields. The records take a
+        fixed number of bytes per scenario. Sort them with
+        np.sort(records, order=field) or top_records() and filter them with
+        boolean masks such as records[records['capacity_365_days'] < 100].
+        """
+        days_to_size = self.days_to_size.astype(int).tolist()
+        records = np.empty(self.num_scenarios, dtype=record_dtype(days_to_size))
+        records['scenario'] = np.arange(self.num_scenarios)
+        for field, _ in RECORD_FIELDS[1:]:
+            records[field] = getattr(self, field)
+        for index, tier in enumerate(TIER_NAMES):
+            records['%s_frequency' % tier] = getattr(self, '%sFrequency' % tier)
+            records['%s_retention_days' % tier] = self.tier_retention_days[index]
+            records['%s_change_rate' % tier] = self.tier_change_rate[index]
+            records['%s_retained' % tier] = self.tier_retained[index]
+            records['%s_incremental_size' % tier] = self.tier_incremental_size[index]
+            records['%s_total_size' % tier] = self.tier_total_size[index]
+        for column, days in enumerate(days_to_size):
+            records['capacity_%d_days' % days] = self.days_size_matrix[:, column]
+        return records
+
+    def days_size_table(self, scenario):
+        """Returns the days -> capacity table of one scenario like CapacityCore"""
+        days_size_table = dict(zip(self.days_to_size.astype(int).tolist(),
+                                   self.days_size_matrix[scenario].tolist()))
+        days_size_table.setdefault(int(self.total_max_retention[scenario]),
+                                   float(self.max_retention_capacity[scenario]))
+        days_size_table.setdefault(int(self.replication_days[scenario]),
+                                   float(self.replication_capacity[scenario]))
+        return days_size_table
+
+
+class CapacityDBLogsBatch:
+    def __init__(self,
+                 log_daily_fetb=None,
+                 log_data_reduction_ratio=None,
+                 log_daily_non_compressible_fetb=None,
+                 log_retention_days=None,
+                 days_to_size: List[int] = None):
+
+        log_daily_fetb, log_data_reduction_ratio, log_daily_non_compressible_fetb, \
+            log_retention_days = np.broadcast_arrays(*[np.atleast_1d(np.asarray(
+                0 if value is None else value, dtype=float)) for value in
+                [log_daily_fetb, log_data_reduction_ratio,
+                 log_daily_non_compressible_fetb, log_retention_days]])
+        self.num_scenarios = len(log_daily_fetb)
+
+        assert np.all(log_daily_fetb >= 0)
+        assert not np.any((log_daily_fetb > 0) & (log_data_reduction_ratio <= 0))
+        assert np.all(log_daily_non_compressible_fetb >= 0)
+        assert np.all(log_retention_days > 0)
+        self.log_daily_fetb = log_daily_fetb
+        self.log_data_reduction_ratio = log_data_reduction_ratio
+        self.log_daily_non_compressible_fetb = log_daily_non_compressible_fetb
+        self.log_retention_days = log_retention_days
+
+        log_daily_fetb_after_reduction = np.divide(log_daily_fetb, log_data_reduction_ratio,
+            out=np.zeros(self.num_scenarios), where=log_daily_fetb > 0)
+        self.log_daily_ingest_tb = log_daily_fetb_after_reduction + log_daily_non_compressible_fetb
+
+        # DB log sizing is just the # of days (up to the retention) * log
+        # capacity per day
+        self.days_to_size = np.asarray(days_to_size if days_to_size else [], dtype=float)
+        self.days_size_matrix = self.capacity_at(self.days_to_size[np.newaxis, :])
+
+    def capacity_at(self, days):
+        """
+        Returns the DB log capacity of each scenario after a number of days.
+        Days must broadcast against (scenarios, 1).
+        """
+        return np.minimum(days, self.log_retention_days[:, np.newaxis]) * \
+            self.log_daily_ingest_tb[:, np.newaxis]
@@ -1,7 +1,7 @@
-import math
 from typing import List
 from error import InputError
-from constants.global_constants import HOURS_IN_DAY, DAYS_IN_WEEK, \
+from retentiontier import retention_tier
+from constants.global_constants import DAYS_IN_WEEK, \
     DAYS_IN_MONTH, DAYS_IN_YEAR, DAYS_IN_QUARTER
 
 class CapacityCore:
@@ -51,49 +51,57 @@ class CapacityCore:
         self.first_full_tb = self.reduced_total_fetb + self.total_non_compressible_fetb
 
         # Calculate out what the retention for each frequency is
+        total_max_retention = 0
+        total_max_retention_freq = 'prior tiers'
         if hourly_frequency:
             hourly_retention_days = hourly_retention
             total_max_retention = hourly_retention_days
+            total_max_retention_freq = 'hourlies'
         if daily_frequency:
             daily_retention_days = daily_retention
             if (daily_retention_days < total_max_retention):
                 self.warningMsg = "Dailies are inclusive of %s. " \
                     "Daily retention of %d days should be larger than %s retention of %d days." \
-                    % (max_retention_freq, daily_retention_days, max_retention_freq, max_retention)
+                    % (total_max_retention_freq, daily_retention_days, total_max_retention_freq, total_max_retention)
                 raise InputError(self.warningMsg)
             total_max_retention = daily_retention_days
+            total_max_retention_freq = 'dailies'
         if weekly_frequency:
             weekly_retention_days = weekly_retention * DAYS_IN_WEEK
             if (weekly_retention_days < total_max_retention):
                 self.warningMsg = "Weeklies are inclusive of %s. " \
                     "Weekly retention of %d days should be larger than %s retention of %d days." \
-                    % (max_retention_freq, weekly_retention_days, max_retention_freq, max_retention)
+                    % (total_max_retention_freq, weekly_retention_days, total_max_retention_freq, total_max_retention)
                 raise InputError(self.warningMsg)
             total_max_retention = weekly_retention_days
+            total_max_retention_freq = 'weeklies'
         if monthly_frequency:
             monthly_retention_days = monthly_retention * DAYS_IN_MONTH
             if (monthly_retention_days < total_max_retention):
                 self.warningMsg = "Monthlies are inclusive of %s. " \
                     "Monthly retention of %d days should be larger than %s retention of %d days." \
-                    % (max_retention_freq, monthly_retention_days, max_retention_freq, max_retention)
+                    % (total_max_retention_freq, monthly_retention_days, total_max_retention_freq, total_max_retention)
                 raise InputError(self.warningMsg)
             total_max_retention = monthly_retention_days
+            total_max_retention_freq = 'monthlies'
         if quarterly_frequency:
             quarterly_retention_days = quarterly_retention * DAYS_IN_QUARTER
             if (quarterly_retention_days < total_max_retention):
                 self.warningMsg = "Quarterlies are inclusive of %s. " \
                     "Quarterly retention of %d days should be larger than %s retention of %d days." \
-                    % (max_retention_freq, quarterly_retention_days, max_retention_freq, max_retention)
+                    % (total_max_retention_freq, quarterly_retention_days, total_max_retention_freq, total_max_retention)
                 raise InputError(self.warningMsg)
             total_max_retention = quarterly_retention_days
+            total_max_retention_freq = 'quarterlies'
         if yearly_frequency:
             yearly_retention_days = yearly_retention * DAYS_IN_YEAR
             if (yearly_retention_days < total_max_retention):
                 self.warningMsg = "Yearlies are inclusive of %s. " \
                     "Yearly retention of %d days should be larger than %s retention of %d days." \
-                    % (max_retention_freq, yearly_retention_days, max_retention_freq, max_retention)
+                    % (total_max_retention_freq, yearly_retention_days, total_max_retention_freq, total_max_retention)
                 raise InputError(self.warningMsg)
             total_max_retention = yearly_retention_days
+            total_max_retention_freq = 'yearlies'
 
 
         # Hash table where we will store the days we will size for
@@ -128,7 +136,8 @@ class CapacityCore:
                 freq_str = 'Every hour'
             else:
                 freq_str = 'Every %d hours' % hourly_frequency
-            num_hourlies = math.ceil(hourly_retention * HOURS_IN_DAY / hourly_frequency)
+            tier = retention_tier(1, hourly_frequency, hourly_retention_days, hourly=True)
+            num_hourlies = tier.retained
             self.hourlyFrequency = hourly_frequency
             self.hourlyRetentionDays = hourly_retention_days
             self.hourlyChangeRate = hourly_change_rate
@@ -137,11 +146,7 @@ class CapacityCore:
             self.hourlyRetained = num_hourlies
             # We want to calculate the size for some given days
             for days in days_to_size:
-                if days >= hourly_retention_days:
-                    days_size_table[days] += self.hourlyTotalSize
-                else:
-                    num_hourlies_for_days = math.ceil(days * HOURS_IN_DAY / hourly_frequency)
-                    days_size_table[days] += num_hourlies_for_days * self.hourlyIncrementalSize
+                days_size_table[days] += tier.count(days) * self.hourlyIncrementalSize
             max_retention = hourly_retention_days
             max_retention_freq = 'hourlies'
         else:
@@ -155,12 +160,12 @@ class CapacityCore:
             assert daily_frequency > 0
             assert daily_retention and daily_retention > 0
             assert daily_change_rate > 0
-            num_dailies_to_keep = daily_retention_days - max_retention
             if daily_frequency == 1:
                 freq_str = 'Everyday'
             else:
                 freq_str = 'Every %d days' % daily_frequency
-            num_dailies = math.ceil(num_dailies_to_keep / daily_frequency)
+            tier = retention_tier(1, daily_frequency, daily_retention_days, max_retention)
+            num_dailies = tier.retained
             self.dailyFrequency = daily_frequency
             self.dailyRetentionDays = daily_retention_days
             self.dailyChangeRate = daily_change_rate
@@ -169,12 +174,7 @@ class CapacityCore:
             self.dailyRetained = num_dailies
             # We want to calculate the size for some given days
             for days in days_to_size:
-                if days >= daily_retention_days:
-                    days_size_table[days] += self.dailyTotalSize
-                else:
-                    num_dailies_for_days = math.ceil((days - max_retention) / daily_frequency)
-                    if num_dailies_for_days > 0:
-                        days_size_table[days] += num_dailies_for_days * self.dailyIncrementalSize
+                days_size_table[days] += tier.count(days) * self.dailyIncrementalSize
             max_retention = daily_retention_days
             max_retention_freq = 'dailies'
         else:
@@ -189,12 +189,12 @@ class CapacityCore:
             assert weekly_frequency > 0
             assert weekly_retention and weekly_retention > 0
             assert weekly_change_rate > 0
-            num_weeklies_to_keep = math.ceil((weekly_retention_days - max_retention) / DAYS_IN_WEEK)
             if weekly_frequency == 1:
                 freq_str = 'Every week'
             else:
                 freq_str = 'Every %d weeks' % weekly_frequency
-            num_weeklies = math.ceil(num_weeklies_to_keep / weekly_frequency)
+            tier = retention_tier(DAYS_IN_WEEK, weekly_frequency, weekly_retention_days, max_retention)
+            num_weeklies = tier.retained
             self.weeklyFrequency = weekly_frequency
             self.weeklyRetentionDays = weekly_retention_days
             self.weeklyChangeRate = weekly_change_rate
@@ -203,12 +203,7 @@ class CapacityCore:
             self.weeklyRetained = num_weeklies
             # We want to calculate the size for some given days
             for days in days_to_size:
-                if days >= weekly_retention_days:
-                    days_size_table[days] += self.weeklyTotalSize
-                else:
-                    num_weeklies_for_days = math.ceil((days - max_retention) / DAYS_IN_WEEK / weekly_frequency)
-                    if num_weeklies_for_days > 0:
-                        days_size_table[days] += num_weeklies_for_days * self.weeklyIncrementalSize
+                days_size_table[days] += tier.count(days) * self.weeklyIncrementalSize
             max_retention = weekly_retention_days
             max_retention_freq = 'weeklies'
         else:
@@ -223,12 +218,12 @@ class CapacityCore:
             assert monthly_frequency > 0
             assert monthly_retention and monthly_retention > 0
             assert monthly_change_rate > 0
-            num_monthlies_to_keep = math.ceil((monthly_retention_days - max_retention) / DAYS_IN_MONTH)
             if monthly_frequency == 1:
                 freq_str = 'Every month'
             else:
                 freq_str = 'Every %d months' % monthly_frequency
-            num_monthlies = math.ceil(num_monthlies_to_keep / monthly_frequency)
+            tier = retention_tier(DAYS_IN_MONTH, monthly_frequency, monthly_retention_days, max_retention)
+            num_monthlies = tier.retained
             self.monthlyFrequency = monthly_frequency
             self.monthlyRetentionDays = monthly_retention_days
             self.monthlyChangeRate = monthly_change_rate
@@ -237,12 +232,7 @@ class CapacityCore:
             self.monthlyRetained = num_monthlies
             # We want to calculate the size for some given days
             for days in days_to_size:
-                if days >= monthly_retention_days:
-                    days_size_table[days] += self.monthlyTotalSize
-                else:
-                    num_monthlies_for_days = math.ceil((days - max_retention) / DAYS_IN_MONTH / monthly_frequency)
-                    if num_monthlies_for_days > 0:
-                        days_size_table[days] += num_monthlies_for_days * self.monthlyIncrementalSize
+                days_size_table[days] += tier.count(days) * self.monthlyIncrementalSize
             max_retention = monthly_retention_days
             max_retention_freq = 'monthlies'
         else:
@@ -257,12 +247,12 @@ class CapacityCore:
             assert quarterly_frequency > 0
             assert quarterly_retention and quarterly_retention > 0
             assert quarterly_change_rate > 0
-            num_quarterlies_to_keep = math.ceil((quarterly_retention_days - max_retention) / DAYS_IN_QUARTER)
             if quarterly_frequency == 1:
                 freq_str = 'Every quarter'
             else:
                 freq_str = 'Every %d quarters' % quarterly_frequency
-            num_quarterlies = math.ceil(num_quarterlies_to_keep / quarterly_frequency)
+            tier = retention_tier(DAYS_IN_QUARTER, quarterly_frequency, quarterly_retention_days, max_retention)
+            num_quarterlies = tier.retained
             self.quarterlyFrequency = quarterly_frequency
             self.quarterlyRetentionDays = quarterly_retention_days
             self.quarterlyChangeRate = quarterly_change_rate
@@ -271,12 +261,7 @@ class CapacityCore:
             self.quarterlyRetained = num_quarterlies
             # We want to calculate the size for some given days
             for days in days_to_size:
-                if days >= quarterly_retention_days:
-                    days_size_table[days] += self.quarterlyTotalSize
-                else:
-                    num_quarterlies_for_days = math.ceil((days - max_retention) / DAYS_IN_QUARTER / quarterly_frequency)
-                    if num_quarterlies_for_days > 0:
-                        days_size_table[days] += num_quarterlies_for_days * self.quarterlyIncrementalSize
+                days_size_table[days] += tier.count(days) * self.quarterlyIncrementalSize
             max_retention = quarterly_retention_days
             max_retention_freq = 'quarterlies'
         else:
@@ -291,12 +276,12 @@ class CapacityCore:
             assert yearly_frequency > 0
             assert yearly_retention and yearly_retention > 0
             assert yearly_change_rate > 0
-            num_yearlies_to_keep = math.ceil((yearly_retention_days - max_retention) / DAYS_IN_YEAR)
             if yearly_frequency == 1:
                 freq_str = 'Every year'
             else:
                 freq_str = 'Every %d years' % yearly_frequency
-            num_yearlies = math.ceil(num_yearlies_to_keep / yearly_frequency)
+            tier = retention_tier(DAYS_IN_YEAR, yearly_frequency, yearly_retention_days, max_retention)
+            num_yearlies = tier.retained
             self.yearlyFrequency = yearly_frequency
             self.yearlyRetentionDays = yearly_retention_days
             self.yearlyChangeRate = yearly_change_rate
@@ -304,12 +289,7 @@ class CapacityCore:
             self.yearlyTotalSize = self.yearlyIncrementalSize * num_yearlies
             self.yearlyRetained = num_yearlies
             for days in days_to_size:
-                if days >= yearly_retention_days:
-                    days_size_table[days] += self.yearlyTotalSize
-                else:
-                    num_yearlies_for_days = math.ceil((days - max_retention) / DAYS_IN_YEAR / yearly_frequency)
-                    if num_yearlies_for_days > 0:
-                        days_size_table[days] += num_yearlies_for_days * self.yearlyIncrementalSize
+                days_size_table[days] += tier.count(days) * self.yearlyIncrementalSize
             max_retention = yearly_retention_days
             max_retention_freq = 'yearlies'
         else:
@@ -0,0 +1,243 @@
+"""
+Size a fleet of workloads from an inventory CSV, one object per row.
+
+Inventory columns, the last three are optional:
+    object,type,cluster,fetb,change_rate,sla,data_reduction_ratio,non_compressible_fetb,log_daily_fetb
+
+The SLA profiles are a YAML or CSV file with the CapacityCore inputs for
+each SLA name, plus log_retention_days and log_data_reduction_ratio for
+workloads with DB logs. A change rate on an inventory row replaces the
+daily_change_rate of its SLA.
+
+YAML example:
+    Gold:
+        hourly_frequency: 4
+        hourly_retention: 3
+        hourly_change_rate: 0.2
+        daily_frequency: 1
+        daily_retention: 30
+        daily_change_rate: 2
+        replication_days: 7
+        log_retention_days: 14
+
+CSV example, one row per SLA:
+    sla,hourly_frequency,hourly_retention,hourly_change_rate,daily_frequency,...
+    Gold,4,3,0.2,1,...
+
+Rows are streamed and summed into groups of (cluster, type, SLA), so
+memory only grows with the number of groups. The capacity of a workload is
+proportional to its first full and daily log ingest, so every SLA profile
+is sized once for a 1 TB first full and 1 TB of logs per day, and each
+group is that capacity scaled by the group totals. The dailies of rows with
+their own change rate are proportional to first full * change rate, which
+is summed per group as well.
+
+Usage:
+    python fleet.py --inventory inventory.csv --sla sla.yaml --output clusters.csv
+"""
+
+import argparse
+import csv
+from capacitycore import CapacityCore
+from capacityDBLogs import CapacityDBLogs
+from error import InputError
+from retentiontier import retention_tier
+from workloads import CAPACITYCOREWORKLOADS, CAPACITYDBLOGSWORKLOADS
+
+DEFAULT_DATA_REDUCTION_RATIO = 2.5
+DEFAULT_LOG_DATA_REDUCTION_RATIO = 2
+
+# SLA profile inputs that are not CapacityCore inputs
+LOG_PROFILE_PARAMETERS = ['log_retention_days', 'log_data_reduction_ratio']
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Size a fleet of workloads from an inventory CSV")
+    parser.add_argument("--inventory", type=str, required=True, help="Inventory CSV, one object per row")
+    parser.add_argument("--sla", type=str, required=True, help="YAML or CSV file of SLA profiles")
+    parser.add_argument("--output", type=str, required=True, help="Output CSV of per cluster totals")
+    parser.add_argument("--groups", type=str, help="Optional output CSV of per group totals")
+    parser.add_argument("--days", type=int, nargs='+', default=[365, 730, 1095, 1460, 1825],
+                        help="Days to size for")
+    return parser.parse_args()
+
+
+def load_sla_profiles(sla_path):
+    """Returns a dict of SLA name -> dict of sizing inputs"""
+    if sla_path.endswith('.csv'):
+        with open(sla_path, 'r') as csv_file:
+            return {row.pop('sla').strip(): {parameter: float(value)
+                                             for parameter, value in row.items() if value.strip()}
+                    for row in csv.DictReader(csv_file)}
+    import yaml
+    with open(sla_path, 'r') as yaml_file:
+        return yaml.safe_load(yaml_file)
+
+
+def read_inventory(inventory_path):
+    """Generator of the inventory rows, with the sizes converted to floats"""
+    with open(inventory_path, 'r', newline='') as csv_file:
+        for line, row in enumerate(csv.DictReader(csv_file), start=2):
+            try:
+                row['fetb'] = float(row['fetb'])
+                row['change_rate'] = float(row['change_rate']) if row.get('change_rate') else None
+                row['data_reduction_ratio'] = float(row.get('data_reduction_ratio') or
+                                                    DEFAULT_DATA_REDUCTION_RATIO)
+                row['non_compressible_fetb'] = float(row.get('non_compressible_fetb') or 0)
+                row['log_daily_fetb'] = float(row.get('log_daily_fetb') or 0)
+            except (KeyError, ValueError) as error:
+                raise InputError("Inventory line %d: invalid row (%s)" % (line, error))
+            yield row
+
+
+def group_inventory(rows):
+    """
+    Returns a dict of (cluster, type, SLA) -> dict of the object count and
+    summed FETB, first full and daily log FETB. Rows with their own change
+    rate also sum their first full and first full * change rate / 100.
+    """
+    groups = {}
+    for row in rows:
+        if row['type'] not in CAPACITYCOREWORKLOADS:
+            raise InputError("Object %s: workload type %s is not supported. Types: %s"
+                             % (row['object'], row['type'], ', '.join(CAPACITYCOREWORKLOADS)))
+        key = (row['cluster'], row['type'], row['sla'])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {'objects': 0, 'fetb': 0, 'first_full_tb': 0,
+                                   'change_rate_first_full_tb': 0, 'daily_change_tb': 0,
+                                   'log_daily_fetb': 0}
+        first_full_tb = row['fetb'] / row['data_reduction_ratio'] + row['non_compressible_fetb']
+        group['objects'] += 1
+        group['fetb'] += row['fetb']
+        group['first_full_tb'] += first_full_tb
+        if row['change_rate'] is not None:
+            group['change_rate_first_full_tb'] += first_full_tb
+            group['daily_change_tb'] += first_full_tb * row['change_rate'] / 100
+        group['log_daily_fetb'] += row['log_daily_fetb']
+    return groups
+
+
+class FleetSizing:
+    def __init__(self,
+                 sla_profiles: dict = None,
+                 days_to_size: list = None):
+
+        self.sla_profiles = sla_profiles
+        self.days_to_size = days_to_size
+        # Capacity per TB of first full or daily logs, by SLA
+        self.core_unit_tables = {}
+        self.log_unit_tables = {}
+
+    def profile(self, sla):
+        if sla not in self.sla_profiles:
+            raise InputError("SLA %s is not in the SLA profiles" % sla)
+        return self.sla_profiles[sla]
+
+    def core_unit_table(self, sla):
+        """Returns the CapacityCore of the SLA for a 1 TB first full"""
+        if sla not in self.core_unit_tables:
+            core_inputs = {parameter: value for parameter, value in self.profile(sla).items()
+                           if parameter not in LOG_PROFILE_PARAMETERS}
+            # CapacityCore needs replication days, which only adds a day to
+            # size for, so use a single day if the SLA does not replicate
+            core_inputs.setdefault('replication_days', 1)
+            capacity_core = CapacityCore(total_fetb=1, data_reduction_ratio=1,
+                days_to_size=list(self.days_to_size), **core_inputs)
+            self.core_unit_tables[sla] = capacity_core
+        return self.core_unit_tables[sla]
+
+    def log_unit_table(self, sla):
+        """Returns the days size table of the SLA for 1 TB of logs per day"""
+        if sla not in self.log_unit_tables:
+            profile = self.profile(sla)
+            if not profile.get('log_retention_days'):
+                raise InputError("SLA %s needs log_retention_days to size DB logs" % sla)
+            capacity_core = self.core_unit_table(sla)
+            self.log_unit_tables[sla] = CapacityDBLogs(log_daily_fetb=1,
+                log_data_reduction_ratio=1,
+                log_daily_non_compressible_fetb=0,
+                log_retention_days=profile.get('log_retention_days'),
+                days_to_size=list(self.days_to_size),
+                replication_days=capacity_core.replication_days,
+                total_max_retention=capacity_core.total_max_retention)
+        return self.log_unit_tables[sla]
+
+    def size_group(self, key, group):
+        """Returns the days size table of an inventory group"""
+        cluster, workload_type, sla = key
+        capacity_core = self.core_unit_table(sla)
+        core_table = capacity_core.days_size_table
+        days_size_table = {days: core_table[days] * group['first_full_tb']
+                           for days in self.days_to_size}
+        if group['change_rate_first_full_tb'] and capacity_core.dailyFrequency:
+            # Swap the daily change of the SLA for the change rate of the rows
+            # that have their own, the dailies retained are the same
+            daily_change_tb = group['daily_change_tb'] - \
+                group['change_rate_first_full_tb'] * capacity_core.dailyIncrementalSize
+            tier = retention_tier(1, capacity_core.dailyFrequency, capacity_core.dailyRetentionDays,
+                                  capacity_core.hourlyRetentionDays or 0)
+            for days in self.days_to_size:
+                days_size_table[days] += tier.count(days) * daily_change_tb
+        if group['log_daily_fetb'] and workload_type in CAPACITYDBLOGSWORKLOADS:
+            log_data_reduction_ratio = self.profile(sla).get('log_data_reduction_ratio',
+                                                             DEFAULT_LOG_DATA_REDUCTION_RATIO)
+            log_daily_ingest_tb = group['log_daily_fetb'] / log_data_reduction_ratio
+            log_table = self.log_unit_table(sla).days_size_table
+            for days in self.days_to_size:
+                days_size_table[days] += log_table[days] * log_daily_ingest_tb
+        return days_size_table
+
+    def size_groups(self, groups):
+        """Returns a dict of group key -> days size table"""
+        return {key: self.size_group(key, group) for key, group in groups.items()}
+
+    def cluster_totals(self, groups, group_tables):
+        """Returns a dict of cluster -> dict of object count, FETB and days size table"""
+        clusters = {}
+        for key, group in groups.items():
+            cluster = clusters.setdefault(key[0], {'objects': 0, 'fetb': 0,
+                'days_size_table': {days: 0 for days in self.days_to_size}})
+            cluster['objects'] += group['objects']
+            cluster['fetb'] += group['fetb']
+            for days in self.days_to_size:
+                cluster['days_size_table'][days] += group_tables[key][days]
+        return clusters
+
+
+def write_clusters(output_path, clusters, days_to_size):
+    with open(output_path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['cluster', 'objects', 'fetb'] +
+                        ['capacity_%d_days' % days for days in days_to_size])
+        for name, cluster in sorted(clusters.items()):
+            writer.writerow([name, cluster['objects'], cluster['fetb']] +
+                            [cluster['days_size_table'][days] for days in days_to_size])
+
+
+def write_groups(output_path, groups, group_tables, days_to_size):
+    with open(output_path, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(['cluster', 'type', 'sla', 'objects', 'fetb'] +
+                        ['capacity_%d_days' % days for days in days_to_size])
+        for key in sorted(groups):
+            writer.writerow(list(key) + [groups[key]['objects'], groups[key]['fetb']] +
+                            [group_tables[key][days] for days in days_to_size])
+
+
+def main():
+    args = parse_arguments()
+    fleet = FleetSizing(load_sla_profiles(args.sla), args.days)
+    groups = group_inventory(read_inventory(args.inventory))
+    group_tables = fleet.size_groups(groups)
+    clusters = fleet.cluster_totals(groups, group_tables)
+    write_clusters(args.output, clusters, args.days)
+    if args.groups:
+        write_groups(args.groups, groups, group_tables, args.days)
+    print("Sized %d objects in %d groups across %d clusters, %d SLA profiles sized"
+          % (sum(group['objects'] for group in groups.values()), len(groups),
+             len(clusters), len(fleet.core_unit_tables)))
+
+
+if __name__ == '__main__':
+    main()
@@ -36,6 +36,19 @@ OBJECT_COUNT = 500
 # and incremental size each day with this growth factor.
 ANNUAL_GROWTH_PERCENT = 10
 
+# Monte Carlo sizing for inputs that are guesses. Specify the number of
+# samples to draw, or zero to skip it, and a distribution for any of the
+# core or DB log inputs (lower case, as named in CapacityCore and
+# CapacityDBLogs). Inputs not listed use the values in this file.
+# Distributions: ('normal', mean, sd), ('lognormal', mean, sigma),
+# ('uniform', low, high), ('triangular', low, mode, high)
+MONTE_CARLO_SAMPLES = 0
+MONTE_CARLO_DISTRIBUTIONS = {
+    'data_reduction_ratio': ('triangular', 2, 2.5, 3),
+    'daily_change_rate': ('triangular', 1, 2, 4),
+    'log_data_reduction_ratio': ('uniform', 1.5, 2.5),
+}
+
 # Specify the number of days to replicate. If no replication, use '0' days.
 # If replication is specified, you can also specify how quickly you need
 # replication first fulls to complete in (DAYS) and incrementals to complete
@@ -44,6 +57,10 @@ REPLICATION_DAYS = 7
 REPLICATION_FIRST_FULL_DAYS = 2
 REPLICATION_INCREMENTAL_HOURS = 8
 
+# Specify the Gbps of the replication link to simulate replicating every
+# snapshot and the DB logs over, hour by hour, for a year. Use '0' to skip.
+REPLICATION_LINK_GBPS = 10
+
 # Hourly snapshot parameters
 # - HOURLY_FREQUENCY specifies every how many hours to take a hourly frequency
 # snapshot. Specify one for snapshot every hour. Specify zero to not take
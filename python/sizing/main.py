@@ -1,38 +1,49 @@
 from input import *
-from capacityCore import CapacityCore
+from capacitycore import CapacityCore
 from capacityDBLogs import CapacityDBLogs
+from capacitybatch import CapacityCoreBatch
+from timeseries import CapacityTimeSeries
+from montecarlo import MonteCarloSizing
 from replication import Replication
+from replicationsim import ReplicationSimulation
+from error import InputError
 from workloads import *
 from tests.test0 import *
 from tests.test1 import *
 
 def main():
+    # CapacityCore and CapacityDBLogs add the max retention and replication
+    # days to the days to size, so work on a copy of DAYS_TO_SIZE
+    days_to_size = list(DAYS_TO_SIZE)
+
     # Use the capacity core calculations for most workloads
+    core_inputs = dict(total_fetb = TOTAL_FETB,
+        data_reduction_ratio = DATA_REDUCTION_RATIO,
+        total_non_compressible_fetb = TOTAL_NON_COMPRESSIBLE_FETB,
+        days_to_size = days_to_size,
+        hourly_frequency=HOURLY_FREQUENCY,
+        hourly_retention=HOURLY_RETENTION_DAYS,
+        hourly_change_rate=HOURLY_CHANGE_RATE_PERCENT,
+        daily_frequency=DAILY_FREQUENCY,
+        daily_retention=DAILY_RETENTION_DAYS,
+        daily_change_rate=DAILY_CHANGE_RATE_PERCENT,
+        weekly_frequency=WEEKLY_FREQUENCY,
+        weekly_retention=WEEKLY_RETENTION_WEEKS,
+        weekly_change_rate=WEEKLY_CHANGE_RATE_PERCENT,
+        monthly_frequency=MONTHLY_FREQUENCY,
+        monthly_retention=MONTHLY_RETENTION_MONTHS,
+        monthly_change_rate=MONTHLY_CHANGE_RATE_PERCENT,
+        quarterly_frequency=QUARTERLY_FREQUENCY,
+        quarterly_retention=QUARTERLY_RETENTION_QUARTERS,
+        quarterly_change_rate=QUARTERLY_CHANGE_RATE_PERCENT,
+        yearly_frequency=YEARLY_FREQUENCY,
+        yearly_retention=YEARLY_RETENTION_YEARS,
+        yearly_change_rate=YEARLY_CHANGE_RATE_PERCENT,
+        replication_days = REPLICATION_DAYS
+    )
+
     if WORKLOAD_TYPE in CAPACITYCOREWORKLOADS:
-        my_capacity_core = CapacityCore(total_fetb = TOTAL_FETB,
-            data_reduction_ratio = DATA_REDUCTION_RATIO,
-            total_non_compressible_fetb = TOTAL_NON_COMPRESSIBLE_FETB,
-            days_to_size = DAYS_TO_SIZE,
-            hourly_frequency=HOURLY_FREQUENCY,
-            hourly_retention=HOURLY_RETENTION_DAYS,
-            hourly_change_rate=HOURLY_CHANGE_RATE_PERCENT,
-            daily_frequency=DAILY_FREQUENCY,
-            daily_retention=DAILY_RETENTION_DAYS,
-            daily_change_rate=DAILY_CHANGE_RATE_PERCENT,
-            weekly_frequency=WEEKLY_FREQUENCY,
-            weekly_retention=WEEKLY_RETENTION_WEEKS,
-            weekly_change_rate=WEEKLY_CHANGE_RATE_PERCENT,
-            monthly_frequency=MONTHLY_FREQUENCY,
-            monthly_retention=MONTHLY_RETENTION_MONTHS,
-            monthly_change_rate=MONTHLY_CHANGE_RATE_PERCENT,
-            quarterly_frequency=QUARTERLY_FREQUENCY,
-            quarterly_retention=QUARTERLY_RETENTION_QUARTERS,
-            quarterly_change_rate=QUARTERLY_CHANGE_RATE_PERCENT,
-            yearly_frequency=YEARLY_FREQUENCY,
-            yearly_retention=YEARLY_RETENTION_YEARS,
-            yearly_change_rate=YEARLY_CHANGE_RATE_PERCENT,
-            replication_days = REPLICATION_DAYS
-        )
+        my_capacity_core = CapacityCore(**core_inputs)
 
     total_max_retention = my_capacity_core.total_max_retention
 
@@ -42,7 +53,7 @@ def main():
             log_data_reduction_ratio = LOG_DATA_REDUCTION_RATIO,
             log_daily_non_compressible_fetb = LOG_DAILY_NON_COMPRESSIBLE_FETB,
             log_retention_days = LOG_RETENTION_DAYS,
-            days_to_size = DAYS_TO_SIZE,
+            days_to_size = days_to_size,
             replication_days = REPLICATION_DAYS,
             total_max_retention = total_max_retention
         )
@@ -57,13 +68,41 @@ def main():
     else:
         days_for_year0 = total_max_retention
 
-    for days in DAYS_TO_SIZE:
+    for days in days_to_size:
         if WORKLOAD_TYPE in CAPACITYDBLOGSWORKLOADS:
             capacity_table[days] = my_capacity_core.days_size_table[days] + my_capacity_db_logs.days_size_table[days]
         else:
             capacity_table[days] = my_capacity_core.days_size_table[days]
 
 
+    # Simulate the daily capacity with the annual growth distributed daily
+    my_time_series = CapacityTimeSeries(CapacityCoreBatch(**core_inputs),
+        annual_growth_percent = ANNUAL_GROWTH_PERCENT,
+        num_days = max(days_to_size),
+        log_daily_ingest_tb = log_daily_ingest_tb if log_daily_ingest_tb else None,
+        log_retention_days = LOG_RETENTION_DAYS)
+
+    # Size the inputs that are guesses from their distributions
+    if MONTE_CARLO_SAMPLES > 0:
+        monte_carlo_core_inputs = dict(core_inputs, days_to_size = list(days_to_size))
+        monte_carlo_log_inputs = None
+        if WORKLOAD_TYPE in CAPACITYDBLOGSWORKLOADS:
+            monte_carlo_log_inputs = dict(log_daily_fetb = LOG_DAILY_FETB,
+                log_data_reduction_ratio = LOG_DATA_REDUCTION_RATIO,
+                log_daily_non_compressible_fetb = LOG_DAILY_NON_COMPRESSIBLE_FETB,
+                log_retention_days = LOG_RETENTION_DAYS)
+        for parameter, distribution in MONTE_CARLO_DISTRIBUTIONS.items():
+            if parameter in monte_carlo_core_inputs:
+                monte_carlo_core_inputs[parameter] = distribution
+            elif monte_carlo_log_inputs and parameter in monte_carlo_log_inputs:
+                monte_carlo_log_inputs[parameter] = distribution
+        try:
+            my_monte_carlo = MonteCarloSizing(monte_carlo_core_inputs, monte_carlo_log_inputs,
+                replication_first_full_days = REPLICATION_FIRST_FULL_DAYS if REPLICATION_DAYS > 0 else None,
+                replication_incremental_hours = REPLICATION_INCREMENTAL_HOURS,
+                num_samples = MONTE_CARLO_SAMPLES)
+        except InputError as error:
+            print("Monte Carlo sizing skipped: %s" % error)
 
     # Calculate replication throughput requirements
     if REPLICATION_DAYS > 0:
@@ -73,6 +112,12 @@ def main():
             replication_first_full_days = REPLICATION_FIRST_FULL_DAYS,
             replication_incremental_hours = REPLICATION_INCREMENTAL_HOURS)
 
+        # Simulate replicating each snapshot over the link hour by hour
+        if REPLICATION_LINK_GBPS > 0:
+            my_replication_simulation = ReplicationSimulation(my_capacity_core,
+                link_gbps = REPLICATION_LINK_GBPS,
+                log_daily_ingest_tb = log_daily_ingest_tb)
+
     if WORKLOAD_TYPE == "VMS":
         my_vms = VMS(object_count = OBJECT_COUNT,
             cdp_bool = CDP_BOOL, cdp_retention_hours = CDP_RETENTION_HOURS,
@@ -88,6 +133,14 @@ def main():
         check_total_capcity(capacity_table)
     except:
         pass
+    try:
+        check_time_series(my_time_series, days_to_size)
+    except:
+        pass
+    try:
+        check_monte_carlo(my_monte_carlo)
+    except:
+        pass
     try:
         check_capacity_core(my_capacity_core)
     except:
@@ -100,6 +153,10 @@ def main():
         check_replication(my_replication)
     except:
         pass
+    try:
+        check_replication_simulation(my_replication_simulation)
+    except:
+        pass
     try:
         check_vms(my_vms)
     except:
@@ -0,0 +1,133 @@
+"""
+Monte Carlo sizing. Inputs that are guesses, such as change rates and the
+data reduction ratio, are given as distributions instead of single values.
+Samples are drawn for all of them at once and sized through the batched
+sizing classes, so every sample is one scenario of a CapacityCoreBatch.
+
+A distribution is a tuple of its name and parameters:
+    ('normal', mean, standard deviation)
+    ('lognormal', mean, sigma) of the underlying normal
+    ('uniform', low, high)
+    ('triangular', low, mode, high)
+Any other value is used as is for every sample.
+"""
+
+import numpy as np
+from capacitybatch import CapacityCoreBatch, CapacityDBLogsBatch
+from replication import Replication
+from error import InputError
+
+PERCENTILES = [50, 90, 99]
+
+# Inputs that must stay positive, samples below this are drawn again so the
+# distribution is truncated there instead of piling up at it
+MIN_SAMPLE_VALUE = 1e-6
+MAX_RESAMPLE_ROUNDS = 100
+
+
+def draw(rng, distribution, num_samples):
+    """Returns num_samples draws of a distribution"""
+    name, parameters = distribution[0], distribution[1:]
+    if name == 'normal':
+        return rng.normal(parameters[0], parameters[1], num_samples)
+    elif name == 'lognormal':
+        return rng.lognormal(parameters[0], parameters[1], num_samples)
+    elif name == 'uniform':
+        return rng.uniform(parameters[0], parameters[1], num_samples)
+    elif name == 'triangular':
+        return rng.triangular(parameters[0], parameters[1], parameters[2], num_samples)
+    raise InputError("Unknown distribution %s. Distributions: normal, lognormal, "
+                     "uniform, triangular" % name)
+
+
+def sample(rng, distribution, num_samples):
+    """
+    Returns num_samples draws of a distribution truncated below at
+    MIN_SAMPLE_VALUE, or the value if it isn't one.
+    """
+    if not isinstance(distribution, (tuple, list)):
+        return distribution
+    samples = draw(rng, distribution, num_samples)
+    for _ in range(MAX_RESAMPLE_ROUNDS):
+        low = np.flatnonzero(samples < MIN_SAMPLE_VALUE)
+        if len(low) == 0:
+            return samples
+        samples[low] = draw(rng, distribution, len(low))
+    raise InputError("Distribution %s keeps drawing values below %g, it should "
+                     "be mostly positive." % (distribution, MIN_SAMPLE_VALUE))
+
+
+class MonteCarloSizing:
+    def __init__(self,
+                 core_inputs: dict = None,
+                 log_inputs: dict = None,
+                 replication_first_full_days=None,
+                 replication_incremental_hours=None,
+                 num_samples: int = 100000,
+                 seed: int = None,
+                 chunk_size: int = 100000):
+
+        # core_inputs are the CapacityCoreBatch inputs and log_inputs the
+        # CapacityDBLogsBatch inputs, any of which can be a distribution
+        self.num_samples = num_samples
+        self.days_to_size = list(core_inputs['days_to_size'])
+        rng = np.random.default_rng(seed)
+
+        capacity_chunks = []
+        seeding_chunks = []
+        incremental_chunks = []
+        self.num_invalid = 0
+        # Size the samples in chunks to bound the memory of the batch arrays
+        for start in range(0, num_samples, chunk_size):
+            size = min(chunk_size, num_samples - start)
+            core_samples = {parameter: sample(rng, value, size)
+                            for parameter, value in core_inputs.items() if parameter != 'days_to_size'}
+            capacity_core = CapacityCoreBatch(days_to_size=self.days_to_size,
+                raise_on_invalid=False, **core_samples)
+            # Only some scenarios can be invalid, e.g. when sampled
+            # retentions overlap, those are dropped from the results
+            valid = np.broadcast_to(capacity_core.valid, (size,))
+            self.num_invalid += size - np.count_nonzero(valid)
+            capacity = np.broadcast_to(capacity_core.days_size_matrix,
+                                       (size, len(self.days_to_size)))
+
+            log_daily_ingest_tb = 0
+            if log_inputs:
+                log_samples = {parameter: sample(rng, value, size)
+                               for parameter, value in log_inputs.items()}
+                capacity_db_logs = CapacityDBLogsBatch(days_to_size=self.days_to_size, **log_samples)
+                capacity = capacity + capacity_db_logs.days_size_matrix
+                log_daily_ingest_tb = capacity_db_logs.log_daily_ingest_tb
+            capacity_chunks.append(capacity[valid])
+
+            if replication_first_full_days:
+                replication = Replication(core_first_full_tb=capacity_core.first_full_tb,
+                    core_total_incremental_tb=capacity_core.total_incremental_tb,
+                    log_daily_ingest_tb=log_daily_ingest_tb,
+                    replication_first_full_days=sample(rng, replication_first_full_days, size),
+                    replication_incremental_hours=sample(rng, replication_incremental_hours, size))
+                seeding_chunks.append(np.broadcast_to(replication.seeding_gbps, (size,))[valid])
+                incremental_chunks.append(np.broadcast_to(replication.incremental_gbps, (size,))[valid])
+
+        if self.num_invalid == num_samples:
+            raise InputError("All %d samples were invalid. Check that the distributions "
+                "of the retentions do not overlap." % num_samples)
+
+        # Samples x days capacity and per sample replication Gbps
+        self.capacity_samples = np.concatenate(capacity_chunks)
+        self.seeding_gbps_samples = np.concatenate(seeding_chunks) if seeding_chunks else None
+        self.incremental_gbps_samples = np.concatenate(incremental_chunks) if incremental_chunks else None
+
+        # Percentile -> days -> capacity, and percentile -> Gbps
+        capacity_percentiles = np.percentile(self.capacity_samples, PERCENTILES, axis=0)
+        self.capacity_percentiles = {
+            percentile: dict(zip(self.days_to_size, capacity_percentiles[index].tolist()))
+            for index, percentile in enumerate(PERCENTILES)}
+        if self.seeding_gbps_samples is not None:
+            self.seeding_gbps_percentiles = dict(zip(PERCENTILES,
+                np.percentile(self.seeding_gbps_samples, PERCENTILES).tolist()))
+            self.incremental_gbps_percentiles = dict(zip(PERCENTILES,
+                np.percentile(self.incremental_gbps_samples, PERCENTILES).tolist()))
+        else:
+            self.seeding_gbps_percentiles = None
+            self.incremental_gbps_percentiles = None
@@ -0,0 +1,90 @@
+"""
+Hourly replication simulation. Replication only sizes the link from the
+average daily change, while this lays out every snapshot of the CapacityCore
+tiers and the DB log ingest on an hourly time axis and sends them in order
+over a link of a given Gbps, to see how far replication falls behind.
+
+The backlog is a queue with a fixed service rate per hour, so it is
+computed for every hour at once with the Lindley recursion:
+    backlog[t] = max(backlog[t - 1] + arrivals[t] - link, 0)
+which is the running sum of arrivals - link minus its running minimum.
+"""
+
+import numpy as np
+from capacitybatch import TIERS
+from constants.global_constants import HOURS_IN_DAY, DAYS_IN_YEAR, \
+    Gbps_TO_TB_PER_HOUR, NETWORK_OVERHEAD_FACTOR
+
+
+class ReplicationSimulation:
+    def __init__(self,
+                 capacity_core=None,
+                 link_gbps: float = None,
+                 log_daily_ingest_tb: float = 0,
+                 num_days: int = DAYS_IN_YEAR,
+                 include_first_full: bool = False):
+
+        assert link_gbps and link_gbps > 0
+        self.link_gbps = link_gbps
+        self.num_days = num_days
+        self.num_hours = num_days * HOURS_IN_DAY
+        # TB the link sends in an hour, after the network overhead
+        self.link_tb_per_hour = link_gbps * Gbps_TO_TB_PER_HOUR / NETWORK_OVERHEAD_FACTOR
+
+        # Snapshot arrivals in TB per hour. Each tier takes a snapshot every
+        # frequency periods of the tier, the first one after a period, since
+        # the first full is at hour 0.
+        snapshot_tb = np.zeros(self.num_hours)
+        if include_first_full:
+            snapshot_tb[0] += capacity_core.first_full_tb
+        for tier, period_days, units_per_period in TIERS:
+            frequency = getattr(capacity_core, '%sFrequency' % tier)
+            if not frequency:
+                continue
+            interval_hours = int(round(period_days * HOURS_IN_DAY / units_per_period * frequency))
+            snapshot_tb[interval_hours::interval_hours] += \
+                getattr(capacity_core, '%sIncrementalSize' % tier)
+        self.snapshot_hours = np.flatnonzero(snapshot_tb)
+        self.snapshot_tb = snapshot_tb[self.snapshot_hours]
+
+        # DB logs are ingested continuously, so they arrive evenly every hour
+        self.log_tb_per_hour = log_daily_ingest_tb / HOURS_IN_DAY
+        self.arrivals_tb = snapshot_tb + self.log_tb_per_hour
+
+        # Backlog at the end of every hour from the Lindley recursion
+        net_tb = np.cumsum(self.arrivals_tb - self.link_tb_per_hour)
+        self.backlog_tb = net_tb - np.minimum(np.minimum.accumulate(net_tb), 0)
+        self.peak_backlog_tb = self.backlog_tb.max()
+        self.peak_backlog_hour = int(self.backlog_tb.argmax())
+        self.final_backlog_tb = self.backlog_tb[-1]
+        self.utilization = self.arrivals_tb.sum() / (self.link_tb_per_hour * self.num_hours)
+
+        # Data is sent in arrival order, so a snapshot is replicated when the
+        # cumulative TB sent reaches the cumulative TB that arrived with it.
+        # Snapshots arrive at the start of their hour, ahead of that hour's
+        # logs. Within the hour it completes in, the link is busy sending at
+        # its full rate, which gives the fraction of the hour.
+        arrived_tb = np.cumsum(self.arrivals_tb)
+        sent_tb = arrived_tb - self.backlog_tb
+        sent_before_tb = np.concatenate(([0], sent_tb[:-1]))
+        target_tb = arrived_tb[self.snapshot_hours] - self.log_tb_per_hour
+        # Compare with a small tolerance so rounding of the running sums
+        # doesn't push a snapshot into the next hour
+        tolerance = 1e-9 * max(arrived_tb[-1], 1)
+        completed_hour = np.searchsorted(sent_tb, target_tb - tolerance)
+        replicated = completed_hour < self.num_hours
+        completed_hour = np.minimum(completed_hour, self.num_hours - 1)
+        fraction = (target_tb - sent_before_tb[completed_hour]) / self.link_tb_per_hour
+        self.snapshot_completed_hours = np.where(replicated,
+            completed_hour + np.clip(fraction, 0, 1), np.inf)
+        self.snapshot_lag_hours = self.snapshot_completed_hours - self.snapshot_hours
+        self.num_not_replicated = int(np.count_nonzero(~replicated))
+        self.peak_lag_hours = self.snapshot_lag_hours.max() if len(self.snapshot_hours) else 0
+
+        # The RPO is the age of the newest replicated snapshot, which is the
+        # largest just before each snapshot completes while the target only
+        # has the one before it
+        if len(self.snapshot_hours) > 1:
+            self.rpo_hours = (self.snapshot_completed_hours[1:] - self.snapshot_hours[:-1]).max()
+        else:
+            self.rpo_hours = self.peak_lag_hours
@@ -0,0 +1,50 @@
+"""
+Closed form snapshot counts for a retention tier. A tier keeps a snapshot
+every frequency periods from the max retention of the tiers before it up to
+its own retention, so the number of snapshots it holds after any number of
+days only depends on those parameters. Tiers are cached so sizing many
+workloads with the same SLA reuses them.
+"""
+
+import math
+from functools import lru_cache
+from constants.global_constants import HOURS_IN_DAY
+
+
+class RetentionTier:
+    __slots__ = ('period_days', 'frequency', 'retention_days', 'prior_retention',
+                 'hourly', 'retained')
+
+    def __init__(self, period_days, frequency, retention_days, prior_retention, hourly):
+        self.period_days = period_days
+        self.frequency = frequency
+        self.retention_days = retention_days
+        self.prior_retention = prior_retention
+        self.hourly = hourly
+        if hourly:
+            self.retained = math.ceil(retention_days * HOURS_IN_DAY / frequency)
+        else:
+            self.retained = math.ceil(
+                math.ceil((retention_days - prior_retention) / period_days) / frequency)
+
+    def count(self, days):
+        """Returns the number of snapshots of the tier retained after days"""
+        if days >= self.retention_days:
+            return self.retained
+        if self.hourly:
+            return math.ceil(days * HOURS_IN_DAY / self.frequency)
+        return max(math.ceil((days - self.prior_retention) / self.period_days / self.frequency), 0)
+
+
+@lru_cache(maxsize=4096)
+def retention_tier(period_days, frequency, retention_days, prior_retention=0, hourly=False):
+    """
+    Returns the cached RetentionTier for the tier parameters.
+
+    :period_days: Number of days in one period of the tier, e.g. 7 for weeklies
+    :frequency: Take a snapshot every frequency periods, or hours for hourlies
+    :retention_days: Total retention of the tier in days
+    :prior_retention: Max retention in days of the tiers before this one
+    :hourly: True for hourlies, whose frequency is in hours
+    """
+    return RetentionTier(period_days, frequency, retention_days, prior_retention, hourly)
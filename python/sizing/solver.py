@@ -0,0 +1,186 @@
+"""
+Inverse sizing: find the inputs that fit a capacity or bandwidth budget.
+
+Capacity only grows with retention and change rates, and replication
+bandwidth only shrinks with more days for the first full, so each input
+is found by bisecting it between bounds. Only O(log n) scenarios are sized
+through CapacityCore / Replication instead of a grid of every value.
+
+core_inputs is a dict of the CapacityCore inputs except days_to_size, as
+built in main.py, and log_inputs an optional dict of the CapacityDBLogs
+inputs except days_to_size, replication_days and total_max_retention.
+"""
+
+import math
+from capacitycore import CapacityCore
+from capacityDBLogs import CapacityDBLogs
+from replication import Replication
+from error import InputError
+from constants.global_constants import DAYS_IN_WEEK, \
+    DAYS_IN_MONTH, DAYS_IN_YEAR, DAYS_IN_QUARTER
+
+RETENTION_INPUTS = {'hourly': 'hourly_retention', 'daily': 'daily_retention',
+                    'weekly': 'weekly_retention', 'monthly': 'monthly_retention',
+                    'quarterly': 'quarterly_retention', 'yearly': 'yearly_retention'}
+
+# Days in a unit of retention of each tier, in tier order (hourlies are
+# retained in days)
+RETENTION_UNIT_DAYS = [('hourly', 1), ('daily', 1), ('weekly', DAYS_IN_WEEK),
+                       ('monthly', DAYS_IN_MONTH), ('quarterly', DAYS_IN_QUARTER),
+                       ('yearly', DAYS_IN_YEAR)]
+
+
+def bisect_integer(fits, low, high):
+    """
+    Returns the largest integer in [low, high] for which fits() is True,
+    where fits() is True up to some value and False after it, or None if
+    it is False for low.
+    """
+    if not fits(low):
+        return None
+    while low < high:
+        middle = (low + high + 1) // 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+def bisect_float(fits, low, high, tolerance):
+    """Returns the largest value in [low, high] for which fits() is True, within tolerance"""
+    if not fits(low):
+        return None
+    if fits(high):
+        return high
+    while high - low > tolerance:
+        middle = (low + high) / 2
+        if fits(middle):
+            low = middle
+        else:
+            high = middle
+    return low
+
+
+def capacity_tb(core_inputs, log_inputs=None, days=None):
+    """
+    Returns the capacity after days, or the peak capacity if days is None,
+    of the core and DB log inputs.
+    """
+    days_to_size = [days] if days else []
+    core_inputs = dict(core_inputs)
+    core_inputs.setdefault('replication_days', 1)
+    capacity_core = CapacityCore(days_to_size=days_to_size, **core_inputs)
+    capacity_table = dict(capacity_core.days_size_table)
+    if log_inputs:
+        capacity_db_logs = CapacityDBLogs(days_to_size=days_to_size,
+            replication_days=capacity_core.replication_days,
+            total_max_retention=capacity_core.total_max_retention, **log_inputs)
+        for table_days in capacity_table:
+            capacity_table[table_days] += capacity_db_logs.days_size_table[table_days]
+    if days:
+        return capacity_table[days]
+    return max(capacity_table.values())
+
+
+def retention_range(core_inputs, tier, max_units=1000):
+    """
+    Returns the (low, high) retention, in units of the tier, that CapacityCore
+    accepts: at least the retention of the enabled tier before it and at most
+    the retention of the enabled tier after it. The last enabled tier must
+    also cover the replication days.
+    """
+    tiers = [name for name, unit_days in RETENTION_UNIT_DAYS]
+    unit_days = dict(RETENTION_UNIT_DAYS)
+    position = tiers.index(tier)
+
+    def retention_days(name):
+        return core_inputs.get(RETENTION_INPUTS[name]) * unit_days[name]
+
+    enabled = [name for name in tiers if core_inputs.get(name + '_frequency')]
+    before = [name for name in enabled if tiers.index(name) < position]
+    after = [name for name in enabled if tiers.index(name) > position]
+
+    low_days = retention_days(before[-1]) if before else 1
+    if not after:
+        low_days = max(low_days, core_inputs.get('replication_days') or 0)
+    low = max(math.ceil(low_days / unit_days[tier]), 1)
+    high = max_units
+    if after:
+        high = min(high, retention_days(after[0]) // unit_days[tier])
+    return low, high
+
+
+def max_retention(capacity_ceiling_tb, core_inputs, tier='monthly', log_inputs=None,
+                  days=None, max_units=1000):
+    """
+    Returns the largest retention, in units of the tier (e.g. months for
+    monthlies), whose capacity fits under the ceiling, or None if none fits.
+    Only retentions between those of the tiers before and after it are
+    valid, see retention_range().
+    """
+    retention_input = RETENTION_INPUTS[tier]
+    low, high = retention_range(core_inputs, tier, max_units)
+    if low > high:
+        return None
+
+    def fits(retention):
+        inputs = dict(core_inputs)
+        inputs[retention_input] = retention
+        try:
+            size = capacity_tb(inputs, log_inputs, days)
+        except InputError:
+            return False
+        return size is not None and size <= capacity_ceiling_tb
+
+    return bisect_integer(fits, low, high)
+
+
+def max_change_rate_headroom(capacity_ceiling_tb, core_inputs, log_inputs=None, days=None,
+                             max_factor=100, tolerance=0.001):
+    """
+    Returns the largest factor every change rate can be multiplied by with
+    the capacity still under the ceiling, e.g. 1.5 means change rates can
+    grow 50%. Returns None if the capacity is over the ceiling at 0 change.
+    """
+    change_rate_inputs = [parameter for parameter in core_inputs
+                          if parameter.endswith('_change_rate') and core_inputs[parameter]]
+
+    def fits(factor):
+        inputs = dict(core_inputs)
+        for parameter in change_rate_inputs:
+            # CapacityCore needs change rates > 0 for the tiers it uses
+            inputs[parameter] = max(core_inputs[parameter] * factor, 1e-9)
+        return capacity_tb(inputs, log_inputs, days) <= capacity_ceiling_tb
+
+    return bisect_float(fits, 0, max_factor, tolerance)
+
+
+def min_replication_first_full_days(bandwidth_gbps, core_first_full_tb, core_total_incremental_tb,
+                                    log_daily_ingest_tb=0, replication_incremental_hours=24,
+                                    max_days=365):
+    """
+    Returns the fewest days to replicate the first full in over a link of
+    bandwidth_gbps, or None if it does not fit within max_days.
+    """
+    def too_fast(first_full_days):
+        replication = Replication(core_first_full_tb=core_first_full_tb,
+            core_total_incremental_tb=core_total_incremental_tb,
+            log_daily_ingest_tb=log_daily_ingest_tb,
+            replication_first_full_days=first_full_days,
+            replication_incremental_hours=replication_incremental_hours)
+        return replication.seeding_gbps > bandwidth_gbps
+
+    # The days that need more bandwidth than the link come first
+    last_too_fast = bisect_integer(too_fast, 1, max_days)
+    if last_too_fast is None:
+        return 1
+    if last_too_fast == max_days:
+        return None
+    return last_too_fast + 1
+
+
+def min_brik_count(capacity_tb, brik_usable_tb):
+    """Returns the number of briks of brik_usable_tb needed to hold capacity_tb"""
+    assert brik_usable_tb > 0
+    return math.ceil(capacity_tb / brik_usable_tb)
@@ -0,0 +1,229 @@
+"""
+Sweep a grid of sizing inputs and stream the results to a CSV or Parquet file.
+
+The grid is a YAML or CSV file listing values for CapacityCore inputs plus
+the optional DB log and replication inputs below. Every parameter is either
+a single value, a list of values, or a range. All combinations are sized.
+
+YAML example:
+    days_to_size: [365, 730, 1095]
+    total_fetb: 100
+    data_reduction_ratio: {start: 1.5, stop: 3.0, step: 0.5}
+    daily_frequency: 1
+    daily_retention: [14, 30, 60]
+    daily_change_rate: {start: 1, stop: 5, step: 1}
+    replication_days: [7, 14]
+    replication_first_full_days: [2, 4]
+    replication_incremental_hours: 8
+
+CSV example, with a range as start:stop:step and a list as space separated:
+    parameter,values
+    days_to_size,365 730 1095
+    daily_change_rate,1:5:1
+
+Grid points are numbered and sized in chunks of consecutive points, so each
+task sent to a worker process is only a (start, stop) range. Only a bounded
+number of chunks are in flight at once, so memory stays flat regardless of
+the size of the grid.
+
+Usage:
+    python sweep.py --grid grid.yaml --output results.csv
+"""
+
+import argparse
+import csv
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from capacitybatch import CapacityCoreBatch, CapacityDBLogsBatch
+from replication import Replication
+from error import InputError
+
+# Optional inputs in addition to the CapacityCoreBatch inputs
+LOG_PARAMETERS = ['log_daily_fetb', 'log_data_reduction_ratio',
+                  'log_daily_non_compressible_fetb', 'log_retention_days']
+REPLICATION_PARAMETERS = ['replication_first_full_days', 'replication_incremental_hours']
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Sweep a grid of sizing inputs")
+    parser.add_argument("--grid", type=str, required=True, help="YAML or CSV file of parameter values")
+    parser.add_argument("--output", type=str, required=True, help="Output file, .csv or .parquet")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=50000, help="Number of grid points per chunk")
+    return parser.parse_args()
+
+
+def expand_values(value):
+    """Returns a list of values from a single value, list or range"""
+    if isinstance(value, dict):
+        # Include the stop value, with some slack for floating point steps
+        step = value.get('step', 1)
+        return np.arange(value['start'], value['stop'] + step / 2, step).tolist()
+    if isinstance(value, (list, tuple)):
+        return list(value)
+    return [value]
+
+
+def parse_csv_value(value):
+    """Parses a CSV grid value of start:stop:step or space separated values"""
+    value = value.strip()
+    if ':' in value:
+        start, stop, step = [float(part) for part in value.split(':')]
+        return {'start': start, 'stop': stop, 'step': step}
+    values = [float(part) for part in value.split()]
+    return values if len(values) > 1 else values[0]
+
+
+def load_grid(grid_path):
+    """Returns the days to size and a dict of parameter -> list of values"""
+    if grid_path.endswith('.csv'):
+        with open(grid_path, 'r') as csv_file:
+            raw_grid = {row['parameter'].strip(): parse_csv_value(row['values'])
+                        for row in csv.DictReader(csv_file)}
+    else:
+        import yaml
+        with open(grid_path, 'r') as yaml_file:
+            raw_grid = yaml.safe_load(yaml_file)
+    days_to_size = [int(days) for days in expand_values(raw_grid.pop('days_to_size'))]
+    grid = {parameter: expand_values(value) for parameter, value in raw_grid.items()}
+    return days_to_size, grid
+
+
+def check_grid(grid):
+    """Raises an InputError if the grid is missing inputs every point needs"""
+    if 'replication_days' not in grid:
+        raise InputError("The grid has no replication_days. Every point needs replication_days "
+                         "of at least 1 and at most its total retention, or it is invalid.")
+    if any(days <= 0 for days in grid['replication_days']):
+        raise InputError("replication_days must be larger than 0.")
+    given = [parameter for parameter in REPLICATION_PARAMETERS if parameter in grid]
+    if given and len(given) != len(REPLICATION_PARAMETERS):
+        raise InputError("Replication bandwidth needs both %s, the grid only has %s."
+                         % (' and '.join(REPLICATION_PARAMETERS), given[0]))
+    if 'log_daily_fetb' in grid and 'log_retention_days' not in grid:
+        raise InputError("DB log sizing with log_daily_fetb needs log_retention_days.")
+
+
+def size_chunk(grid, days_to_size, start, stop):
+    """
+    Sizes grid points [start, stop) and returns a dict of column -> array
+    with the parameters and results of the valid points.
+    """
+    parameters = list(grid)
+    shape = [len(grid[parameter]) for parameter in parameters]
+    point = np.arange(start, stop)
+    indices = np.unravel_index(point, shape)
+    inputs = {parameter: np.asarray(grid[parameter], dtype=float)[index]
+              for parameter, index in zip(parameters, indices)}
+
+    core_inputs = {parameter: values for parameter, values in inputs.items()
+                   if parameter not in LOG_PARAMETERS + REPLICATION_PARAMETERS}
+    core = CapacityCoreBatch(days_to_size=days_to_size, raise_on_invalid=False, **core_inputs)
+    capacity = core.days_size_matrix
+
+    log_daily_ingest_tb = 0
+    if 'log_daily_fetb' in inputs:
+        logs = CapacityDBLogsBatch(days_to_size=days_to_size,
+            **{parameter: inputs.get(parameter) for parameter in LOG_PARAMETERS})
+        capacity = capacity + logs.days_size_matrix
+        log_daily_ingest_tb = logs.log_daily_ingest_tb
+
+    columns = {'point': point}
+    columns.update(inputs)
+    for column, days in enumerate(days_to_size):
+        columns['capacity_%d_days' % days] = capacity[:, column]
+    columns['max_retention_days'] = core.total_max_retention
+    columns['max_retention_capacity'] = core.max_retention_capacity
+    columns['replication_capacity'] = core.replication_capacity
+
+    if 'replication_first_full_days' in inputs:
+        replication = Replication(core_first_full_tb=core.first_full_tb,
+            core_total_incremental_tb=core.total_incremental_tb,
+            log_daily_ingest_tb=log_daily_ingest_tb,
+            replication_first_full_days=inputs['replication_first_full_days'],
+            replication_incremental_hours=inputs['replication_incremental_hours'])
+        columns['seeding_gbps'] = replication.seeding_gbps
+        columns['incremental_gbps'] = replication.incremental_gbps
+
+    return {column: values[core.valid] for column, values in columns.items()}
+
+
+class ResultWriter:
+    """Appends result chunks to a CSV file, or a Parquet file if pyarrow is installed"""
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.parquet = output_path.endswith('.parquet')
+        self.writer = None
+        self.rows = 0
+        if self.parquet:
+            import pyarrow
+            import pyarrow.parquet
+            self.pyarrow = pyarrow
+        else:
+            self.file = open(output_path, 'w', newline='')
+
+    def write(self, columns):
+        if self.parquet:
+            table = self.pyarrow.table(columns)
+            if self.writer is None:
+                self.writer = self.pyarrow.parquet.ParquetWriter(self.output_path, table.schema)
+            self.writer.write_table(table)
+        else:
+            if self.writer is None:
+                self.writer = csv.writer(self.file)
+                self.writer.writerow(list(columns))
+            self.writer.writerows(zip(*[values.tolist() for values in columns.values()]))
+        self.rows += len(columns['point'])
+
+    def close(self):
+        if self.parquet:
+            if self.writer is not None:
+                self.writer.close()
+        else:
+            self.file.close()
+
+
+def run_sweep(grid, days_to_size, output_path, workers=None, chunk_size=50000):
+    """
+    Sizes every point of the grid across a pool of worker processes and
+    streams the results to output_path. Returns (points sized, points written).
+    """
+    check_grid(grid)
+    num_points = int(np.prod([len(values) for values in grid.values()]))
+    chunks = ((start, min(start + chunk_size, num_points))
+              for start in range(0, num_points, chunk_size))
+    writer = ResultWriter(output_path)
+    workers = workers or os.cpu_count()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Keep two chunks per worker in flight so workers never wait on
+            # the writer, without queueing the whole grid up front
+            pending = set()
+            for start, stop in chunks:
+                pending.add(executor.submit(size_chunk, grid, days_to_size, start, stop))
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        writer.write(future.result())
+            for future in wait(pending).done:
+                writer.write(future.result())
+    finally:
+        writer.close()
+    return num_points, writer.rows
+
+
+def main():
+    args = parse_arguments()
+    days_to_size, grid = load_grid(args.grid)
+    num_points = int(np.prod([len(values) for values in grid.values()]))
+    print("Sizing %d grid points with %d workers..." % (num_points, args.workers))
+    num_points, num_rows = run_sweep(grid, days_to_size, args.output, args.workers, args.chunk_size)
+    print("Wrote %d results to %s (%d invalid points skipped)" % (num_rows, args.output, num_points - num_rows))
+    if num_rows == 0:
+        print("Every grid point was invalid, check that replication_days is not larger than "
+              "the total retention and that each tier's retention is larger than the one before it")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from capacitycore import CapacityCore
+from capacityDBLogs import CapacityDBLogs
+from capacitybatch import CapacityCoreBatch
+from replication import Replication
+from workloads import VMS
+
+"""
+Benchmarks the sizing constructors over small, medium and huge input grids.
+
+Each benchmark builds a list of inputs from its grid, times constructing
+every one of them and records the operations per second of the best
+repeat and the peak memory allocated during one pass. Results are written
+to JSON, and if a baseline JSON is given, any benchmark whose throughput
+dropped more than the threshold below the baseline fails the run.
+
+To compare a new sizing engine, add a function returning its list of
+inputs per grid and its constructor to BENCHMARKS.
+
+Usage, from the sizing directory:
+    python -m tests.benchmark --output baseline.json
+    python -m tests.benchmark --baseline baseline.json --threshold 0.2
+"""
+
+# Days to size and number of parameter combinations of each grid
+GRIDS = {
+    'small': {'days_to_size': [365, 730, 1095, 1460, 1825], 'combinations': 2},
+    'medium': {'days_to_size': list(range(30, 1826, 30)), 'combinations': 4},
+    'huge': {'days_to_size': list(range(1, 1826)), 'combinations': 6},
+}
+
+
+def core_inputs(grid):
+    days_to_size = GRIDS[grid]['days_to_size']
+    values = list(range(1, GRIDS[grid]['combinations'] + 1))
+    inputs = []
+    for fetb, daily_change_rate, weekly_retention in itertools.product(values, values, values):
+        inputs.append(dict(total_fetb=fetb * 100, data_reduction_ratio=2.5,
+            total_non_compressible_fetb=20, days_to_size=list(days_to_size),
+            hourly_frequency=1, hourly_retention=3, hourly_change_rate=0.2,
+            daily_frequency=1, daily_retention=30, daily_change_rate=daily_change_rate,
+            weekly_frequency=1, weekly_retention=4 + weekly_retention * 4, weekly_change_rate=4,
+            monthly_frequency=1, monthly_retention=12, monthly_change_rate=10,
+            yearly_frequency=1, yearly_retention=3, yearly_change_rate=30,
+            replication_days=7))
+    return inputs
+
+
+def core_batch_inputs(grid):
+    # One batch of every scenario of the grid, so ops/sec times the number of
+    # scenarios is comparable to CapacityCore
+    inputs = core_inputs(grid)
+    batch_inputs = {parameter: [scenario[parameter] for scenario in inputs]
+                    for parameter in inputs[0] if parameter != 'days_to_size'}
+    batch_inputs['days_to_size'] = inputs[0]['days_to_size']
+    return [batch_inputs]
+
+
+def db_logs_inputs(grid):
+    days_to_size = GRIDS[grid]['days_to_size']
+    values = list(range(1, GRIDS[grid]['combinations'] + 1))
+    return [dict(log_daily_fetb=log_fetb, log_data_reduction_ratio=2,
+                 log_daily_non_compressible_fetb=2, log_retention_days=retention * 7,
+                 days_to_size=list(days_to_size), replication_days=7,
+                 total_max_retention=1095)
+            for log_fetb, retention in itertools.product(values, values)]
+
+
+def replication_inputs(grid):
+    values = list(range(1, GRIDS[grid]['combinations'] * 100 + 1))
+    return [dict(core_first_full_tb=value, core_total_incremental_tb=value / 50,
+                 log_daily_ingest_tb=value / 100, replication_first_full_days=2,
+                 replication_incremental_hours=8)
+            for value in values]
+
+
+def vms_inputs(grid):
+    values = list(range(1, GRIDS[grid]['combinations'] * 100 + 1))
+    return [dict(object_count=value * 10, cdp_bool=True, cdp_retention_hours=24,
+                 cdp_total_vms=value, cdp_avg_vmdks_per_vm=2, cdp_avg_write_MBPS=10,
+                 cdp_peak_write_MBPS=40)
+            for value in values]
+
+
+# Benchmark name -> (constructor, function returning the inputs of a grid)
+BENCHMARKS = {
+    'CapacityCore': (CapacityCore, core_inputs),
+    'CapacityCoreBatch': (CapacityCoreBatch, core_batch_inputs),
+    'CapacityDBLogs': (CapacityDBLogs, db_logs_inputs),
+    'Replication': (Replication, replication_inputs),
+    'VMS': (VMS, vms_inputs),
+}
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the sizing constructors")
+    parser.add_argument("--output", type=str, default="benchmark.json", help="JSON file to write results to")
+    parser.add_argument("--baseline", type=str, help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="Fail if ops/sec drops more than this fraction below the baseline")
+    parser.add_argument("--grids", type=str, nargs='+', default=list(GRIDS), choices=list(GRIDS))
+    parser.add_argument("--benchmarks", type=str, nargs='+', default=list(BENCHMARKS),
+                        choices=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=3, help="Number of timed passes, best is kept")
+    return parser.parse_args()
+
+
+def construct_all(constructor, inputs):
+    # Constructors append to days_to_size, so give every pass its own copy
+    for kwargs in inputs:
+        if 'days_to_size' in kwargs:
+            kwargs = dict(kwargs, days_to_size=list(kwargs['days_to_size']))
+        constructor(**kwargs)
+
+
+def run_benchmark(constructor, inputs, repeat=3):
+    """Returns a dict of the operations, ops/sec of the best pass and peak memory"""
+    best_seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        construct_all(constructor, inputs)
+        seconds = time.perf_counter() - start
+        if best_seconds is None or seconds < best_seconds:
+            best_seconds = seconds
+
+    # Measure memory in its own pass since tracemalloc slows allocations
+    tracemalloc.start()
+    construct_all(constructor, inputs)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'operations': len(inputs),
+            'seconds': best_seconds,
+            'ops_per_sec': len(inputs) / best_seconds,
+            'peak_memory_kb': peak_memory / 1024}
+
+
+def compare(results, baseline, threshold):
+    """Returns a list of the regressions of results against the baseline"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        baseline_ops = baseline[name]['ops_per_sec']
+        if result['ops_per_sec'] < baseline_ops * (1 - threshold):
+            regressions.append("%s: %.1f ops/sec is %.0f%% below the baseline of %.1f ops/sec"
+                               % (name, result['ops_per_sec'],
+                                  (1 - result['ops_per_sec'] / baseline_ops) * 100, baseline_ops))
+    return regressions
+
+
+def main():
+    args = parse_arguments()
+    results = {}
+    for benchmark in args.benchmarks:
+        constructor, inputs_function = BENCHMARKS[benchmark]
+        for grid in args.grids:
+            name = '%s/%s' % (benchmark, grid)
+            results[name] = run_benchmark(constructor, inputs_function(grid), args.repeat)
+            print("%-28s %12.1f ops/sec %12.1f KB peak" % (name, results[name]['ops_per_sec'],
+                                                           results[name]['peak_memory_kb']))
+
+    with open(args.output, 'w') as json_file:
+        json.dump({'python': platform.python_version(), 'platform': platform.platform(),
+                   'results': results}, json_file, indent=2)
+    print("Wrote results to %s" % args.output)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as json_file:
+            baseline = json.load(json_file)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print("REGRESSION %s" % regression)
+        if regressions:
+            sys.exit(1)
+        print("No regressions against %s" % args.baseline)
+
+
+if __name__ == '__main__':
+    main()
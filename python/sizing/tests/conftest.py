@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The sizing modules import each other by name, so run the tests from the
+# sizing directory as main.py is
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
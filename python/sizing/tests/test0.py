@@ -88,7 +88,41 @@ def check_replication(my_replication):
     print("Replication Incremental Size (TB): %f" % my_replication.core_total_incremental_tb)
     print("Replication DB Log Size (TB): %f" % my_replication.log_daily_ingest_tb)
     print("Replication target seeding in days: %d" % my_replication.replication_first_full_days)
-    print("Replication target incremental in hours: %d" % my_replication.replication_incrmental_hours)
+    print("Replication target incremental in hours: %d" % my_replication.replication_incremental_hours)
     print("")
     print("Replication seeding Gbps: %f" % my_replication.seeding_gbps)
     print("Replication incremental Gbps: %f" % my_replication.incremental_gbps)
+
+def check_replication_simulation(my_replication_simulation):
+    print("")
+    print("***** Replication Simulation Over %f Gbps *****" % my_replication_simulation.link_gbps)
+    print("Days simulated: %d" % my_replication_simulation.num_days)
+    print("Link utilization: %f" % my_replication_simulation.utilization)
+    print("Peak backlog (TB): %f at hour %d" % (my_replication_simulation.peak_backlog_tb,
+        my_replication_simulation.peak_backlog_hour))
+    print("Backlog at end (TB): %f" % my_replication_simulation.final_backlog_tb)
+    print("Peak snapshot lag (hours): %f" % my_replication_simulation.peak_lag_hours)
+    print("RPO achieved (hours): %f" % my_replication_simulation.rpo_hours)
+    print("Snapshots not replicated by the end: %d" % my_replication_simulation.num_not_replicated)
+
+def check_time_series(my_time_series, days_to_size, workload = 0):
+    print("")
+    print("***** Capacity Sizing With %f%% Annual Growth *****" % my_time_series.annual_growth_percent[workload])
+    print("Daily growth factor: %f" % my_time_series.daily_growth_factor[workload])
+    for days in sorted(days_to_size):
+        if days <= my_time_series.num_days:
+            print("Days - %d: %f" % (days, my_time_series.capacity_tb[workload, days]))
+    print("Peak capacity: %f" % my_time_series.peak_capacity_tb[workload])
+
+def check_monte_carlo(my_monte_carlo):
+    print("")
+    print("***** Monte Carlo Capacity Sizing, %d Samples *****" % my_monte_carlo.num_samples)
+    print("Invalid samples skipped: %d" % my_monte_carlo.num_invalid)
+    for percentile, days_size_table in my_monte_carlo.capacity_percentiles.items():
+        for days in days_size_table:
+            print("P%d Days - %d: %f" % (percentile, days, days_size_table[days]))
+    if my_monte_carlo.seeding_gbps_percentiles:
+        for percentile in my_monte_carlo.seeding_gbps_percentiles:
+            print("P%d Replication seeding Gbps: %f, incremental Gbps: %f" % (percentile,
+                my_monte_carlo.seeding_gbps_percentiles[percentile],
+                my_monte_carlo.incremental_gbps_percentiles[percentile]))
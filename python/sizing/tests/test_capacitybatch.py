@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from capacitybatch import CapacityCoreBatch, TIER_NAMES
+from capacitycore import CapacityCore
+
+DAYS_TO_SIZE = [1, 7, 30, 90, 365, 730, 1095, 1825]
+
+
+def random_scenarios(rng, num_scenarios):
+    """Valid CapacityCore inputs per scenario, some tiers disabled"""
+    hourly_retention = rng.integers(1, 8, num_scenarios)
+    daily_retention = np.maximum(rng.integers(7, 61, num_scenarios), hourly_retention)
+    yearly_retention = rng.integers(0, 8, num_scenarios)
+    return dict(total_fetb=rng.uniform(10, 1000, num_scenarios),
+        data_reduction_ratio=rng.uniform(1.5, 4, num_scenarios),
+        total_non_compressible_fetb=rng.uniform(0, 50, num_scenarios),
+        hourly_frequency=rng.integers(0, 5, num_scenarios),
+        hourly_retention=hourly_retention,
+        hourly_change_rate=rng.uniform(0.1, 1, num_scenarios),
+        daily_frequency=rng.integers(1, 3, num_scenarios),
+        daily_retention=daily_retention,
+        daily_change_rate=rng.uniform(1, 5, num_scenarios),
+        weekly_frequency=rng.integers(0, 2, num_scenarios),
+        weekly_retention=rng.integers(9, 53, num_scenarios),
+        weekly_change_rate=rng.uniform(2, 8, num_scenarios),
+        monthly_frequency=rng.integers(0, 3, num_scenarios),
+        monthly_retention=rng.integers(13, 61, num_scenarios),
+        monthly_change_rate=rng.uniform(5, 15, num_scenarios),
+        quarterly_frequency=np.zeros(num_scenarios, dtype=int),
+        quarterly_retention=np.zeros(num_scenarios, dtype=int),
+        quarterly_change_rate=np.zeros(num_scenarios),
+        yearly_frequency=(yearly_retention > 4).astype(int),
+        yearly_retention=yearly_retention,
+        yearly_change_rate=rng.uniform(10, 30, num_scenarios),
+        replication_days=rng.integers(1, 8, num_scenarios))
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_batch_matches_capacity_core(seed):
+    num_scenarios = 300
+    scenarios = random_scenarios(np.random.default_rng(seed), num_scenarios)
+    batch = CapacityCoreBatch(days_to_size=DAYS_TO_SIZE, **scenarios)
+    assert batch.valid.all()
+
+    for i in range(num_scenarios):
+        core = CapacityCore(days_to_size=list(DAYS_TO_SIZE),
+            **{parameter: value[i].item() for parameter, value in scenarios.items()})
+        assert batch.days_size_table(i) == core.days_size_table
+        assert batch.first_full_tb[i] == core.first_full_tb
+        assert batch.total_incremental_tb[i] == core.total_incremental_tb
+        assert batch.total_max_retention[i] == core.total_max_retention
+        assert batch.max_retention_capacity[i] == core.days_size_table[core.total_max_retention]
+        assert batch.replication_capacity[i] == core.replication_capacity
+        for tier in TIER_NAMES:
+            if getattr(core, '%sFrequency' % tier):
+                assert getattr(batch, '%sTotalSize' % tier)[i] == getattr(core, '%sTotalSize' % tier)
+                assert getattr(batch, '%sRetained' % tier)[i] == getattr(core, '%sRetained' % tier)
+            else:
+                assert getattr(batch, '%sTotalSize' % tier)[i] == 0
+
+
+def test_capacity_at_matches_days_size_matrix():
+    scenarios = random_scenarios(np.random.default_rng(3), 200)
+    batch = CapacityCoreBatch(days_to_size=DAYS_TO_SIZE, **scenarios)
+    # Unsorted days and days per scenario size the same as the sorted column
+    for column, days in enumerate(DAYS_TO_SIZE):
+        assert np.array_equal(batch.capacity_at(days), batch.days_size_matrix[:, column])
+        assert np.array_equal(batch.capacity_at(np.full(200, days)), batch.days_size_matrix[:, column])
+    reversed_days = np.array(DAYS_TO_SIZE[::-1], dtype=float)[:, np.newaxis]
+    assert np.array_equal(batch.capacity_at(reversed_days), batch.days_size_matrix[:, ::-1].T)
@@ -0,0 +1,10 @@
+import pytest
+from capacitycore import CapacityCore
+from error import InputError
+
+
+def test_negative_retention_without_prior_tier_raises():
+    with pytest.raises(InputError, match="Dailies are inclusive of prior tiers"):
+        CapacityCore(total_fetb=10, data_reduction_ratio=2, days_to_size=[30],
+                     daily_frequency=1, daily_retention=-1, daily_change_rate=2,
+                     replication_days=1)
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from error import InputError
+from montecarlo import MIN_SAMPLE_VALUE, MonteCarloSizing, sample
+from tests.test_solver import default_core_inputs
+
+
+def test_all_invalid_samples_raise():
+    # Dailies kept for less than the 3 days of hourlies are never valid
+    core_inputs = dict(default_core_inputs(), days_to_size=[365],
+                       daily_retention=('uniform', 1, 2))
+    with pytest.raises(InputError, match="All 100 samples were invalid"):
+        MonteCarloSizing(core_inputs, num_samples=100, seed=1)
+
+
+def test_samples_truncated_not_clipped():
+    # Half of a normal around 0 is drawn again, so none sit at the bound
+    samples = sample(np.random.default_rng(1), ('normal', 0, 1), 10000)
+    assert samples.min() > MIN_SAMPLE_VALUE
+    assert np.count_nonzero(samples == MIN_SAMPLE_VALUE) == 0
+
+
+def test_negative_distribution_raises():
+    with pytest.raises(InputError, match="keeps drawing values below"):
+        sample(np.random.default_rng(1), ('uniform', -2, -1), 10)
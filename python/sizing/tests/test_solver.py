@@ -0,0 +1,69 @@
+import pytest
+from input import *
+from solver import capacity_tb, max_retention, retention_range
+
+
+def default_core_inputs():
+    """CapacityCore inputs of input.py, as built in main.py"""
+    return dict(total_fetb = TOTAL_FETB,
+        data_reduction_ratio = DATA_REDUCTION_RATIO,
+        total_non_compressible_fetb = TOTAL_NON_COMPRESSIBLE_FETB,
+        hourly_frequency=HOURLY_FREQUENCY,
+        hourly_retention=HOURLY_RETENTION_DAYS,
+        hourly_change_rate=HOURLY_CHANGE_RATE_PERCENT,
+        daily_frequency=DAILY_FREQUENCY,
+        daily_retention=DAILY_RETENTION_DAYS,
+        daily_change_rate=DAILY_CHANGE_RATE_PERCENT,
+        weekly_frequency=WEEKLY_FREQUENCY,
+        weekly_retention=WEEKLY_RETENTION_WEEKS,
+        weekly_change_rate=WEEKLY_CHANGE_RATE_PERCENT,
+        monthly_frequency=MONTHLY_FREQUENCY,
+        monthly_retention=MONTHLY_RETENTION_MONTHS,
+        monthly_change_rate=MONTHLY_CHANGE_RATE_PERCENT,
+        quarterly_frequency=QUARTERLY_FREQUENCY,
+        quarterly_retention=QUARTERLY_RETENTION_QUARTERS,
+        quarterly_change_rate=QUARTERLY_CHANGE_RATE_PERCENT,
+        yearly_frequency=YEARLY_FREQUENCY,
+        yearly_retention=YEARLY_RETENTION_YEARS,
+        yearly_change_rate=YEARLY_CHANGE_RATE_PERCENT,
+        replication_days = REPLICATION_DAYS)
+
+
+def sized(core_inputs, tier, retention):
+    return capacity_tb(dict(core_inputs, **{tier + '_retention': retention}))
+
+
+@pytest.mark.parametrize('tier', ['daily', 'weekly', 'monthly'])
+def test_max_retention_between_bounds(tier):
+    core_inputs = default_core_inputs()
+    low, high = retention_range(core_inputs, tier)
+    assert low < high
+    ceiling = (sized(core_inputs, tier, low) + sized(core_inputs, tier, high)) / 2
+    retention = max_retention(ceiling, core_inputs, tier)
+    assert retention is not None
+    assert low <= retention < high
+    assert sized(core_inputs, tier, retention) <= ceiling
+    assert sized(core_inputs, tier, retention + 1) > ceiling
+
+
+@pytest.mark.parametrize('tier', ['daily', 'weekly', 'monthly'])
+def test_max_retention_capped_by_next_tier(tier):
+    core_inputs = default_core_inputs()
+    low, high = retention_range(core_inputs, tier)
+    assert max_retention(1e9, core_inputs, tier) == high
+
+
+@pytest.mark.parametrize('tier', ['daily', 'weekly', 'monthly'])
+def test_max_retention_nothing_fits(tier):
+    core_inputs = default_core_inputs()
+    low, high = retention_range(core_inputs, tier)
+    ceiling = sized(core_inputs, tier, low) / 2
+    assert max_retention(ceiling, core_inputs, tier) is None
+
+
+def test_retention_range_of_defaults():
+    core_inputs = default_core_inputs()
+    # Dailies sit between 3 days of hourlies and 8 weeks of weeklies
+    assert retention_range(core_inputs, 'daily') == (HOURLY_RETENTION_DAYS, WEEKLY_RETENTION_WEEKS * 7)
+    # Monthlies are the last tier, so are only bounded by the search
+    assert retention_range(core_inputs, 'monthly', max_units=100)[1] == 100
@@ -0,0 +1,112 @@
+"""
+Daily capacity simulation with annual growth. The annual growth percent is
+distributed on a daily basis using the compounding formula, so the full and
+every snapshot taken on a day are that much larger than the day before.
+
+Each retained snapshot of a tier was taken a fixed number of days apart, so
+the capacity a tier holds on a day is a geometric series over the growth
+factor and is computed in closed form for every (workload, day) at once.
+"""
+
+import numpy as np
+from capacitybatch import TIERS, tier_count
+from constants.global_constants import DAYS_IN_YEAR
+
+
+def daily_growth_factor(annual_growth_percent):
+    """Returns the compounding daily growth factor for an annual growth %"""
+    return (1 + np.asarray(annual_growth_percent, dtype=float) / 100) ** (1 / DAYS_IN_YEAR)
+
+
+def _geometric_sum(count, ratio):
+    """Returns ratio^0 + ... + ratio^(count - 1), which is count if ratio is 1"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(ratio == 1, count, (1 - ratio ** count) / (1 - ratio))
+
+
+class CapacityTimeSeries:
+    def __init__(self,
+                 capacity_core_batch=None,
+                 annual_growth_percent=0,
+                 num_days: int = 5 * DAYS_IN_YEAR,
+                 log_daily_ingest_tb=None,
+                 log_retention_days: int = None,
+                 block_days: int = DAYS_IN_YEAR):
+
+        # Each scenario of the CapacityCoreBatch is simulated as one workload
+        self.capacity_core_batch = capacity_core_batch
+        self.num_workloads = capacity_core_batch.num_scenarios
+        self.num_days = num_days
+        self.annual_growth_percent = np.broadcast_to(
+            np.asarray(annual_growth_percent, dtype=float), (self.num_workloads,))
+        self.daily_growth_factor = daily_growth_factor(self.annual_growth_percent)
+
+        if log_daily_ingest_tb is not None:
+            assert log_retention_days and log_retention_days > 0
+            self.log_daily_ingest_tb = np.broadcast_to(
+                np.asarray(log_daily_ingest_tb, dtype=float), (self.num_workloads,))
+        else:
+            self.log_daily_ingest_tb = None
+        self.log_retention_days = log_retention_days
+
+        # Day 0 is the first full so each column index is the day number
+        self.days = np.arange(num_days + 1)
+        self.core_capacity_tb = np.empty((self.num_workloads, num_days + 1))
+        self.log_capacity_tb = np.zeros((self.num_workloads, num_days + 1))
+        for days, core_capacity, log_capacity in self.blocks(block_days):
+            self.core_capacity_tb[:, days] = core_capacity
+            if log_capacity is not None:
+                self.log_capacity_tb[:, days] = log_capacity
+        self.capacity_tb = self.core_capacity_tb + self.log_capacity_tb
+        self.peak_capacity_tb = self.capacity_tb.max(axis=1)
+
+    def blocks(self, block_days: int = DAYS_IN_YEAR):
+        """
+        Generator of (days, core capacity, log capacity) for consecutive
+        blocks of days, each capacity a (workloads, block days) array. Use it
+        directly to stream very long simulations in bounded memory.
+        """
+        for start in range(0, self.num_days + 1, block_days):
+            days = np.arange(start, min(start + block_days, self.num_days + 1))
+            yield days, self.core_capacity(days), self.log_capacity(days)
+
+    def core_capacity(self, days):
+        """Returns the (workloads, days) capacity of the fulls and snapshots"""
+        batch = self.capacity_core_batch
+        growth = self.daily_growth_factor[:, np.newaxis]
+        growth_on_day = growth ** days
+        capacity = batch.first_full_tb[:, np.newaxis] * growth_on_day
+        for index, (_, period_days, units_per_period) in enumerate(TIERS):
+            if not batch.tier_enabled[index].any():
+                continue
+            frequency = batch.tier_frequency[index][:, np.newaxis]
+            retention_days = batch.tier_retention_days[index][:, np.newaxis]
+            prior_retention = batch.tier_prior_retention[index][:, np.newaxis]
+            incremental_size = batch.tier_incremental_size[index][:, np.newaxis]
+
+            # Snapshots retained on day t were taken on days t - prior
+            # retention, t - prior retention - spacing, ... so they sum to
+            # growth^(t - prior retention) * geometric sum of growth^-spacing
+            spacing = period_days * frequency / units_per_period
+            ratio = growth ** -spacing
+            scale = incremental_size * growth ** -prior_retention
+
+            # Once every scenario is past the tier retention, the count is the
+            # number retained and only the growth of the day changes
+            split = np.searchsorted(days, retention_days.max())
+            count = tier_count(days[:split], frequency, retention_days,
+                prior_retention, period_days, units_per_period)
+            capacity[:, :split] += scale * growth_on_day[:, :split] * \
+                _geometric_sum(count, ratio)
+            retained = scale * _geometric_sum(batch.tier_retained[index][:, np.newaxis], ratio)
+            capacity[:, split:] += retained * growth_on_day[:, split:]
+        return capacity
+
+    def log_capacity(self, days):
+        """Returns the (workloads, days) capacity of the retained DB logs"""
+        if self.log_daily_ingest_tb is None:
+            return None
+        growth = self.daily_growth_factor[:, np.newaxis]
+        count = np.minimum(days, self.log_retention_days)
+        return self.log_daily_ingest_tb[:, np.newaxis] * growth ** days * \
+            _geometric_sum(count, 1 / growth)
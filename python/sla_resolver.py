@@ -0,0 +1,96 @@
+#! /usr/bin/env python
+# https://build.rubrik.com
+# https://github.com/rubrikinc/rubrik-sdk-for-python
+
+# Title: sla_resolver.py
+# Description: Resolves Rubrik SLA Domain names to IDs. The full list of local SLA
+#              Domains is fetched once, then every name is an exact-match dict lookup
+#              instead of a GET /sla_domain?name= per name. Optionally saves the list
+#              to a file that is reused by later runs until it is older than ttl seconds.
+#
+# Usage:
+#   from sla_resolver import SlaResolver
+#   sla_resolver = SlaResolver(rubrik, cache_path='./sla_cache.json')
+#   sla_id = sla_resolver.resolve('Gold')
+
+import json
+import os
+import time
+
+# Number of SLA Domains to get per request
+SLA_PAGE_SIZE = 500
+
+
+class SlaResolver:
+    def __init__(self, rubrik, cache_path=None, ttl=3600):
+        """
+        :rubrik: rubrik_cdm.Connect to the cluster
+        :cache_path: File to save the SLA list to, or None to only keep it for this run
+        :ttl: Seconds a saved SLA list is reused for
+        """
+        self.rubrik = rubrik
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.sla_ids = None
+        self.from_cache = False
+        self.num_requests = 0
+
+    def _cache_key(self):
+        return getattr(self.rubrik, 'node_ip', '')
+
+    def _read_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            with open(self.cache_path, 'r') as file:
+                cache = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if cache.get('cluster') != self._cache_key() or time.time() - cache.get('fetched_at', 0) > self.ttl:
+            return None
+        return cache['sla_ids']
+
+    def _write_cache(self):
+        if not self.cache_path:
+            return
+        cache = {'cluster': self._cache_key(), 'fetched_at': time.time(), 'sla_ids': self.sla_ids}
+        temp_path = '{}.{}.tmp'.format(self.cache_path, os.getpid())
+        with open(temp_path, 'w') as file:
+            json.dump(cache, file)
+        os.replace(temp_path, self.cache_path)
+
+    def refresh(self):
+        """Gets every local SLA Domain from the cluster and builds the name to ID dict"""
+        sla_ids = {}
+        offset = 0
+        while True:
+            sla_info = self.rubrik.get('v1', '/sla_domain?primary_cluster_id=local&limit={}&offset={}'.format(
+                SLA_PAGE_SIZE, offset))
+            self.num_requests += 1
+            for sla in sla_info['data']:
+                # Keep the first SLA if names are duplicated
+                sla_ids.setdefault(sla['name'], sla['id'])
+            offset += len(sla_info['data'])
+            if not sla_info.get('hasMore') or not sla_info['data']:
+                break
+        self.sla_ids = sla_ids
+        self.from_cache = False
+        self._write_cache()
+        return self.sla_ids
+
+    def load(self):
+        """Loads the SLA list from the cache file if it is fresh, or from the cluster"""
+        if self.sla_ids is None:
+            self.sla_ids = self._read_cache()
+            self.from_cache = self.sla_ids is not None
+            if self.sla_ids is None:
+                self.refresh()
+        return self.sla_ids
+
+    def resolve(self, sla_name):
+        """Returns the ID of the SLA Domain with exactly this name, or None if there isn't one"""
+        self.load()
+        # A saved list can be missing SLAs created since, so check the cluster once
+        if sla_name not in self.sla_ids and self.from_cache:
+            self.refresh()
+        return self.sla_ids.get(sla_name)
@@ -0,0 +1,171 @@
+#! /usr/bin/env python
+# https://build.rubrik.com
+# https://github.com/rubrikinc/rubrik-sdk-for-python
+
+# Title: snapshot_dispatcher.py
+# Description: Takes on demand snapshots of many objects concurrently. Requests are sent
+#              from a thread pool with a cap on the requests in flight to each Rubrik
+#              cluster, and are retried with exponential backoff and jitter when a cluster
+#              returns 429 or 503. The request ID of each snapshot is written to a JSON
+#              lines result log to check on the snapshots afterwards. SNAPSHOT_TYPES maps
+#              each object type to its snapshot endpoint and payload, and to its bulk
+#              endpoint where the cluster has one.
+#
+# Usage:
+#   from snapshot_dispatcher import SnapshotDispatcher
+#   dispatcher = SnapshotDispatcher(max_in_flight=8, result_log_path='./results.jsonl')
+#   dispatcher.add(rubrik, '/vmware/vm/{}/snapshot'.format(vm_id), {'slaId': sla_id}, name=vm_name)
+#   dispatcher.add_objects(rubrik, 'SQL Server DB', sla_id, [(db_id, db_name), ...])
+#   results = dispatcher.dispatch()
+
+import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# HTTP statuses a cluster returns when it is rate limiting or busy, which are retried
+RETRY_STATUS_CODES = [429, 503]
+
+# Most objects to put in one request of a bulk snapshot endpoint
+BULK_BATCH_SIZE = 50
+
+
+def sla_payload(sla_id):
+    return {'slaId': sla_id}
+
+
+def oracle_payload(sla_id):
+    return {'slaId': sla_id, 'forceFullSnapshot': False}
+
+
+def mssql_bulk_payload(sla_id, object_ids):
+    return {'slaId': sla_id, 'databaseIds': object_ids}
+
+
+# Object type -> (API version, snapshot endpoint of an object, payload builder,
+# and the API version, endpoint and payload builder of a bulk snapshot of many
+# objects, or None if the cluster has no bulk endpoint for the type)
+SNAPSHOT_TYPES = {
+    'vSphere VM': ('v1', '/vmware/vm/{}/snapshot', sla_payload, None),
+    'Fileset': ('v1', '/fileset/{}/snapshot', sla_payload, None),
+    'SQL Server DB': ('v1', '/mssql/db/{}/snapshot', sla_payload,
+                      ('v1', '/mssql/db/bulk/snapshot', mssql_bulk_payload)),
+    'Oracle DB': ('internal', '/oracle/db/{}/snapshot', oracle_payload, None),
+    'Hyper-V VM': ('internal', '/hyperv/vm/{}/snapshot', sla_payload, None),
+    'AHV VM': ('internal', '/nutanix/vm/{}/snapshot', sla_payload, None),
+}
+
+# Other names of the object types, e.g. as they are shown in reports
+SNAPSHOT_TYPE_ALIASES = {
+    'VMware VM': 'vSphere VM',
+    'Linux & Unix Fileset': 'Fileset',
+    'Windows Fileset': 'Fileset',
+    'NAS Fileset': 'Fileset',
+    'MSSQL DB': 'SQL Server DB',
+    'SQL Server Database': 'SQL Server DB',
+    'Oracle Database': 'Oracle DB',
+    'Nutanix VM': 'AHV VM',
+}
+
+
+def is_retryable(error):
+    """Returns True if an error from a Rubrik API call is a 429 or 503"""
+    response = getattr(error, 'response', None)
+    status_code = getattr(response, 'status_code', None)
+    if status_code is not None:
+        return status_code in RETRY_STATUS_CODES
+    # The SDK raises its own exceptions with the status in the message
+    return re.search(r'\b(429|503)\b|Too Many Requests|Service Unavailable', str(error)) is not None
+
+
+class SnapshotDispatcher:
+    def __init__(self, max_in_flight=8, max_retries=5, backoff_seconds=2, result_log_path=None):
+        """
+        :max_in_flight: Most snapshot requests sent to one cluster at a time
+        :max_retries: Number of times to retry a request the cluster rate limited
+        :backoff_seconds: Delay before the first retry, doubled for every retry after
+        :result_log_path: JSON lines file to append the result of every request to
+        """
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.result_log_path = result_log_path
+        self.jobs = []
+        self.cluster_limits = {}
+        self.log_lock = threading.Lock()
+
+    def add(self, rubrik, endpoint, body, name=None, api_version='v1'):
+        """Queues a POST to take an on demand snapshot, e.g. to /vmware/vm/{id}/snapshot"""
+        self.jobs.append({'rubrik': rubrik, 'endpoint': endpoint, 'body': body,
+                          'name': name, 'api_version': api_version})
+
+    def add_objects(self, rubrik, object_type, sla_id, objects):
+        """
+        Queues on demand snapshots of objects of one type to one SLA, where
+        objects is a list of (object ID, name). Uses the bulk endpoint of the
+        type if it has one, else a request per object.
+        """
+        object_type = SNAPSHOT_TYPE_ALIASES.get(object_type, object_type)
+        if object_type not in SNAPSHOT_TYPES:
+            raise ValueError('Object type {} is not supported, supported types: {}'.format(
+                object_type, ', '.join(SNAPSHOT_TYPES)))
+        api_version, endpoint, payload, bulk = SNAPSHOT_TYPES[object_type]
+        if bulk:
+            bulk_api_version, bulk_endpoint, bulk_payload = bulk
+            for start in range(0, len(objects), BULK_BATCH_SIZE):
+                batch = objects[start:start + BULK_BATCH_SIZE]
+                self.add(rubrik, bulk_endpoint, bulk_payload(sla_id, [object_id for object_id, name in batch]),
+                         name=', '.join(name for object_id, name in batch), api_version=bulk_api_version)
+        else:
+            for object_id, name in objects:
+                self.add(rubrik, endpoint.format(object_id), payload(sla_id), name=name, api_version=api_version)
+
+    def _cluster_limit(self, rubrik):
+        cluster = getattr(rubrik, 'node_ip', id(rubrik))
+        if cluster not in self.cluster_limits:
+            self.cluster_limits[cluster] = threading.BoundedSemaphore(self.max_in_flight)
+        return cluster, self.cluster_limits[cluster]
+
+    def _log(self, result):
+        if not self.result_log_path:
+            return
+        with self.log_lock:
+            with open(self.result_log_path, 'a') as file:
+                file.write(json.dumps(result) + '\n')
+
+    def _send(self, job):
+        cluster, limit = self._cluster_limit(job['rubrik'])
+        result = {'cluster': str(cluster), 'name': job['name'], 'endpoint': job['endpoint'],
+                  'request_id': None, 'status': None, 'attempts': 0, 'error': None}
+        for attempt in range(self.max_retries + 1):
+            result['attempts'] = attempt + 1
+            try:
+                with limit:
+                    response = job['rubrik'].post(job['api_version'], job['endpoint'], job['body'])
+                result['request_id'] = response.get('id')
+                result['status'] = response.get('status', 'QUEUED')
+                result['error'] = None
+                break
+            except Exception as e:
+                result['status'] = 'FAILED'
+                result['error'] = str(e)
+                if not is_retryable(e) or attempt == self.max_retries:
+                    break
+                # Sleep outside the cluster limit so other requests can go
+                time.sleep(self.backoff_seconds * 2 ** attempt + random.uniform(0, self.backoff_seconds))
+        result['time'] = datetime.now(timezone.utc).isoformat()
+        self._log(result)
+        return result
+
+    def dispatch(self):
+        """Sends every queued request and returns their results in the order they were added"""
+        for job in self.jobs:
+            self._cluster_limit(job['rubrik'])
+        num_workers = max(self.max_in_flight * len(self.cluster_limits), 1)
+        with ThreadPoolExecutor(max_workers=num_workers) as executor:
+            results = list(executor.map(self._send, self.jobs))
+        self.jobs = []
+        return results
@@ -0,0 +1,70 @@
+#! /usr/bin/env python
+# https://build.rubrik.com
+
+# Title: snapshot_index.py
+# Description: Time index of a list of snapshots. Each snapshot date is parsed once into
+#              a sorted list of epoch seconds, then the nearest snapshot to a time is
+#              found with bisect. snapshot_time_range() builds the RSC GraphQL timeRange
+#              input so only the snapshots in a time range are fetched.
+#
+# Usage:
+#   from snapshot_index import SnapshotIndex
+#   index = SnapshotIndex(snapshot_list)
+#   snapshot = index.nearest(datetime(2025, 8, 8, 20, 0))
+
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+
+def to_epoch(value):
+    """Returns epoch seconds of a datetime, naive ones are UTC, or of a number"""
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value.timestamp()
+    return float(value)
+
+
+def parse_snapshot_date(date):
+    """Returns the epoch seconds of a snapshot date such as 2025-08-08T20:00:00.000Z"""
+    return datetime.fromisoformat(date.replace('Z', '+00:00')).timestamp()
+
+
+def format_snapshot_date(value):
+    """Returns a datetime or epoch seconds as a UTC date like the snapshot dates"""
+    date = datetime.fromtimestamp(to_epoch(value), timezone.utc)
+    return date.strftime('%Y-%m-%dT%H:%M:%S.') + '%03dZ' % (date.microsecond // 1000)
+
+
+def snapshot_time_range(start=None, end=None):
+    """
+    Returns the RSC GraphQL TimeRangeInput from start to end, which can be
+    datetimes (naive ones are UTC) or epoch seconds. A missing start is the
+    epoch and a missing end is now. RSC includes snapshots taken at the end.
+    """
+    return {'start': format_snapshot_date(start if start is not None else 0),
+            'end': format_snapshot_date(end if end is not None else datetime.now(timezone.utc))}
+
+
+class SnapshotIndex:
+    def __init__(self, snapshots, date_key='date'):
+        """
+        :snapshots: Iterable of snapshot dicts, e.g. the nodes of a snapshot connection
+        :date_key: Key of the snapshot date in each snapshot
+        """
+        dated = sorted(((parse_snapshot_date(snapshot[date_key]), snapshot) for snapshot in snapshots),
+                       key=lambda item: item[0])
+        self.epochs = [item[0] for item in dated]
+        self.snapshots = [item[1] for item in dated]
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    def nearest(self, time):
+        """Returns the snapshot nearest to the time, or None if there are none"""
+        epoch = to_epoch(time)
+        position = bisect_left(self.epochs, epoch)
+        candidates = [index for index in (position - 1, position) if 0 <= index < len(self.epochs)]
+        if not candidates:
+            return None
+        return self.snapshots[min(candidates, key=lambda index: abs(self.epochs[index] - epoch))]
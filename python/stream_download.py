@@ -0,0 +1,112 @@
+#! /usr/bin/env python
+# https://build.rubrik.com
+
+# Title: stream_download.py
+# Description: Downloads a file to disk in fixed-size chunks so memory stays the same
+#              regardless of the file size, e.g. for multi-GB report CSVs. The download is
+#              written to a .part file and renamed when complete. If the transfer is
+#              interrupted it is resumed with an HTTP Range request from the bytes already
+#              written, both on retry and when the script is run again. Optionally gzips
+#              the file as it is written.
+#
+# Usage:
+#   from stream_download import stream_download
+#   stream_download(download_url, 'report.csv', get=client.get)
+#   stream_download(csv_link, 'report.csv.gz', compress=True, verify=False)
+
+import gzip
+import os
+import time
+import requests
+
+# Bytes read from the response and written to disk at a time
+CHUNK_SIZE = 1024 * 1024
+
+
+def _resume_offset(part_path, offset_path, compress):
+    """Returns the bytes of the file already downloaded to the .part file"""
+    if not os.path.exists(part_path):
+        return 0
+    if not compress:
+        return os.path.getsize(part_path)
+    # A gzip .part file holds complete gzip members of the bytes in the
+    # offset file, anything written after the last complete member is cut
+    try:
+        with open(offset_path, 'r') as file:
+            offset, compressed_size = [int(value) for value in file.read().split()]
+    except (OSError, ValueError):
+        return 0
+    if os.path.getsize(part_path) < compressed_size:
+        return 0
+    with open(part_path, 'r+b') as file:
+        file.truncate(compressed_size)
+    return offset
+
+
+def stream_download(url, filename, get=None, chunk_size=CHUNK_SIZE, compress=False,
+                    resume=True, max_retries=3, retry_delay=5, **kwargs):
+    """
+    Downloads url to filename and returns the number of bytes downloaded.
+
+    :get: Function to send the GET with, e.g. RscClient.get to add the
+          authorization header, defaults to requests.get
+    :compress: Gzip the file as it is written
+    :resume: Resume a .part file left by an earlier run instead of starting over
+    :max_retries: Number of times to resume after a connection error
+    :kwargs: Passed to get, e.g. verify=False
+    """
+    get = get or requests.get
+    part_path = f"{filename}.part"
+    offset_path = f"{filename}.part.offset"
+    if not resume:
+        for path in (part_path, offset_path):
+            if os.path.exists(path):
+                os.remove(path)
+    offset = _resume_offset(part_path, offset_path, compress)
+
+    headers = dict(kwargs.pop('headers', {}))
+    # Ranges are of the bytes as sent, so don't let the server compress them
+    headers['Accept-Encoding'] = 'identity'
+    attempt = 0
+    while True:
+        if offset:
+            headers['Range'] = f"bytes={offset}-"
+        else:
+            headers.pop('Range', None)
+        try:
+            with get(url, headers=headers, stream=True, **kwargs) as response:
+                if response.status_code == 416 and offset:
+                    # Range starts at the end of the file, it is already complete
+                    break
+                response.raise_for_status()
+                if offset and response.status_code != 206:
+                    # The server ignored the Range, so start over
+                    offset = 0
+                mode = 'ab' if offset else 'wb'
+                with open(part_path, mode) as file:
+                    output = gzip.GzipFile(fileobj=file, mode='wb') if compress else file
+                    try:
+                        for chunk in response.iter_content(chunk_size=chunk_size):
+                            output.write(chunk)
+                            offset += len(chunk)
+                    finally:
+                        # Closing ends the gzip member, so a resume appends a
+                        # new member and the file still decompresses as one
+                        if compress:
+                            output.close()
+                            file.flush()
+                            with open(offset_path, 'w') as offset_file:
+                                offset_file.write(f"{offset} {file.tell()}")
+            break
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.Timeout) as e:
+            attempt += 1
+            if attempt > max_retries:
+                raise
+            print(f"Download interrupted after {offset} bytes, resuming: {str(e)}")
+            time.sleep(retry_delay)
+
+    os.replace(part_path, filename)
+    if os.path.exists(offset_path):
+        os.remove(offset_path)
+    return offset